@@ -1,25 +1,50 @@
 import streamlit as st
 from streamlit_gsheets import GSheetsConnection
-import pandas as pd
-from datetime import datetime
+import os
 
 # --- IMPORTACIÓN DE MÓDULOS ---
-from modulos.inicio import render_inicio
-from modulos.reportes import render_reportes
-from modulos.ventas import render_ventas
-from modulos.credito import render_detalle_credito
-from modulos.cobranza import render_cobranza
-from modulos.gastos import render_gastos
-from modulos.ubicaciones import render_ubicaciones
-from modulos.directorio import render_directorio
-from modulos.comisiones import render_comisiones
+# Las páginas (modulos.inicio, modulos.ventas, ...) se importan al abrirlas: ver modulos/paginas.py
+from modulos import perfil
+from modulos.paginas import PAGINAS, pagina
+from modulos.almacen import crear_almacen
+from modulos.datos import configurar, cargar_datos, cargar_varios, edades, invalidar, invalidos
+from modulos.cuota import PLANIFICADOR
+from modulos.auditoria import agregar_invalidos, auditar, problemas
+from modulos.migraciones import aplicar_migraciones
 
 # --- CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(page_title="Valle Mart - Gestión Inmobiliaria", layout="wide", page_icon="🏢")
 
-# --- CONEXIÓN A GOOGLE SHEETS ---
-conn = st.connection("gsheets", type=GSheetsConnection)
+# --- ALMACENAMIENTO (GOOGLE SHEETS / SQLITE LOCAL / ESPEJO) ---
 URL_SHEET = "https://docs.google.com/spreadsheets/d/15j-kbr6fFk-l_hgzQ28SSxQ3Hhp-FPJKT1OvNWzqtUg/"
+MODO_ALMACEN = os.environ.get("VALLEMART_ALMACEN", "gsheets")  # gsheets | local | espejo
+RUTA_LOCAL = os.environ.get("VALLEMART_DB", "vallemart.db")
+MIGRAR_AL_INICIAR = os.environ.get("VALLEMART_MIGRAR", "1") == "1"  # o: python -m modulos.migraciones
+PESTANAS = ["ventas", "pagos", "clientes", "vendedores", "ubicaciones", "gastos", "pagos_comisiones"]
+
+@st.cache_resource
+def obtener_almacen():
+    conn = None
+    if MODO_ALMACEN != "local":
+        conn = st.connection("gsheets", type=GSheetsConnection)
+    return crear_almacen(MODO_ALMACEN, conn=conn, url=URL_SHEET, ruta=RUTA_LOCAL)
+
+with perfil.medir("almacén"):
+    almacen = obtener_almacen()
+    configurar(almacen)
+
+@st.cache_resource(show_spinner=False)
+def migracion_inicial():
+    # Una vez por proceso; si falla se muestra el error y no se reintenta en cada render
+    if not MIGRAR_AL_INICIAR:
+        return [], None
+    try:
+        return aplicar_migraciones(almacen), None
+    except Exception as e:
+        return [], str(e)
+
+with perfil.medir("migraciones"):
+    migraciones_aplicadas, error_migracion = migracion_inicial()
 
 # --- FUNCIÓN PARA FORMATO DE MONEDA ($) ---
 def fmt_moneda(valor):
@@ -28,72 +53,37 @@ def fmt_moneda(valor):
     except (ValueError, TypeError):
         return "$ 0.00"
 
-# --- FUNCIÓN DE CARGA CON PARCHE PARA TABLAS VACÍAS ---
-@st.cache_data(ttl=300)
-def cargar_datos(pestana):
-    try:
-        df = conn.read(spreadsheet=URL_SHEET, worksheet=pestana)
-        
-        if df is None or df.empty:
-            if pestana == "ubicaciones":
-                return pd.DataFrame(columns=["id_lote", "ubicacion", "manzana", "lote", "fase", "precio", "enganche_req", "estatus"])
-            
-            if pestana == "ventas":
-                return pd.DataFrame(columns=[
-                    "id_venta", "fecha_registro", "fecha_contrato", "inicio_mensualidades", 
-                    "ubicacion", "cliente", "vendedor", "precio_total", 
-                    "enganche_pagado", "enganche_requerido", "plazo_meses", 
-                    "mensualidad", "estatus_pago", "comentarios"
-                ])
-            
-            if pestana == "pagos":
-                return pd.DataFrame(columns=["id_pago", "fecha", "ubicacion", "cliente", "monto", "metodo", "folio", "comentarios"])
-            
-            if pestana == "clientes":
-                return pd.DataFrame(columns=["id_cliente", "nombre", "telefono", "correo"])
-            
-            if pestana == "vendedores":
-                return pd.DataFrame(columns=["id_vendedor", "nombre", "telefono", "comision_base"])
-
-            if pestana == "pagos_comisiones": # <--- PARCHE PARA NUEVA TABLA
-                return pd.DataFrame(columns=["vendedor", "monto", "fecha", "nota"])
-                
-            return pd.DataFrame()
-            
-        return df
-    except Exception as e:
-        st.sidebar.error(f"⚠️ Error en pestaña '{pestana}': {str(e)[:50]}")
-        return pd.DataFrame()
-
-def auditar_base_de_datos():
+def fmt_edad(segundos):
+    if segundos is None:
+        return "sin sincronizar"
+    if segundos < 60:
+        return f"hace {segundos:.0f} s"
+    if segundos < 3600:
+        return f"hace {segundos // 60:.0f} min"
+    return f"hace {segundos / 3600:.1f} h"
+
+@st.cache_resource(show_spinner=False)
+def auditoria_inicial():
+    # Una sola lectura de encabezados por proceso; el botón de auditar la repite
+    return auditar(almacen)
+
+def auditar_base_de_datos(reporte):
     st.subheader("🔍 Auditoría de Estructura")
-    
-    estructura_ideal = {
-        "ubicaciones": ["id_lote", "ubicacion", "manzana", "lote", "fase", "precio", "enganche_req", "estatus"],
-        "ventas": ["id_venta", "fecha_registro", "fecha_contrato", "inicio_mensualidades", "ubicacion", "cliente", "vendedor", "precio_total", "enganche_pagado", "enganche_requerido", "plazo_meses", "mensualidad", "estatus_pago", "comentarios"],
-        "pagos": ["id_pago", "fecha", "ubicacion", "cliente", "monto", "metodo", "folio", "comentarios"],
-        "clientes": ["id_cliente", "nombre", "telefono", "correo"],
-        "vendedores": ["id_vendedor", "nombre", "telefono", "comision_base"],
-        "pagos_comisiones": ["vendedor", "monto", "fecha", "nota"]
-    }
-    
-    errores = 0
-    for pestana, columnas_esperadas in estructura_ideal.items():
-        try:
-            df_real = conn.read(spreadsheet=URL_SHEET, worksheet=pestana)
-            columnas_reales = df_real.columns.tolist()
-            faltantes = [col for col in columnas_esperadas if col not in columnas_reales]
-            
-            if faltantes:
-                st.error(f"❌ En **'{pestana}'** faltan: {', '.join(faltantes)}")
-                errores += 1
-            else:
-                st.success(f"✅ **'{pestana}'** está perfecta.")
-                
-        except Exception:
+
+    for pestana, r in reporte.items():
+        if r["error"]:
+            st.warning(f"⚠️ No se pudo leer **'{pestana}'**: {r['error']}")
+        elif not r["existe"]:
             st.warning(f"⚠️ La pestaña **'{pestana}'** no existe en el archivo.")
-            errores += 1
-            
+        elif r["faltantes"] or r["tipos"]:
+            if r["faltantes"]:
+                st.error(f"❌ En **'{pestana}'** faltan: {', '.join(r['faltantes'])}")
+            for col, ejemplos in r["tipos"].items():
+                st.error(f"❌ En **'{pestana}'**, '{col}' tiene valores inválidos: {', '.join(ejemplos)}")
+        else:
+            st.success(f"✅ **'{pestana}'** está perfecta.")
+
+    errores = problemas(reporte)
     if errores == 0:
         st.info("💡 Tu base de datos está 100% sincronizada con el código.")
     else:
@@ -103,63 +93,84 @@ def auditar_base_de_datos():
 with st.sidebar:
     st.title("🏢 Valle Mart")
     
-    st.subheader("Navegación") # TEMPORALMENTE FUERA ("📈 Reportes Financieros")
-    menu = st.radio(
-        "Seleccione un módulo:",
-        ["🏠 Inicio (Cartera)", "📝 Ventas", "📊 Detalle de Crédito", "💰 Cobranza", "🎖️ Comisiones", "💸 Gastos", "📍 Ubicaciones", "👥 Directorio"]
-    )
+    st.subheader("Navegación")
+    menu = st.radio("Seleccione un módulo:", list(PAGINAS))
     
     st.divider()
 
     if st.button("🔄 Actualizar Información", use_container_width=True):
-        st.cache_data.clear()
+        almacen.sincronizar(PESTANAS)
+        invalidar()
         st.rerun()
 
     with st.expander("🛠️ Herramientas de Sistema"):
         if st.button("🔍 Auditar Columnas"):
-            auditar_base_de_datos()
+            auditoria_inicial.clear()
+            auditar_base_de_datos(agregar_invalidos(auditoria_inicial(), invalidos()))
 
     st.markdown("---")
     st.write("### 🌐 Sistema")
     st.success("✅ Conectado a la Nube")
-    ahora = datetime.now().strftime("%H:%M:%S")
-    st.info(f"Última Sincronización: {ahora}")
+    if error_migracion:
+        st.error(f"⚠️ No se pudieron aplicar las migraciones: {error_migracion[:80]}")
+    elif migraciones_aplicadas:
+        st.caption(f"🛠️ Migraciones aplicadas: {', '.join(f'{n:03d}' for n, _ in migraciones_aplicadas)}")
+    with perfil.medir("auditoría"):
+        # La muestra del arranque más lo ilegible de las pestañas ya cargadas completas
+        n_problemas = problemas(agregar_invalidos(auditoria_inicial(), invalidos()))
+    if n_problemas:
+        st.warning(f"⚠️ {n_problemas} pestaña(s) con problemas de estructura. Revise 'Auditar Columnas'.")
 
 # --- RENDERIZADO DE MÓDULOS ---
-if menu == "🏠 Inicio (Cartera)":
-    df_v, df_p, df_cl = cargar_datos("ventas"), cargar_datos("pagos"), cargar_datos("clientes")
-    render_inicio(df_v, df_p, df_cl, conn, URL_SHEET, fmt_moneda)
+render = pagina(menu)  # importa solo el módulo de la página elegida
 
-elif menu == "📈 Reportes Financieros":
-    df_v, df_p, df_g = cargar_datos("ventas"), cargar_datos("pagos"), cargar_datos("gastos")
-    render_reportes(df_v, df_p, df_g, fmt_moneda)
+with perfil.medir(f"primer render {menu}"):
+    if menu == "🏠 Inicio (Cartera)":
+        df_v, df_p, df_cl = cargar_varios(["ventas", "pagos", "clientes"])
+        render(df_v, df_p, df_cl, almacen, fmt_moneda)
 
-elif menu == "📝 Ventas":
-    df_v, df_u, df_cl, df_vd, df_p = cargar_datos("ventas"), cargar_datos("ubicaciones"), cargar_datos("clientes"), cargar_datos("vendedores"), cargar_datos("pagos")
-    render_ventas(df_v, df_u, df_cl, df_vd, df_p, conn, URL_SHEET, fmt_moneda)
+    elif menu == "📈 Reportes Financieros":
+        df_v, df_p, df_g, df_u = cargar_varios(["ventas", "pagos", "gastos", "ubicaciones"])
+        render(df_v, df_p, df_g, df_u, fmt_moneda)
 
-elif menu == "📊 Detalle de Crédito":
-    df_v, df_p = cargar_datos("ventas"), cargar_datos("pagos")
-    render_detalle_credito(df_v, df_p, fmt_moneda)
+    elif menu == "📝 Ventas":
+        df_v, df_u, df_cl, df_vd, df_p = cargar_varios(["ventas", "ubicaciones", "clientes", "vendedores", "pagos"])
+        render(df_v, df_u, df_cl, df_vd, df_p, almacen, fmt_moneda)
 
-elif menu == "💰 Cobranza":
-    df_v, df_p = cargar_datos("ventas"), cargar_datos("pagos")
-    render_cobranza(df_v, df_p, conn, URL_SHEET, fmt_moneda, cargar_datos)
+    elif menu == "📊 Detalle de Crédito":
+        df_v, df_p = cargar_varios(["ventas", "pagos"])
+        render(df_v, df_p, fmt_moneda)
 
-elif menu == "🎖️ Comisiones":
-    df_v = cargar_datos("ventas")
-    df_p_com = cargar_datos("pagos_comisiones")
-    render_comisiones(df_v, df_p_com, conn, URL_SHEET, fmt_moneda)
+    elif menu == "💰 Cobranza":
+        df_v, df_p = cargar_varios(["ventas", "pagos"])
+        render(df_v, df_p, almacen, fmt_moneda)
 
-elif menu == "💸 Gastos":
-    df_g = cargar_datos("gastos")
-    render_gastos(df_g, conn, URL_SHEET, fmt_moneda, cargar_datos)
+    elif menu == "🎖️ Comisiones":
+        df_v, df_p_com = cargar_varios(["ventas", "pagos_comisiones"])
+        render(df_v, df_p_com, almacen, fmt_moneda)
 
-elif menu == "📍 Ubicaciones":
-    df_u = cargar_datos("ubicaciones")
-    render_ubicaciones(df_u, conn, URL_SHEET, cargar_datos)
+    elif menu == "💸 Gastos":
+        df_g = cargar_datos("gastos")
+        render(df_g, almacen, fmt_moneda)
 
-elif menu == "👥 Directorio":
-    df_cl, df_vd = cargar_datos("clientes"), cargar_datos("vendedores")
-    render_directorio(df_cl, df_vd, conn, URL_SHEET)
+    elif menu == "📍 Ubicaciones":
+        df_u = cargar_datos("ubicaciones")
+        render(df_u, almacen)
 
+    elif menu == "👥 Directorio":
+        df_cl, df_vd = cargar_varios(["clientes", "vendedores"])
+        render(df_cl, df_vd, almacen)
+
+# --- ANTIGÜEDAD DE LOS DATOS ---
+# Va después de la página para incluir las pestañas que acaba de cargar; el refrescador las renueva solo
+with st.sidebar:
+    edad = edades()
+    if edad:
+        st.info("Última Sincronización:\n" + "\n".join(
+            f"- {p}: {fmt_edad(edad[p])}" for p in PESTANAS if p in edad))
+    st.caption(f"📨 Peticiones en cola: {PLANIFICADOR.profundidad()} · Límite: {PLANIFICADOR.por_minuto}/min")
+
+if perfil.ACTIVO:
+    with st.sidebar.expander("⏱️ Perfil de arranque", expanded=True):
+        for paso, segundos in perfil.tiempos().items():
+            st.caption(f"{paso}: {segundos * 1000:,.0f} ms")
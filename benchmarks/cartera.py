@@ -0,0 +1,70 @@
+"""Benchmark del motor de mora: python benchmarks/cartera.py [contratos]
+
+Compara modulos.cartera.calcular_mora contra el apply por renglón que usaba
+Inicio (sobre una muestra, porque a 100k tarda minutos) y verifica que ambos
+den el mismo resultado.
+"""
+import os
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modulos.cartera import calcular_mora  # noqa: E402
+
+MUESTRA_APPLY = 5_000
+
+
+def cartera_sintetica(n, semilla=7):
+    rng = np.random.default_rng(semilla)
+    inicio = pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 2400, n), unit="D")
+    mensualidad = rng.choice([2500.0, 3500.0, 4500.0, 7500.0, 0.0], n, p=[.3, .3, .2, .15, .05])
+    pagado = np.round(rng.uniform(0, 1.1, n) * mensualidad * rng.integers(0, 60, n), 2)
+    df = pd.DataFrame({"inicio_mensualidades": inicio, "mensualidad": mensualidad, "total_pagado_cuotas": pagado})
+    df.loc[rng.random(n) < 0.02, "inicio_mensualidades"] = pd.NaT
+    return df
+
+
+def calc_mora_por_renglon(row, hoy):
+    # Versión original (modulos/inicio.py, antes del motor vectorizado)
+    f_ini = row['inicio_mensualidades']
+    if pd.isnull(f_ini): f_ini = hoy
+    diff = (hoy.year - f_ini.year) * 12 + (hoy.month - f_ini.month)
+    if hoy.day < f_ini.day: diff -= 1
+    mensualidad = float(row['mensualidad'])
+    deuda_teorica = max(0, diff) * mensualidad
+    pagado = float(row['total_pagado_cuotas'])
+    saldo = max(0.0, deuda_teorica - pagado)
+    cubiertos = pagado / mensualidad if mensualidad > 0 else 0
+    vence_pendiente = f_ini + pd.DateOffset(months=int(cubiertos))
+    dias = (hoy - vence_pendiente).days if saldo > 0 else 0
+    return pd.Series([max(0, dias), saldo])
+
+
+def main(n):
+    hoy = datetime.now()
+    df = cartera_sintetica(n)
+
+    t0 = time.perf_counter()
+    rapido = calcular_mora(df, hoy=hoy)
+    t_vector = time.perf_counter() - t0
+
+    muestra = df.head(MUESTRA_APPLY)
+    t0 = time.perf_counter()
+    lento = muestra.apply(lambda r: calc_mora_por_renglon(r, hoy), axis=1)
+    t_apply = (time.perf_counter() - t0) * n / len(muestra)
+
+    iguales = (np.array_equal(lento[0].to_numpy(), rapido["atraso"].head(MUESTRA_APPLY).to_numpy())
+               and np.allclose(lento[1].to_numpy(), rapido["monto_vencido"].head(MUESTRA_APPLY).to_numpy()))
+    print(f"contratos:           {n:,}")
+    print(f"vectorizado:         {t_vector * 1000:,.1f} ms")
+    print(f"apply (estimado):    {t_apply * 1000:,.1f} ms  (medido sobre {len(muestra):,})")
+    print(f"aceleración:         {t_apply / t_vector:,.0f}x")
+    print(f"mismos resultados:   {'sí' if iguales else 'NO'}")
+    return 0 if iguales else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
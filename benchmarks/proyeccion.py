@@ -0,0 +1,77 @@
+"""Benchmark de la proyección de cobranza: python benchmarks/proyeccion.py [contratos] [meses]
+
+Arma el calendario de una cartera sintética y la proyecta con cada escenario
+de modulos.proyeccion; compara el escenario de liquidación anticipada contra
+un ciclo por contrato sobre una muestra.
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modulos.amortizacion import calendario  # noqa: E402
+from modulos.proyeccion import ESCENARIOS, proyectar  # noqa: E402
+
+MUESTRA_CICLO = 500
+HOY = pd.Timestamp("2025-06-15")
+
+
+def cartera_sintetica(n, semilla=7):
+    rng = np.random.default_rng(semilla)
+    plazo = rng.choice([12, 24, 36, 48], n)
+    mensualidad = rng.choice([2500.0, 3500.0, 4500.0, 7500.0], n)
+    enganche = rng.choice([10000.0, 20000.0], n)
+    contratos = pd.DataFrame({
+        "id_venta": np.arange(1, n + 1), "ubicacion": [f"L{i}" for i in range(n)], "cliente": "",
+        "inicio_mensualidades": HOY - pd.to_timedelta(rng.integers(0, 1400, n), unit="D"),
+        "mensualidad": mensualidad, "plazo_meses": plazo,
+        "precio_total": enganche + plazo * mensualidad, "enganche_requerido": enganche,
+    })
+    abonado = np.round(rng.uniform(0, 1, n) * plazo * mensualidad, 2)
+    return contratos, abonado
+
+
+def proyectar_por_contrato(plan, meses, p):
+    # Referencia: un contrato a la vez, mes por mes
+    esperado = np.zeros(meses)
+    mes0 = HOY.to_period("M")
+    for _, cuotas in plan.groupby("id_venta"):
+        futuras = [((f.to_period("M") - mes0).n, m - a) for f, m, a in
+                   zip(cuotas["fecha"], cuotas["monto"], cuotas["abonado"]) if f.to_period("M") >= mes0]
+        for j, (k, pendiente) in enumerate(futuras):
+            restante = sum(x for _, x in futuras[j:])
+            if k < meses:
+                esperado[k] += (1 - p) ** k * (p * restante + (1 - p) * pendiente)
+    return esperado
+
+
+def main(n, meses):
+    contratos, abonado = cartera_sintetica(n)
+    t0 = time.perf_counter()
+    plan = calendario(contratos, abonado)
+    t_calendario = time.perf_counter() - t0
+
+    tiempos = {}
+    for nombre, escenario in ESCENARIOS.items():
+        t0 = time.perf_counter()
+        proyectar(plan, meses, hoy=HOY, **escenario)
+        tiempos[nombre] = time.perf_counter() - t0
+
+    muestra = plan[plan["id_venta"] <= MUESTRA_CICLO]
+    p = ESCENARIOS["Liquidación anticipada 2 %/mes"]["anticipado"]
+    iguales = np.allclose(proyectar(muestra, meses, hoy=HOY, anticipado=p)["esperado"].to_numpy(),
+                          proyectar_por_contrato(muestra, meses, p))
+
+    print(f"contratos:           {n:,}  ({len(plan):,} cuotas, {meses} meses)")
+    print(f"calendario:          {t_calendario * 1000:,.1f} ms")
+    for nombre, t in tiempos.items():
+        print(f"{nombre + ':':<32} {t * 1000:,.1f} ms")
+    print(f"mismos resultados:   {'sí' if iguales else 'NO'}  (ciclo sobre {MUESTRA_CICLO:,} contratos)")
+    return 0 if iguales else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+                  int(sys.argv[2]) if len(sys.argv) > 2 else 48))
@@ -0,0 +1,561 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+from modulos import cuota
+
+# --- CAPA DE ALMACENAMIENTO ---
+# Los módulos reciben un "almacen" en lugar de (conn, URL_SHEET). Cada pestaña
+# del libro de Google Sheets equivale a una tabla del motor local.
+#
+# Toda escritura por renglón se expresa como una operación:
+#   ("agregar", pestana, filas)
+#   ("actualizar", pestana, clave, valor, cambios)
+#   ("eliminar", pestana, clave, valor)
+# y cada motor implementa aplicar(operaciones) de forma atómica.
+
+
+def _valor_plano(valor):
+    """Convierte un valor de pandas/numpy a un tipo nativo apto para celda o SQL."""
+    if valor is None or valor is pd.NA:
+        return None
+    if isinstance(valor, (pd.Timestamp, datetime, date)):
+        return None if pd.isnull(valor) else valor.strftime('%Y-%m-%d')
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    return valor
+
+
+def _misma_clave(a, b):
+    """Compara llaves tolerando 7 / 7.0 / "7" según el tipo que devuelva el motor."""
+    def normalizar(v):
+        v = _valor_plano(v)
+        try:
+            f = float(v)
+            return str(int(f)) if f.is_integer() else str(f)
+        except (TypeError, ValueError):
+            return str(v).strip()
+    return normalizar(a) == normalizar(b)
+
+
+def _buscar(df, pestana, clave, valor):
+    for idx, actual in df[clave].items():
+        if _misma_clave(actual, valor):
+            return idx
+    raise KeyError(f"No existe {clave}={valor} en '{pestana}'")
+
+
+def aplicar_en_df(df, operacion):
+    """Aplica una operación sobre un DataFrame en memoria y devuelve el resultado."""
+    tipo, pestana = operacion[0], operacion[1]
+    if tipo == "agregar":
+        return pd.concat([df, pd.DataFrame(operacion[2])], ignore_index=True)
+    if tipo == "actualizar":
+        _, _, clave, valor, cambios = operacion
+        df = df.copy()
+        idx = _buscar(df, pestana, clave, valor)
+        for col, nuevo in cambios.items():
+            df.at[idx, col] = nuevo
+        return df
+    if tipo == "eliminar":
+        _, _, clave, valor = operacion
+        return df.drop(_buscar(df, pestana, clave, valor))
+    raise ValueError(f"Operación desconocida: {tipo}")
+
+
+class Transaccion:
+    """Unidad de trabajo: junta escrituras de varias pestañas y las confirma juntas.
+
+    Uso:
+        with almacen.transaccion() as tx:
+            tx.agregar("pagos", [pago])
+            tx.actualizar("ventas", "id_venta", 7, {"estatus_pago": "Activo"})
+
+    Si el bloque lanza una excepción no se envía nada.
+    """
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self.operaciones = []
+
+    def agregar(self, pestana, filas):
+        self.operaciones.append(("agregar", pestana, list(filas)))
+
+    def actualizar(self, pestana, clave, valor, cambios):
+        self.operaciones.append(("actualizar", pestana, clave, valor, dict(cambios)))
+
+    def eliminar(self, pestana, clave, valor):
+        self.operaciones.append(("eliminar", pestana, clave, valor))
+
+    def confirmar(self):
+        if self.operaciones:
+            self.almacen.confirmar(self.operaciones)
+        self.operaciones = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        if tipo_error is None:
+            self.confirmar()
+        else:
+            self.operaciones = []
+        return False
+
+
+class Almacen:
+    """Interfaz común: leer(pestana) -> DataFrame, escribir(pestana, df).
+
+    Las escrituras por renglón (agregar / actualizar / eliminar) pasan por
+    aplicar(); la versión genérica reescribe las pestañas afectadas y cada
+    motor la sustituye por una operación que solo toca los renglones afectados.
+
+    Después de cada escritura confirmada se avisa a los suscriptores qué
+    pestañas cambiaron (así cargar_datos descarta solo esas del caché).
+    """
+
+    def __init__(self):
+        self._suscriptores = []
+
+    def leer(self, pestana):
+        raise NotImplementedError
+
+    def _reemplazar(self, pestana, df):
+        raise NotImplementedError
+
+    def suscribir(self, funcion):
+        """Registra funcion(pestanas) para después de cada escritura."""
+        if funcion not in self._suscriptores:
+            self._suscriptores.append(funcion)
+
+    def _avisar(self, pestanas):
+        for funcion in self._suscriptores:
+            funcion(pestanas)
+
+    def escribir(self, pestana, df):
+        """Reemplaza la pestaña completa."""
+        self._reemplazar(pestana, df)
+        self._avisar([pestana])
+
+    def agregar_columnas(self, pestana, columnas):
+        """Agrega al encabezado las columnas que falten (crea la pestaña si no existe).
+
+        Devuelve la lista de columnas agregadas. Pensado para migraciones, no
+        para las vistas.
+        """
+        nuevas = self._agregar_columnas(pestana, list(columnas))
+        if nuevas:
+            self._avisar([pestana])
+        return nuevas
+
+    def _agregar_columnas(self, pestana, columnas):
+        df = self.leer(pestana)
+        df = pd.DataFrame() if df is None else df
+        nuevas = [c for c in columnas if c not in df.columns]
+        if nuevas:
+            self._reemplazar(pestana, df.reindex(columns=list(df.columns) + nuevas))
+        return nuevas
+
+    def confirmar(self, operaciones):
+        self.aplicar(operaciones)
+        self._avisar(list(dict.fromkeys(op[1] for op in operaciones)))
+
+    def transaccion(self):
+        return Transaccion(self)
+
+    def agregar(self, pestana, filas):
+        """Agrega renglones (lista de dicts) al final de la pestaña."""
+        self.confirmar([("agregar", pestana, list(filas))])
+
+    def actualizar(self, pestana, clave, valor, cambios):
+        """Modifica las columnas de `cambios` en el renglón donde clave == valor."""
+        self.confirmar([("actualizar", pestana, clave, valor, dict(cambios))])
+
+    def eliminar(self, pestana, clave, valor):
+        """Borra el renglón donde clave == valor."""
+        self.confirmar([("eliminar", pestana, clave, valor)])
+
+    def aplicar(self, operaciones):
+        """Aplica en memoria y reescribe cada pestaña; si una escritura falla
+        se restauran las pestañas que ya se habían escrito."""
+        originales = {}
+        for op in operaciones:
+            if op[1] not in originales:
+                originales[op[1]] = self.leer(op[1])
+        nuevos = dict(originales)
+        for op in operaciones:
+            nuevos[op[1]] = aplicar_en_df(nuevos[op[1]], op)
+
+        escritas = []
+        try:
+            for pestana, df in nuevos.items():
+                self._reemplazar(pestana, df)
+                escritas.append(pestana)
+        except Exception:
+            for pestana in escritas:
+                self._reemplazar(pestana, originales[pestana])
+            raise
+
+    def sincronizar(self, pestanas):
+        """Refresca copias locales; los motores sin copia no hacen nada."""
+        return None
+
+    def leer_fresco(self, pestana):
+        """Lee la pestaña desde la fuente de verdad (en los motores sin copia, igual que leer)."""
+        return self.leer(pestana)
+
+    def sincronizado(self, pestana):
+        """Hora a la que corresponden los datos que devuelve leer(); None si no se sabe."""
+        return datetime.now()
+
+    def muestras(self, pestanas, filas=50):
+        """Encabezado y primeros renglones de cada pestaña: {pestana: df}, None si no existe.
+
+        La versión genérica lee las pestañas en paralelo y recorta; los motores
+        la sustituyen por una lectura que solo trae esos renglones.
+        """
+        pestanas = list(pestanas)
+
+        def muestra(pestana):
+            df = self.leer(pestana)
+            return None if df is None or len(df.columns) == 0 else df.head(filas)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(5, len(pestanas)))) as ejecutor:
+            return dict(zip(pestanas, ejecutor.map(muestra, pestanas)))
+
+
+class AlmacenGSheets(Almacen):
+    """Google Sheets a través de st-gsheets-connection.
+
+    Cada llamada a la API pasa por el planificador de cuota (modulos/cuota.py).
+    """
+
+    def __init__(self, conn, url, planificador=None):
+        super().__init__()
+        self.conn = conn
+        self.url = url
+        self.planificador = planificador or cuota.PLANIFICADOR
+        self._libro = None
+        self._hojas = {}
+
+    def _llamar(self, funcion, *args, prioridad=None, **kwargs):
+        return self.planificador.ejecutar(funcion, *args, prioridad=prioridad, **kwargs)
+
+    def leer(self, pestana):
+        # ttl=0: el cacheo lo controla cargar_datos, no la conexión
+        return self._llamar(self.conn.read, spreadsheet=self.url, worksheet=pestana, ttl=0)
+
+    def _reemplazar(self, pestana, df):
+        self._llamar(self.conn.update, spreadsheet=self.url, worksheet=pestana, data=df,
+                     prioridad=cuota.ESCRITURA)
+
+    # --- ESCRITURA POR RENGLÓN (gspread directo, requiere cuenta de servicio) ---
+    def _cargar_hojas(self):
+        if self._libro is None:
+            self._libro = self._llamar(self.conn.client._open_spreadsheet, spreadsheet=self.url)
+        self._hojas = {h.title: h for h in self._llamar(self._libro.worksheets)}
+
+    def _hoja(self, pestana):
+        if pestana not in self._hojas:
+            self._cargar_hojas()
+        return self._hojas[pestana]
+
+    def muestras(self, pestanas, filas=50):
+        """Todas las pestañas en un solo values.batchGet de los rangos '<pestana>'!1:<filas+1>."""
+        self._cargar_hojas()
+        pestanas = list(pestanas)
+        existentes = [p for p in pestanas if p in self._hojas]
+        resultado = dict.fromkeys(pestanas)
+        if not existentes:
+            return resultado
+        lectura = self._llamar(self._libro.values_batch_get, [f"'{p}'!1:{filas + 1}" for p in existentes])
+        for p, rango in zip(existentes, lectura["valueRanges"]):
+            valores = rango.get("values") or [[]]
+            encabezado = valores[0]
+            # La API recorta las celdas vacías al final de cada renglón
+            cuerpo = [(f + [""] * len(encabezado))[:len(encabezado)] for f in valores[1:]]
+            resultado[p] = pd.DataFrame(cuerpo, columns=encabezado, dtype="object")
+        return resultado
+
+    def _requisitos_encabezado(self, hoja, encabezado, nuevas):
+        """Peticiones para escribir `nuevas` a la derecha del encabezado actual."""
+        requisitos = []
+        faltan = len(encabezado) + len(nuevas) - hoja.col_count
+        if faltan > 0:
+            requisitos.append({"appendDimension": {"sheetId": hoja.id, "dimension": "COLUMNS", "length": faltan}})
+            self._hojas = {}
+        requisitos.append({"updateCells": {
+            "start": {"sheetId": hoja.id, "rowIndex": 0, "columnIndex": len(encabezado)},
+            "rows": [{"values": [self._celda(c) for c in nuevas]}],
+            "fields": "userEnteredValue",
+        }})
+        return requisitos
+
+    def _agregar_columnas(self, pestana, columnas):
+        self._cargar_hojas()
+        if pestana not in self._hojas:
+            self._llamar(self._libro.add_worksheet, title=pestana, rows=1000, cols=max(1, len(columnas)),
+                         prioridad=cuota.ESCRITURA)
+            self._cargar_hojas()
+        hoja = self._hojas[pestana]
+        lectura = self._llamar(self._libro.values_batch_get, [f"'{pestana}'!1:1"])
+        encabezado = (lectura["valueRanges"][0].get("values") or [[]])[0]
+        nuevas = [c for c in columnas if c not in encabezado]
+        if nuevas:
+            self._llamar(self._libro.batch_update, {"requests": self._requisitos_encabezado(hoja, encabezado, nuevas)},
+                         prioridad=cuota.ESCRITURA)
+        return nuevas
+
+    @staticmethod
+    def _celda(valor):
+        valor = _valor_plano(valor)
+        if valor is None:
+            return {}
+        if isinstance(valor, bool):
+            return {"userEnteredValue": {"boolValue": valor}}
+        if isinstance(valor, (int, float)):
+            return {"userEnteredValue": {"numberValue": valor}}
+        return {"userEnteredValue": {"stringValue": str(valor)}}
+
+    def aplicar(self, operaciones):
+        """Traduce las operaciones a un solo spreadsheets.batchUpdate.
+
+        Google aplica el lote completo o nada, así que una falla a la mitad no
+        deja contratos a medias. Antes se hacen dos lecturas ligeras en lote:
+        los encabezados y las columnas llave de las pestañas involucradas.
+        """
+        pestanas = list(dict.fromkeys(op[1] for op in operaciones))
+        hojas = {p: self._hoja(p) for p in pestanas}
+
+        lectura = self._llamar(self._libro.values_batch_get, [f"'{p}'!1:1" for p in pestanas])
+        encabezados = {p: (r.get("values") or [[]])[0] for p, r in zip(pestanas, lectura["valueRanges"])}
+
+        # Columnas nuevas que traen las operaciones (p. ej. comision_venta)
+        requisitos = []
+        for p in pestanas:
+            usadas = []
+            for op in operaciones:
+                if op[1] != p:
+                    continue
+                if op[0] == "agregar":
+                    usadas += [c for fila in op[2] for c in fila]
+                elif op[0] == "actualizar":
+                    usadas += list(op[4])
+            nuevas = [c for c in dict.fromkeys(usadas) if c not in encabezados[p]]
+            if not nuevas:
+                continue
+            requisitos += self._requisitos_encabezado(hojas[p], encabezados[p], nuevas)
+            encabezados[p] = encabezados[p] + nuevas
+
+        # Filas de las llaves usadas en actualizar / eliminar (una sola lectura)
+        llaves = list(dict.fromkeys((op[1], op[2]) for op in operaciones if op[0] != "agregar"))
+        columnas = {}
+        if llaves:
+            rangos = []
+            for p, clave in llaves:
+                letra = rowcol_to_a1(1, encabezados[p].index(clave) + 1).rstrip("0123456789")
+                rangos.append(f"'{p}'!{letra}:{letra}")
+            lectura = self._llamar(
+                self._libro.values_batch_get, rangos, params={"majorDimension": "COLUMNS", "valueRenderOption": "UNFORMATTED_VALUE"}
+            )
+            for llave, r in zip(llaves, lectura["valueRanges"]):
+                columnas[llave] = (r.get("values") or [[]])[0]
+
+        def fila_de(p, clave, valor):
+            for n, actual in enumerate(columnas[(p, clave)][1:], start=1):
+                if _misma_clave(actual, valor):
+                    return n
+            raise KeyError(f"No existe {clave}={valor} en '{p}'")
+
+        # Orden dentro del lote: actualizaciones, borrados (de abajo hacia arriba), altas
+        borrados = []
+        for op in operaciones:
+            if op[0] == "actualizar":
+                _, p, clave, valor, cambios = op
+                n = fila_de(p, clave, valor)
+                for col, nuevo in cambios.items():
+                    requisitos.append({"updateCells": {
+                        "start": {"sheetId": hojas[p].id, "rowIndex": n, "columnIndex": encabezados[p].index(col)},
+                        "rows": [{"values": [self._celda(nuevo)]}],
+                        "fields": "userEnteredValue",
+                    }})
+            elif op[0] == "eliminar":
+                _, p, clave, valor = op
+                borrados.append((p, fila_de(p, clave, valor)))
+        for p, n in sorted(set(borrados), key=lambda x: -x[1]):
+            requisitos.append({"deleteDimension": {
+                "range": {"sheetId": hojas[p].id, "dimension": "ROWS", "startIndex": n, "endIndex": n + 1}
+            }})
+        for op in operaciones:
+            if op[0] == "agregar":
+                p = op[1]
+                requisitos.append({"appendCells": {
+                    "sheetId": hojas[p].id,
+                    "rows": [{"values": [self._celda(fila.get(c)) for c in encabezados[p]]} for fila in op[2]],
+                    "fields": "userEnteredValue",
+                }})
+
+        self._llamar(self._libro.batch_update, {"requests": requisitos}, prioridad=cuota.ESCRITURA)
+
+
+class AlmacenLocal(Almacen):
+    """Motor embebido SQLite. Sirve como sistema de registro o como espejo."""
+
+    def __init__(self, ruta="vallemart.db"):
+        super().__init__()
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+
+    def existe(self, pestana):
+        fila = self._conexion.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (pestana,)
+        ).fetchone()
+        return fila is not None
+
+    def leer(self, pestana):
+        with self._lock:
+            if not self.existe(pestana):
+                return pd.DataFrame()
+            return pd.read_sql_query(f'SELECT * FROM "{pestana}"', self._conexion)
+
+    def muestras(self, pestanas, filas=50):
+        resultado = {}
+        with self._lock:
+            for pestana in pestanas:
+                resultado[pestana] = None
+                if self.existe(pestana):
+                    resultado[pestana] = pd.read_sql_query(
+                        f'SELECT * FROM "{pestana}" LIMIT ?', self._conexion, params=(filas,)
+                    )
+        return resultado
+
+    def _reemplazar(self, pestana, df):
+        with self._lock, self._conexion:
+            if len(df.columns) == 0:
+                self._conexion.execute(f'DROP TABLE IF EXISTS "{pestana}"')
+                return
+            df.to_sql(pestana, self._conexion, if_exists="replace", index=False)
+
+    def _asegurar_columnas(self, pestana, columnas):
+        """Crea la tabla o agrega columnas nuevas (sin reescribir renglones)."""
+        if not self.existe(pestana):
+            definicion = ", ".join(f'"{c}"' for c in columnas)
+            self._conexion.execute(f'CREATE TABLE "{pestana}" ({definicion})')
+            return list(columnas)
+        actuales = [r[1] for r in self._conexion.execute(f'PRAGMA table_info("{pestana}")')]
+        nuevas = [c for c in columnas if c not in actuales]
+        for col in nuevas:
+            self._conexion.execute(f'ALTER TABLE "{pestana}" ADD COLUMN "{col}"')
+        return nuevas
+
+    def _agregar_columnas(self, pestana, columnas):
+        with self._lock, self._conexion:
+            return self._asegurar_columnas(pestana, columnas)
+
+    def _renglon(self, pestana, clave, valor):
+        """rowid del primer renglón donde clave == valor (la misma regla que Sheets y aplicar_en_df)."""
+        if self.existe(pestana):
+            for rowid, actual in self._conexion.execute(f'SELECT rowid, "{clave}" FROM "{pestana}" ORDER BY rowid'):
+                if _misma_clave(actual, valor):
+                    return rowid
+        raise KeyError(f"No existe {clave}={valor} en '{pestana}'")
+
+    def aplicar(self, operaciones):
+        """Todas las operaciones en una transacción: se confirman juntas o se revierten.
+
+        Si la llave está repetida, actualizar y eliminar tocan solo el primer renglón.
+        """
+        with self._lock, self._conexion:
+            for op in operaciones:
+                tipo, pestana = op[0], op[1]
+                if tipo == "agregar":
+                    filas = op[2]
+                    columnas = list(dict.fromkeys(c for f in filas for c in f))
+                    self._asegurar_columnas(pestana, columnas)
+                    marcadores = ", ".join("?" for _ in columnas)
+                    nombres = ", ".join(f'"{c}"' for c in columnas)
+                    self._conexion.executemany(
+                        f'INSERT INTO "{pestana}" ({nombres}) VALUES ({marcadores})',
+                        [[_valor_plano(f.get(c)) for c in columnas] for f in filas],
+                    )
+                elif tipo == "actualizar":
+                    _, _, clave, valor, cambios = op
+                    renglon = self._renglon(pestana, clave, valor)
+                    self._asegurar_columnas(pestana, list(cambios))
+                    asignaciones = ", ".join(f'"{c}" = ?' for c in cambios)
+                    self._conexion.execute(
+                        f'UPDATE "{pestana}" SET {asignaciones} WHERE rowid = ?',
+                        [_valor_plano(v) for v in cambios.values()] + [renglon],
+                    )
+                elif tipo == "eliminar":
+                    _, _, clave, valor = op
+                    renglon = self._renglon(pestana, clave, valor)
+                    self._conexion.execute(f'DELETE FROM "{pestana}" WHERE rowid = ?', [renglon])
+                else:
+                    raise ValueError(f"Operación desconocida: {tipo}")
+
+
+class AlmacenEspejo(Almacen):
+    """Lee de la copia local y escribe en ambos lados (primero en la nube)."""
+
+    def __init__(self, remoto, local):
+        super().__init__()
+        self.remoto = remoto
+        self.local = local
+        self._sincronizadas = {}   # pestana -> hora de la última copia desde la nube (en este proceso)
+
+    def leer(self, pestana):
+        if not self.local.existe(pestana):
+            self.sincronizar([pestana])
+        return self.local.leer(pestana)
+
+    def _reemplazar(self, pestana, df):
+        self.remoto.escribir(pestana, df)
+        self.local.escribir(pestana, df)
+
+    def aplicar(self, operaciones):
+        self.remoto.aplicar(operaciones)
+        try:
+            self.local.aplicar(operaciones)
+        except Exception:
+            # La nube ya quedó escrita: se vuelve a copiar lo afectado
+            self.sincronizar(list(dict.fromkeys(op[1] for op in operaciones)))
+
+    def _agregar_columnas(self, pestana, columnas):
+        nuevas = self.remoto.agregar_columnas(pestana, columnas)
+        self.local.agregar_columnas(pestana, columnas)
+        return nuevas
+
+    def muestras(self, pestanas, filas=50):
+        # La auditoría revisa la fuente de verdad, no la copia
+        return self.remoto.muestras(pestanas, filas)
+
+    def sincronizar(self, pestanas):
+        for pestana in pestanas:
+            hora = datetime.now()
+            df = self.remoto.leer(pestana)
+            self.local.escribir(pestana, df if df is not None else pd.DataFrame())
+            self._sincronizadas[pestana] = hora
+
+    def leer_fresco(self, pestana):
+        self.sincronizar([pestana])
+        return self.local.leer(pestana)
+
+    def sincronizado(self, pestana):
+        # La copia local es tan vieja como su última sincronización, no como la lectura
+        return self._sincronizadas.get(pestana)
+
+
+def crear_almacen(modo, conn=None, url=None, ruta="vallemart.db"):
+    """modo: 'gsheets' (por defecto), 'local' u 'espejo'."""
+    if modo == "local":
+        return AlmacenLocal(ruta)
+    if modo == "espejo":
+        return AlmacenEspejo(AlmacenGSheets(conn, url), AlmacenLocal(ruta))
+    return AlmacenGSheets(conn, url)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from modulos import datos
+from modulos.asignacion import abonado_a_mensualidades
+from modulos.cartera import sumar_meses
+
+# --- CALENDARIO DE PAGOS DE TODA LA CARTERA ---
+# Una tabla larga (un renglón por cuota de cada contrato activo) construida de
+# una vez con aritmética de arreglos. La vista de un solo contrato, los
+# reportes y la exportación leen de aquí en lugar de armar el plan con un ciclo.
+#
+# Reglas (las mismas del plan que se armaba en Detalle de Crédito):
+#   fecha de la cuota i = inicio_mensualidades + (i - 1) meses
+#   lo abonado a mensualidades se aplica en orden: cuotas completas y luego una parcial
+#   saldo tras la cuota i = max(0, precio_total - enganche_requerido - i * mensualidad)
+
+ESTATUS = pd.CategoricalDtype(["Pagado", "Parcial", "Pendiente"])
+COLUMNAS = ["id_venta", "ubicacion", "cliente", "cuota", "fecha", "monto", "abonado", "estatus", "saldo"]
+
+
+def calendario(contratos, abonado):
+    """Plan de pagos de varios contratos a la vez.
+
+    contratos: DataFrame con id_venta, ubicacion, cliente, inicio_mensualidades,
+    mensualidad, plazo_meses, precio_total y enganche_requerido.
+    abonado: dinero aplicable a mensualidades de cada contrato (alineado con contratos).
+    Devuelve el formato largo de COLUMNAS ordenado por id_venta y cuota.
+    """
+    plazo = contratos["plazo_meses"].to_numpy(dtype="float64", na_value=0.0).clip(min=0).astype("int64")
+    if plazo.sum() == 0:
+        return pd.DataFrame({c: pd.Series(dtype="object") for c in COLUMNAS})
+
+    fila = np.repeat(np.arange(len(contratos)), plazo)
+    inicio_bloque = np.repeat(np.cumsum(plazo) - plazo, plazo)
+    cuota = np.arange(len(fila)) - inicio_bloque + 1
+
+    mensualidad = contratos["mensualidad"].to_numpy(dtype="float64", na_value=0.0)[fila]
+    bolsa = np.asarray(abonado, dtype="float64")[fila]
+    financiado = (contratos["precio_total"].to_numpy(dtype="float64", na_value=0.0)
+                  - contratos["enganche_requerido"].to_numpy(dtype="float64", na_value=0.0))[fila]
+
+    restante = bolsa - (cuota - 1) * mensualidad     # lo que queda de la bolsa al llegar a esta cuota
+    estatus = np.select([restante >= mensualidad, restante > 0], ["Pagado", "Parcial"], "Pendiente")
+
+    plan = pd.DataFrame({
+        "id_venta": contratos["id_venta"].to_numpy()[fila],
+        "ubicacion": contratos["ubicacion"].to_numpy()[fila],
+        "cliente": contratos["cliente"].to_numpy()[fila],
+        "cuota": cuota,
+        "fecha": sumar_meses(contratos["inicio_mensualidades"].to_numpy()[fila], cuota - 1),
+        "monto": mensualidad,
+        "abonado": np.clip(restante, 0.0, mensualidad),
+        "estatus": pd.Categorical(estatus, dtype=ESTATUS),
+        "saldo": np.maximum(0.0, financiado - cuota * mensualidad),
+    })
+    return plan.sort_values(["id_venta", "cuota"], kind="stable", ignore_index=True)
+
+
+def contratos_activos(df_v):
+    return df_v[(df_v["estatus_pago"] == "Activo") & df_v["inicio_mensualidades"].notna()]
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _calendario_por_version(version_ventas, version_pagos, _df_v, _df_p):
+    activos = contratos_activos(_df_v)
+    # Lo abonado a mensualidades según el libro, con el enganche de contratos anteriores al libro
+    pares = pd.MultiIndex.from_frame(activos[["ubicacion", "cliente"]])
+    abonado = abonado_a_mensualidades(_df_v, _df_p).reindex(pares).fillna(0.0).to_numpy()
+    return calendario(activos, abonado)
+
+
+def calendario_cartera(df_v, df_p):
+    """Calendario de todos los contratos activos para las versiones en caché de ventas y pagos."""
+    return _calendario_por_version(datos.version("ventas", df_v), datos.version("pagos", df_p), df_v, df_p)
+
+
+def plan_de(plan, id_venta):
+    """Cuotas de un contrato (el calendario viene ordenado por id_venta)."""
+    ids = plan["id_venta"].to_numpy(dtype="float64", na_value=np.nan)
+    inicio, fin = np.searchsorted(ids, float(id_venta), "left"), np.searchsorted(ids, float(id_venta), "right")
+    return plan.iloc[inicio:fin]
+
+
+def a_csv(plan):
+    """Calendario listo para descargar (fechas ISO, sin índice)."""
+    return plan.to_csv(index=False, date_format="%Y-%m-%d").encode("utf-8")
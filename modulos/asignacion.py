@@ -0,0 +1,269 @@
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from modulos import datos
+from modulos.cartera import sumar_meses
+from modulos.incremental import huellas as huellas_de
+
+# --- ASIGNACIÓN DE PAGOS POR REPRODUCCIÓN DEL LIBRO ---
+# El estado de cada contrato (enganche pagado, estatus, fecha de contrato,
+# inicio de mensualidades) se deriva de la pestaña pagos, en el orden en que se
+# registraron, con la regla de Cobranza:
+#
+#   cada pago cubre primero el enganche requerido y lo que sobra es mensualidad;
+#   el pago que completa el enganche fija fecha_contrato, y las mensualidades
+#   empiezan un mes después.
+#
+# Contratos anteriores al libro: su enganche se capturó directo en ventas y no
+# tiene renglón en pagos. Lo que ventas registra como enganche pagado y los
+# pagos no respaldan entra como saldo de apertura del contrato (ver aperturas());
+# si cubre el enganche, el contrato arranca Activo con su fecha_contrato guardada.
+# Un contrato Activo nunca cambia sus fechas por un pago nuevo.
+#
+# Qué lee cada quien: los campos CAMPOS_VENTA de ventas son la proyección
+# guardada del libro (Cobranza la escribe con cambios_venta al registrar o
+# borrar un pago); de ahí salen el estatus y las fechas que ven Inicio, el
+# calendario (modulos/amortizacion.py) y el plan de Crédito. Lo pagado y su
+# división entre enganche y mensualidades sale siempre del libro, con la
+# apertura incluida (abonado_a_mensualidades): Cobranza, Crédito, el
+# calendario, modulos/saldos.py y modulos/finanzas.py.
+#
+# Se guarda un punto de control por contrato (lo acumulado hasta su último pago
+# aplicado). En cada versión nueva de pagos solo se aplican los renglones
+# posteriores al punto de control; los contratos a los que se les borró o
+# editó un pago, o les cambió el enganche requerido, se reproducen desde cero
+# con solo sus propios pagos.
+
+_PAR = ["ubicacion", "cliente"]
+ESTADO = {"total_pagado": "float64", "num_pagos": "int64", "ultimo_id": "object", "fecha_enganche": "datetime64[ns]"}
+CAMPOS_VENTA = ["enganche_pagado", "estatus_pago", "fecha_contrato", "inicio_mensualidades"]
+
+
+def _vacio():
+    indice = pd.MultiIndex.from_arrays([[], []], names=_PAR)
+    return pd.DataFrame({c: pd.Series(dtype=t) for c, t in ESTADO.items()}, index=indice)
+
+
+def _huellas(df_p):
+    return pd.Series(huellas_de(df_p, ["id_pago", "fecha", "ubicacion", "cliente", "monto"]))
+
+
+def enganche_requerido(df_v):
+    """Enganche requerido por (ubicacion, cliente); el último contrato si hay repetidos."""
+    return df_v.drop_duplicates(_PAR, keep="last").set_index(_PAR)["enganche_requerido"]
+
+
+def _acumulado(pagos, previo):
+    """Monto de cada pago y lo pagado en su contrato antes y después de él (previo: lo de antes del primer renglón)."""
+    monto = pagos["monto"].to_numpy(dtype="float64")
+    despues = pagos.groupby(_PAR, observed=True, sort=False)["monto"].cumsum().to_numpy(dtype="float64") + previo
+    return monto, despues - monto, despues
+
+
+def dividir_pagos(df_p, requerido, previo=None):
+    """Columnas enganche / mensualidades de cada pago, en el orden en que se registraron.
+
+    previo: lo ya pagado por (ubicacion, cliente) antes del primer renglón de df_p.
+    """
+    pares = pd.MultiIndex.from_frame(df_p[_PAR])
+    anterior = 0.0
+    if previo is not None and len(previo):
+        anterior = previo.reindex(pares).to_numpy(dtype="float64", na_value=0.0)
+    monto, antes, despues = _acumulado(df_p, anterior)
+    req = requerido.reindex(pares).to_numpy(dtype="float64", na_value=0.0)
+    enganche = np.maximum(np.minimum(despues, req) - np.minimum(antes, req), 0.0)
+    return pd.DataFrame({"enganche": enganche, "mensualidades": monto - enganche}, index=df_p.index)
+
+
+def aperturas(df_v, df_p):
+    """Estado inicial (formato ESTADO) de los contratos con enganche guardado en ventas sin respaldo en pagos.
+
+    Respaldan el enganche de un contrato Activo sus pagos con fecha hasta
+    fecha_contrato; los de uno Pendiente, todos sus pagos.
+    """
+    ventas = df_v.drop_duplicates(_PAR, keep="last").set_index(_PAR)
+    activo = (ventas["estatus_pago"].astype(str) == "Activo") & ventas["fecha_contrato"].notna()
+    corte = ventas["fecha_contrato"].where(activo)
+    pares = pd.MultiIndex.from_frame(df_p[_PAR])
+    corte_p = corte.reindex(pares)
+    respalda = corte_p.isna().to_numpy() | (df_p["fecha"].to_numpy() <= corte_p.to_numpy())
+    respaldado = pd.Series(np.where(respalda, df_p["monto"].to_numpy(dtype="float64", na_value=0.0), 0.0),
+                           index=pares).groupby(level=_PAR).sum().reindex(ventas.index, fill_value=0.0)
+
+    requerido = ventas["enganche_requerido"].fillna(0.0)
+    apertura = (ventas["enganche_pagado"].fillna(0.0) - respaldado).clip(lower=0.0).clip(upper=requerido)
+    # Activo sin pagos que lo respalden (o con la apertura completa): se queda con su fecha guardada
+    cubierto = activo & (apertura >= requerido) & ((apertura > 0) | (respaldado == 0))
+    filas = (apertura > 0) | cubierto
+    estado = pd.DataFrame({"total_pagado": apertura[filas], "num_pagos": 0, "ultimo_id": None,
+                           "fecha_enganche": ventas["fecha_contrato"].where(cubierto)[filas]})
+    return estado.astype(ESTADO)
+
+
+def aplicar_pagos(pagos, requerido, base=None):
+    """Estado por contrato tras aplicar `pagos` (en orden) a partir del punto de control `base`."""
+    if pagos.empty:
+        return _vacio() if base is None else base
+    pares = pd.MultiIndex.from_frame(pagos[_PAR])
+    previo = (_vacio() if base is None else base).reindex(pares)
+    monto, antes, despues = _acumulado(pagos, previo["total_pagado"].fillna(0.0).to_numpy())
+    pagos_previos = (pagos.groupby(_PAR, observed=True, sort=False).cumcount().to_numpy()
+                     + previo["num_pagos"].fillna(0).to_numpy(dtype="int64"))
+    req = requerido.reindex(pares).to_numpy(dtype="float64", na_value=0.0)
+    # El pago que completa el enganche (con enganche 0, el primer pago)
+    completa = (despues >= req) & ((antes < req) | (pagos_previos == 0)) & previo["fecha_enganche"].isna().to_numpy()
+
+    renglones = pd.DataFrame({"monto": monto, "id": pagos["id_pago"].to_numpy(dtype="object"),
+                              "fecha_enganche": pagos["fecha"].where(completa).to_numpy()}, index=pares)
+    nuevo = renglones.groupby(level=_PAR, sort=False).agg(
+        total_pagado=("monto", "sum"), num_pagos=("monto", "size"),
+        ultimo_id=("id", "last"), fecha_enganche=("fecha_enganche", "first"))
+    if base is not None and not base.empty:
+        anterior = base.reindex(nuevo.index)
+        nuevo["total_pagado"] += anterior["total_pagado"].fillna(0.0)
+        nuevo["num_pagos"] += anterior["num_pagos"].fillna(0).astype("int64")
+        nuevo["fecha_enganche"] = anterior["fecha_enganche"].fillna(nuevo["fecha_enganche"])
+        nuevo = pd.concat([base.drop(nuevo.index, errors="ignore"), nuevo])
+    return nuevo.astype(ESTADO)
+
+
+def campos_venta(estado, enganche_req):
+    """Valores de CAMPOS_VENTA que corresponden al estado de un contrato (None si no tiene pagos)."""
+    total = 0.0 if estado is None else float(estado["total_pagado"])
+    fecha = None if estado is None or pd.isnull(estado["fecha_enganche"]) else pd.Timestamp(estado["fecha_enganche"])
+    return {
+        "enganche_pagado": min(total, float(enganche_req)),
+        "estatus_pago": "Activo" if fecha is not None else "Pendiente",
+        "fecha_contrato": fecha,
+        "inicio_mensualidades": None if fecha is None else pd.Timestamp(sumar_meses([fecha], [1])[0]),
+    }
+
+
+def cambios_venta(venta, estado, revertir=False):
+    """Solo los campos de la venta que difieren de lo que dice el libro.
+
+    Un contrato que ya está Activo conserva fecha_contrato e inicio_mensualidades;
+    solo vuelve a Pendiente con revertir=True (al borrar el pago que completó el enganche).
+    """
+    campos = campos_venta(estado, venta["enganche_requerido"])
+    if str(venta.get("estatus_pago")) == "Activo" and not pd.isnull(venta.get("fecha_contrato")):
+        if campos["estatus_pago"] == "Activo":
+            campos = {"enganche_pagado": campos["enganche_pagado"]}
+        elif not revertir:
+            return {}
+    cambios = {}
+    for campo, valor in campos.items():
+        actual = venta.get(campo)
+        if pd.isnull(valor) and pd.isnull(actual):
+            continue
+        if campo == "enganche_pagado" and not pd.isnull(actual) and abs(float(actual) - valor) < 0.005:
+            continue
+        if pd.isnull(valor) or pd.isnull(actual) or valor != actual:
+            cambios[campo] = valor
+    return cambios
+
+
+def simular_contrato(df_p, df_v, ubicacion, cliente, quitar=None, agregar=None):
+    """Estado de un contrato reproduciendo solo sus pagos, sin `quitar` (id_pago) y con `agregar` (dict)."""
+    pagos = df_p[(df_p["ubicacion"] == ubicacion) & (df_p["cliente"] == cliente)]
+    # La apertura se calcula con el libro como está ahora, antes de quitar o agregar
+    base = aperturas(df_v[(df_v["ubicacion"] == ubicacion) & (df_v["cliente"] == cliente)], pagos)
+    if quitar is not None:
+        pagos = pagos[pagos["id_pago"].astype(str) != str(quitar)]
+    if agregar is not None:
+        pagos = pd.concat([pagos, pd.DataFrame([agregar]).astype({"fecha": "datetime64[ns]"})], ignore_index=True)
+    estados = aplicar_pagos(pagos, enganche_requerido(df_v), base)
+    return estados.loc[(ubicacion, cliente)] if (ubicacion, cliente) in estados.index else None
+
+
+class Libro:
+    """Estados de todos los contratos con punto de control por contrato."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.estados = _vacio()
+        self._huellas = pd.Series(dtype="uint64")
+        self._par_de = pd.DataFrame(columns=_PAR)   # contrato de cada huella ya aplicada
+        self._requerido = pd.Series(dtype="float64")
+        self._aperturas = _vacio()
+        self.reproducidos = 0   # renglones aplicados en la última actualización
+
+    def actualizar(self, df_v, df_p):
+        with self._lock:
+            requerido = enganche_requerido(df_v)
+            apertura = aperturas(df_v, df_p)
+            huellas = _huellas(df_p)
+            ya = huellas.isin(self._huellas).to_numpy()
+
+            # Contratos cuya historia ya no es un prefijo de la anterior
+            quitados = ~self._huellas.isin(huellas).to_numpy()
+            tocados = pd.MultiIndex.from_frame(self._par_de[quitados]) if quitados.any() else None
+            cambio_req = requerido.reindex(self.estados.index).fillna(-1.0).ne(
+                self._requerido.reindex(self.estados.index).fillna(-1.0))
+            tocados = _union(tocados, self.estados.index[cambio_req.to_numpy()])
+            tocados = _union(tocados, _aperturas_distintas(apertura, self._aperturas))
+            # Pagos nuevos que quedaron antes del último aplicado de su contrato (insertados a mano)
+            nuevos = df_p[~ya]
+            if len(nuevos) and len(self.estados):
+                posicion = pd.Index(df_p["id_pago"].astype(str))
+                ultimo = self.estados["ultimo_id"].reindex(pd.MultiIndex.from_frame(nuevos[_PAR]))
+                pos_ultimo = posicion.get_indexer(ultimo.astype(str))
+                pos_nuevo = np.flatnonzero(~ya)
+                atras = (pos_ultimo > pos_nuevo) & ultimo.notna().to_numpy()
+                tocados = _union(tocados, pd.MultiIndex.from_frame(nuevos[atras][_PAR]))
+
+            base = self.estados
+            pendientes = ~ya
+            if tocados is not None and len(tocados):
+                # Los contratos que se reproducen arrancan de su apertura (si tienen)
+                base = pd.concat([base.drop(tocados, errors="ignore"), apertura[apertura.index.isin(tocados)]])
+                pendientes |= pd.MultiIndex.from_frame(df_p[_PAR]).isin(tocados)
+            self.estados = aplicar_pagos(df_p[pendientes], requerido, base)
+            self.reproducidos = int(pendientes.sum())
+            self._huellas, self._par_de, self._requerido = huellas, df_p[_PAR].reset_index(drop=True), requerido
+            self._aperturas = apertura
+            return self.estados
+
+
+def _aperturas_distintas(nuevas, anteriores):
+    """Contratos cuya apertura apareció, desapareció o cambió."""
+    indice = nuevas.index.union(anteriores.index)
+    a, b = nuevas.reindex(indice), anteriores.reindex(indice)
+    mismo_total = a["total_pagado"].fillna(-1.0).eq(b["total_pagado"].fillna(-1.0))
+    misma_fecha = a["fecha_enganche"].eq(b["fecha_enganche"]) | (a["fecha_enganche"].isna() & b["fecha_enganche"].isna())
+    return indice[~(mismo_total & misma_fecha).to_numpy()]
+
+
+def _union(a, b):
+    if a is None:
+        return b
+    return a.union(b) if b is not None and len(b) else a
+
+
+@st.cache_resource(show_spinner=False)
+def _libro():
+    return Libro()
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _estados_por_version(version_ventas, version_pagos, _df_v, _df_p):
+    return _libro().actualizar(_df_v, _df_p)
+
+
+def estados_contratos(df_v, df_p):
+    """Índice (ubicacion, cliente): total_pagado, num_pagos, ultimo_id, fecha_enganche."""
+    return _estados_por_version(datos.version("ventas", df_v), datos.version("pagos", df_p), df_v, df_p)
+
+
+def estado_contrato(df_v, df_p, ubicacion, cliente):
+    """Estado de un contrato según el libro, o None si aún no tiene pagos."""
+    estados = estados_contratos(df_v, df_p)
+    return estados.loc[(ubicacion, cliente)] if (ubicacion, cliente) in estados.index else None
+
+
+def abonado_a_mensualidades(df_v, df_p):
+    """Índice (ubicacion, cliente): lo pagado que sobra del enganche requerido, con la apertura incluida."""
+    estados = estados_contratos(df_v, df_p)
+    requerido = enganche_requerido(df_v).reindex(estados.index).fillna(0.0)
+    return (estados["total_pagado"] - requerido).clip(lower=0.0)
@@ -0,0 +1,78 @@
+from modulos import esquema
+
+# --- AUDITORÍA DE ESTRUCTURA ---
+# Compara el libro contra el registro de esquemas leyendo solo encabezados y
+# una muestra de renglones de todas las pestañas a la vez. El reporte es un
+# dict que se puede usar desde código (arranque, scripts) o pintar en la UI.
+
+FILAS_MUESTRA = 50
+
+
+def auditar(almacen, pestanas=None, filas=FILAS_MUESTRA):
+    """Devuelve {pestana: {"existe", "faltantes", "sobrantes", "tipos", "error"}}.
+
+    "tipos" es {columna: [valores de ejemplo]} con celdas de la muestra que no
+    se pueden leer como el tipo declarado (p. ej. texto en una columna de dinero).
+    """
+    pestanas = list(pestanas or esquema.ESQUEMA)
+    reporte = {p: {"existe": False, "faltantes": [], "sobrantes": [], "tipos": {}, "error": None}
+               for p in pestanas}
+    try:
+        muestras = almacen.muestras(pestanas, filas)
+    except Exception as e:
+        for p in pestanas:
+            reporte[p]["error"] = str(e)[:200]
+        return reporte
+
+    for p in pestanas:
+        df = muestras.get(p)
+        if df is None:
+            continue
+        esperadas = esquema.columnas(p)
+        reales = [str(c) for c in df.columns]
+        reporte[p].update(
+            existe=True,
+            faltantes=[c for c in esperadas if c not in reales],
+            sobrantes=[c for c in reales if c and c not in esperadas],
+            tipos=esquema.invalidos(p, df),
+        )
+    return reporte
+
+
+def agregar_invalidos(reporte, invalidos, ejemplos=3):
+    """Copia del reporte con las celdas inválidas halladas al cargar las pestañas completas (no solo la muestra)."""
+    reporte = {p: dict(r, tipos=dict(r["tipos"])) for p, r in reporte.items()}
+    for p, columnas in invalidos.items():
+        if p in reporte and reporte[p]["existe"]:
+            tipos = reporte[p]["tipos"]
+            for col, valores in columnas.items():
+                tipos[col] = list(dict.fromkeys(tipos.get(col, []) + list(valores)))[:ejemplos]
+    return reporte
+
+
+def problemas(reporte):
+    """Número de pestañas con algo que corregir (las columnas sobrantes no cuentan)."""
+    return sum(
+        1 for r in reporte.values()
+        if r["error"] or not r["existe"] or r["faltantes"] or r["tipos"]
+    )
+
+
+def resumen(reporte):
+    """Una línea de texto por pestaña, para bitácoras o la terminal."""
+    lineas = []
+    for p, r in reporte.items():
+        if r["error"]:
+            lineas.append(f"{p}: error al leer ({r['error']})")
+        elif not r["existe"]:
+            lineas.append(f"{p}: la pestaña no existe")
+        elif r["faltantes"] or r["tipos"]:
+            partes = []
+            if r["faltantes"]:
+                partes.append("faltan " + ", ".join(r["faltantes"]))
+            for col, ejemplos in r["tipos"].items():
+                partes.append(f"{col} con valores inválidos ({', '.join(ejemplos)})")
+            lineas.append(f"{p}: " + "; ".join(partes))
+        else:
+            lineas.append(f"{p}: ok")
+    return lineas
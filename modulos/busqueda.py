@@ -0,0 +1,108 @@
+import heapq
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+import streamlit as st
+from modulos import datos
+
+# --- ÍNDICE DE BÚSQUEDA ---
+# Índice invertido de trigramas + lista ordenada de palabras (para prefijos),
+# sin acentos ni mayúsculas: "Peña" se encuentra con "pena". Se construye una
+# vez por versión de la pestaña y cada tecla solo consulta el índice.
+#
+# Todas las palabras de la consulta deben aparecer (como prefijo de una palabra
+# o dentro del texto). Orden: coincidencia al inicio de palabra, luego posición
+# más temprana, luego texto más corto.
+
+RESULTADOS = 50
+
+
+def doblar(texto):
+    """Minúsculas, sin acentos y con espacios simples."""
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode()
+    return " ".join(texto.casefold().split())
+
+
+def _trigramas(palabra):
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+
+class IndiceBusqueda:
+    def __init__(self, textos):
+        self.textos = [doblar(t) for t in textos]
+        self._trigramas = defaultdict(set)
+        palabras = set()
+        for n, texto in enumerate(self.textos):
+            for palabra in texto.split():
+                palabras.add((palabra, n))
+                for tri in _trigramas(palabra):
+                    self._trigramas[tri].add(n)
+        self._palabras = sorted(palabras)
+
+    def __len__(self):
+        return len(self.textos)
+
+    def _por_prefijo(self, prefijo):
+        inicio = bisect_left(self._palabras, (prefijo, -1))
+        encontrados = set()
+        for palabra, n in self._palabras[inicio:]:
+            if not palabra.startswith(prefijo):
+                break
+            encontrados.add(n)
+        return encontrados
+
+    def _candidatos(self, termino):
+        if len(termino) < 3:
+            return self._por_prefijo(termino)
+        conjuntos = sorted((self._trigramas.get(t, set()) for t in _trigramas(termino)), key=len)
+        candidatos = set(conjuntos[0]).intersection(*conjuntos[1:])
+        return {n for n in candidatos if termino in self.textos[n]}
+
+    def buscar(self, consulta, k=RESULTADOS):
+        """Posiciones de los textos que coinciden, de mejor a peor (todas si k es None)."""
+        terminos = doblar(consulta).split()
+        if not terminos:
+            return list(range(len(self.textos) if k is None else min(k, len(self.textos))))
+        candidatos = None
+        for termino in sorted(terminos, key=len, reverse=True):
+            encontrados = self._candidatos(termino)
+            candidatos = encontrados if candidatos is None else candidatos & encontrados
+            if not candidatos:
+                return []
+
+        def orden(n):
+            texto = " " + self.textos[n]
+            al_inicio = sum(1 for t in terminos if " " + t in texto)
+            return (-al_inicio, min(texto.find(t) for t in terminos), len(texto), n)
+
+        if k is None:
+            return sorted(candidatos, key=orden)
+        return heapq.nsmallest(k, candidatos, key=orden)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _indice_por_version(pestana, version, columnas, _df):
+    textos = _df[list(columnas)].astype(str).agg(" ".join, axis=1) if len(_df) else []
+    return IndiceBusqueda(textos)
+
+
+def indice(pestana, df, columnas):
+    """Índice sobre las columnas dadas; se reconstruye solo cuando cambia la versión de la pestaña.
+
+    Las posiciones que devuelve buscar() son posiciones de renglón en df.
+    """
+    return _indice_por_version(pestana, datos.version(pestana, df), tuple(columnas), df)
+
+
+def elegir_contrato(df_v, titulo, key, con_vacio=True):
+    """Buscador + selectbox con los contratos más parecidos. Devuelve la ubicación elegida o None."""
+    consulta = st.text_input("🔍 Buscar lote o cliente", key=f"{key}_buscar")
+    posiciones = indice("ventas", df_v, ["ubicacion", "cliente"]).buscar(consulta)
+    if not posiciones:
+        st.caption("Sin coincidencias.")
+        return None
+    opciones = [f"{df_v['ubicacion'].iat[n]} | {df_v['cliente'].iat[n]}" for n in posiciones]
+    if not doblar(consulta).split() and len(df_v) > len(posiciones):
+        st.caption(f"Mostrando {len(posiciones)} de {len(df_v):,} contratos; escriba para buscar los demás.")
+    seleccion = st.selectbox(titulo, (["--"] if con_vacio else []) + opciones, key=key)
+    return None if seleccion == "--" else seleccion.split(" | ")[0]
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+# --- MOTOR DE MORA DE LA CARTERA ---
+# Cálculo por columnas (sin apply por renglón) de cuánto debe cada contrato a
+# la fecha y desde cuándo. No depende de Streamlit: sirve igual para Inicio,
+# reportes o scripts.
+#
+# Reglas (las mismas que tenía calc_mora en Inicio):
+#   meses_transcurridos = meses completos entre inicio_mensualidades y hoy
+#   deuda_teorica       = meses_transcurridos * mensualidad
+#   monto_vencido       = max(0, deuda_teorica - total_pagado_cuotas)
+#   cuotas_cubiertas    = piso(total_pagado_cuotas / mensualidad)
+#   proximo_vencimiento = inicio_mensualidades + cuotas_cubiertas meses
+#   atraso              = días desde proximo_vencimiento (0 si no hay saldo vencido)
+
+
+def sumar_meses(fechas, meses):
+    """fechas + meses (vectorizado). Como pd.DateOffset: el 31 pasa al último día del mes."""
+    fechas = pd.DatetimeIndex(fechas).normalize()
+    dias = fechas.day.to_numpy() - 1
+    mes = fechas.values.astype("datetime64[M]") + np.asarray(meses, dtype="int64").astype("timedelta64[M]")
+    largo_mes = ((mes + 1).astype("datetime64[D]") - mes.astype("datetime64[D]")).astype("int64")
+    dia = np.minimum(dias, largo_mes - 1)
+    resultado = mes.astype("datetime64[D]") + dia.astype("timedelta64[D]")
+    return np.where(fechas.isna(), np.datetime64("NaT"), resultado).astype("datetime64[ns]")
+
+
+def calcular_mora(df, hoy=None, pagado="total_pagado_cuotas"):
+    """Agrega al DataFrame de contratos las columnas de mora y lo devuelve (copia).
+
+    Requiere inicio_mensualidades (datetime64), mensualidad y la columna `pagado`
+    (total abonado a mensualidades). Los contratos sin fecha de inicio no
+    generan adeudo.
+    """
+    hoy = pd.Timestamp(hoy if hoy is not None else pd.Timestamp.now()).normalize()
+    df = df.copy()
+    inicio = pd.to_datetime(df["inicio_mensualidades"]).fillna(hoy)
+    mensualidad = df["mensualidad"].to_numpy(dtype="float64", na_value=0.0)
+    abonado = df[pagado].to_numpy(dtype="float64", na_value=0.0)
+
+    meses = (hoy.year - inicio.dt.year) * 12 + (hoy.month - inicio.dt.month)
+    meses = (meses - (hoy.day < inicio.dt.day)).clip(lower=0).to_numpy(dtype="int64")
+
+    deuda = meses * mensualidad
+    vencido = np.maximum(0.0, deuda - abonado)
+    cubiertas = np.floor(np.divide(abonado, mensualidad, out=np.zeros_like(abonado), where=mensualidad > 0))
+    vence = sumar_meses(inicio, cubiertas.astype("int64"))
+    dias = (np.datetime64(hoy, "ns") - vence).astype("timedelta64[D]").astype("int64")
+
+    df["meses_transcurridos"] = meses
+    df["deuda_teorica"] = deuda
+    df["cuotas_cubiertas"] = cubiertas.astype("int64")
+    df["proximo_vencimiento"] = vence
+    df["monto_vencido"] = vencido
+    df["atraso"] = np.where(vencido > 0, np.maximum(0, dias), 0)
+    return df
@@ -1,35 +1,20 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
+from modulos.liquidaciones import comision_por_contrato, estado_comisiones
+from modulos.tablas import dinero, fecha, tabla_paginada
+from modulos.vistas import vista
 
-def render_comisiones(df_v, df_p_com, conn, URL_SHEET, fmt_moneda):
+def render_comisiones(df_v, df_p_com, almacen, fmt_moneda):
     st.title("🎖️ Gestión de Comisiones")
     
-    # --- CONFIGURACIÓN DE NEGOCIO ---
-    PORCENTAJE_COMISION = 0.03  # 3% por defecto (puedes cambiarlo)
-    
     if df_v.empty:
         st.warning("No hay ventas registradas para calcular comisiones.")
         return
 
     # --- 1. PROCESAMIENTO DE DATOS ---
-    # Calculamos lo que cada vendedor debería ganar por sus ventas
-    df_v['comision_total'] = df_v['precio_total'].astype(float) * PORCENTAJE_COMISION
-    
-    # Resumen por vendedor (Lo devengado)
-    resumen_vendedores = df_v.groupby('vendedor')['comision_total'].sum().reset_index()
-    resumen_vendedores.columns = ['Vendedor', 'Total Devengado']
-
-    # Resumen de lo ya pagado (desde la hoja de pagos_comisiones)
-    if not df_p_com.empty:
-        pagos_hechos = df_p_com.groupby('vendedor')['monto'].sum().reset_index()
-        pagos_hechos.columns = ['Vendedor', 'Total Pagado']
-        resumen_final = pd.merge(resumen_vendedores, pagos_hechos, on='Vendedor', how='left').fillna(0)
-    else:
-        resumen_final = resumen_vendedores.copy()
-        resumen_final['Total Pagado'] = 0.0
-
-    resumen_final['Saldo Pendiente'] = resumen_final['Total Devengado'] - resumen_final['Total Pagado']
+    # Devengado (comisión pactada en cada contrato) y pagado, por vendedor y mes (modulos/liquidaciones.py)
+    estado = estado_comisiones(df_v, df_p_com)
+    resumen_final = vista("resumen_comisiones", _resumen, df_v, df_p_com)
 
     # --- 2. DASHBOARD DE MÉTRICAS ---
     total_comisiones_globlal = resumen_final['Total Devengado'].sum()
@@ -53,87 +38,105 @@ def render_comisiones(df_v, df_p_com, conn, URL_SHEET, fmt_moneda):
             nota = st.text_input("Nota o Referencia (ej. Pago lote 05)")
             
             if st.form_submit_button("Confirmar Pago"):
-                nuevo_pago = pd.DataFrame([{
+                nuevo_pago = {
                     "vendedor": vendedor_sel,
                     "monto": monto_pago,
                     "fecha": fecha_pago.strftime('%Y-%m-%d'),
                     "nota": nota
-                }])
+                }
                 
-                # Actualizar Google Sheets
-                df_p_com_new = pd.concat([df_p_com, nuevo_pago], ignore_index=True)
-                conn.update(spreadsheet=URL_SHEET, worksheet="pagos_comisiones", data=df_p_com_new)
+                # Actualizar Google Sheets (solo el renglón nuevo)
+                almacen.agregar("pagos_comisiones", [nuevo_pago])
                 st.success(f"Pago registrado para {vendedor_sel}")
                 st.rerun()
 
     # --- 4. VISUALIZACIÓN DE CARTERA POR VENDEDOR ---
     st.subheader("📊 Estado por Vendedor")
     
-    # Aplicamos el criterio de Pandas Style para asegurar comas y signo $
-    df_resumen_estilado = resumen_final.style.format({
-        "Total Devengado": "$ {:,.2f}",
-        "Total Pagado": "$ {:,.2f}",
-        "Saldo Pendiente": "$ {:,.2f}"
-    })
-
     st.dataframe(
-        df_resumen_estilado,
+        resumen_final,
         column_config={
             "Vendedor": "Vendedor",
-            "Total Devengado": "Devengado",
-            "Total Pagado": "Pagado",
-            "Saldo Pendiente": "Saldo Pendiente"
+            "Total Devengado": dinero("Devengado"),
+            "Total Pagado": dinero("Pagado"),
+            "Saldo Pendiente": dinero("Saldo Pendiente")
         },
         use_container_width=True,
         hide_index=True
     )
 
     # --- 5. DETALLE Y RANKING ---
-    tab1, tab2 = st.tabs(["📈 Ranking de Ventas", "📜 Historial de Pagos"])
+    tab1, tab2, tab3 = st.tabs(["📈 Ranking de Ventas", "📜 Historial de Pagos", "🗓️ Estado por Periodo"])
     
     with tab1:
         st.write("Ventas totales y comisión generada por contrato:")
-        df_ventas_detalle = df_v[['vendedor', 'cliente', 'ubicacion', 'precio_total', 'comision_total']].copy()
-        
-        # Aplicamos estilo al ranking
-        df_ranking_estilado = df_ventas_detalle.style.format({
-            "precio_total": "$ {:,.2f}",
-            "comision_total": "$ {:,.2f}"
-        })
-
-        st.dataframe(
-            df_ranking_estilado,
+        tabla_paginada(
+            vista("ranking_comisiones", _ranking, df_v),
+            key="tabla_ranking",
             column_config={
                 "vendedor": "Vendedor", 
                 "cliente": "Cliente", 
                 "ubicacion": "Lote", 
-                "precio_total": "Venta ($)", 
-                "comision_total": "Comisión ($)"
+                "precio_total": dinero("Venta ($)"), 
+                "comision_total": dinero("Comisión ($)")
             },
-            use_container_width=True,
-            hide_index=True
+            orden="comision_total"
         )
 
     with tab2:
         if not df_p_com.empty:
             st.write("Últimos pagos realizados:")
-            df_hist_pagos = df_p_com.sort_values(by="fecha", ascending=False).copy()
-            
-            # Aplicamos estilo al historial de pagos
-            df_hist_pagos_estilado = df_hist_pagos.style.format({
-                "monto": "$ {:,.2f}"
-            })
-
-            st.dataframe(
-                df_hist_pagos_estilado,
+            tabla_paginada(
+                df_p_com,
+                key="tabla_pagos_comisiones",
                 column_config={
                     "vendedor": "Vendedor",
-                    "monto": "Monto Pagado",
-                    "fecha": "Fecha de Pago",
+                    "monto": dinero("Monto Pagado"),
+                    "fecha": fecha("Fecha de Pago"),
                     "nota": "Referencia"
                 },
-                use_container_width=True,
-                hide_index=True
+                orden="fecha"
             )
         else:
             st.info("No hay historial de pagos aún.")
+
+    with tab3:
+        _estado_por_periodo(estado, resumen_final)
+
+
+def _resumen(df_v, df_p_com):
+    resumen_final = estado_comisiones(df_v, df_p_com).por_vendedor()[['devengado', 'pagado', 'pendiente']].reset_index()
+    resumen_final.columns = ['Vendedor', 'Total Devengado', 'Total Pagado', 'Saldo Pendiente']
+    return resumen_final
+
+
+def _ranking(df_v):
+    df_ventas_detalle = df_v[['vendedor', 'cliente', 'ubicacion', 'precio_total']].copy()
+    df_ventas_detalle['comision_total'] = comision_por_contrato(df_v)
+    return df_ventas_detalle
+
+
+# Fragmento: cambiar vendedor o mes solo vuelve a ejecutar esta pestaña
+@st.fragment
+def _estado_por_periodo(estado, resumen_final):
+    periodos = estado.periodos()
+    if not periodos:
+        st.info("No hay movimientos con fecha.")
+    else:
+        cp1, cp2 = st.columns(2)
+        vendedor_edo = cp1.selectbox("Vendedor", resumen_final['Vendedor'].tolist(), key="edo_vendedor")
+        periodo_edo = cp2.selectbox("Mes", periodos, format_func=lambda p: p.strftime('%m/%Y'), key="edo_periodo")
+        edo = estado.estado(vendedor_edo, periodo_edo)
+
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Devengado en el mes", f"$ {edo['devengado']:,.2f}", delta=f"{edo['contratos']} contratos", delta_color="off")
+        m2.metric("Pagado en el mes", f"$ {edo['pagado']:,.2f}", delta=f"{edo['pagos']} pagos", delta_color="off")
+        m3.metric("Diferencia del mes", f"$ {edo['pendiente']:,.2f}")
+
+        df_meses = estado.por_periodo(vendedor_edo)[['devengado', 'pagado', 'pendiente']].sort_index(ascending=False)
+        df_meses.index = df_meses.index.strftime('%m/%Y')
+        st.dataframe(
+            df_meses,
+            column_config={"devengado": dinero("Devengado"), "pagado": dinero("Pagado"), "pendiente": dinero("Diferencia")},
+            use_container_width=True
+        )
@@ -0,0 +1,88 @@
+from urllib.parse import quote
+import pandas as pd
+import streamlit as st
+from modulos import datos
+from modulos.busqueda import doblar
+
+# --- ÍNDICE DE CONTACTO DE CLIENTES ---
+# Se construye una vez por versión de la pestaña "clientes": nombre normalizado
+# -> teléfono E.164 y correo. Los enlaces de WhatsApp / correo se arman por
+# columnas con un solo cruce contra el índice, en lugar de buscar al cliente
+# renglón por renglón.
+
+LADA_PAIS = "52"
+
+
+def normalizar_nombre(serie):
+    """Minúsculas, sin acentos y con espacios simples (vectorizado)."""
+    serie = serie.fillna("").astype(str)
+    valores = pd.unique(serie)
+    return serie.map(dict(zip(valores, map(doblar, valores))))
+
+
+def telefono_e164(serie):
+    """Solo dígitos; a los números nacionales de 10 dígitos se les antepone la lada de país."""
+    digitos = serie.fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    digitos = digitos.where(digitos.str.len() != 10, LADA_PAIS + digitos)
+    return ("+" + digitos).where(digitos != "", "")
+
+
+def construir_indice(df_cl):
+    """DataFrame indexado por nombre normalizado con telefono (E.164) y correo.
+
+    Si un nombre se repite se conserva el primer registro, igual que antes.
+    """
+    indice = pd.DataFrame({
+        "nombre_normalizado": normalizar_nombre(df_cl["nombre"]),
+        "telefono": telefono_e164(df_cl["telefono"]),
+        "correo": df_cl["correo"].fillna("").astype(str).str.strip(),
+    })
+    indice = indice[indice["nombre_normalizado"] != ""]
+    return indice.drop_duplicates("nombre_normalizado").set_index("nombre_normalizado")
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _indice_por_version(version, _df_cl):
+    return construir_indice(_df_cl)
+
+
+def indice_clientes(df_cl):
+    """Índice de la versión de "clientes" que está en caché (se reconstruye solo si cambió)."""
+    return _indice_por_version(datos.version("clientes", df_cl), df_cl)
+
+
+def _codificar(serie):
+    """quote() una vez por valor distinto, no por renglón."""
+    valores = pd.unique(serie)
+    return serie.map(dict(zip(valores, (quote(str(v), safe="") for v in valores))))
+
+
+def enlaces_contacto(df, indice, fmt_moneda):
+    """Devuelve (whatsapp, correo) como Series alineadas con df.
+
+    df necesita cliente, ubicacion, monto_vencido y atraso. Los clientes sin
+    teléfono o correo en el directorio quedan en None.
+    """
+    if df.empty:
+        vacia = pd.Series([], index=df.index, dtype="object")
+        return vacia, vacia.copy()
+    contacto = indice.reindex(normalizar_nombre(df["cliente"]).to_numpy())
+    telefono = pd.Series(contacto["telefono"].to_numpy(), index=df.index).fillna("")
+    correo = pd.Series(contacto["correo"].to_numpy(), index=df.index).fillna("")
+
+    cliente = _codificar(df["cliente"].astype(str))
+    lote = _codificar(df["ubicacion"].astype(str))
+    # fmt_moneda solo produce "$", espacios, comas, puntos y dígitos
+    monto = (df["monto_vencido"].map(fmt_moneda).astype(str)
+             .str.replace("$", "%24", regex=False).str.replace(" ", "%20", regex=False)
+             .str.replace(",", "%2C", regex=False))
+    dias = df["atraso"].astype("int64").astype(str)
+    mensaje = (quote("Hola ") + cliente
+               + quote(", te saludamos de Valle Mart. Detectamos un saldo pendiente en tu lote ") + lote
+               + quote(" por ") + monto
+               + quote(". Contamos con ") + dias + quote(" días de atraso."))
+    whatsapp = "https://wa.me/" + telefono.str.lstrip("+") + "?text=" + mensaje
+    mail = "mailto:" + correo + "?subject=" + quote("Estado de Cuenta - Lote ") + lote
+
+    return (whatsapp.astype("object").where(telefono != "", None),
+            mail.astype("object").where(correo != "", None))
@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# --- PLANIFICADOR DE PETICIONES A GOOGLE SHEETS ---
+# Todas las llamadas a la API pasan por aquí: un presupuesto de peticiones por
+# minuto (cubeta de fichas), una cola con prioridad y reintentos con espera
+# exponencial + jitter cuando Google responde 429 o un error transitorio.
+#
+# Las escrituras solo se reintentan con 429 (Google no las aplicó). Un 5xx en
+# una escritura pudo llegar después de que Google confirmara el cambio, y
+# repetir un appendCells duplicaría renglones de pagos o ventas.
+
+LECTURA = 0          # lo que bloquea el render de una página
+ESCRITURA = 1        # guardados de formularios
+SEGUNDO_PLANO = 2    # revalidaciones y refrescos que nadie está esperando
+
+_CODIGO_CUOTA = 429
+_CODIGOS_TRANSITORIOS = (500, 502, 503)
+_local = threading.local()
+
+
+def _codigo(error):
+    codigo = getattr(error, "status_code", None)
+    return codigo if codigo is not None else getattr(getattr(error, "response", None), "status_code", None)
+
+
+def es_error_de_cuota(error):
+    """True si Google rechazó la petición por cuota (429 / RESOURCE_EXHAUSTED): no se aplicó."""
+    return _codigo(error) == _CODIGO_CUOTA or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def es_reintentable(error, prioridad=LECTURA):
+    """Cuota en cualquier petición; errores transitorios (5xx) solo en lo que no es escritura."""
+    return es_error_de_cuota(error) or (prioridad != ESCRITURA and _codigo(error) in _CODIGOS_TRANSITORIOS)
+
+
+@contextmanager
+def segundo_plano():
+    """Las llamadas hechas dentro del bloque (en este hilo) ceden el paso a las lecturas."""
+    anterior = getattr(_local, "prioridad", None)
+    _local.prioridad = SEGUNDO_PLANO
+    try:
+        yield
+    finally:
+        _local.prioridad = anterior
+
+
+class Planificador:
+    def __init__(self, por_minuto=60, reintentos=5, espera_base=1.0, espera_max=32.0):
+        self.por_minuto = por_minuto
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self._fichas = float(por_minuto)
+        self._ultimo = time.monotonic()
+        self._cond = threading.Condition()
+        self._cola = []
+        self._turno = itertools.count()
+        self._en_reintento = 0
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self._fichas = min(self.por_minuto, self._fichas + (ahora - self._ultimo) * self.por_minuto / 60.0)
+        self._ultimo = ahora
+
+    def _tomar_ficha(self, prioridad):
+        """Espera turno (menor prioridad primero, luego orden de llegada) y una ficha libre."""
+        with self._cond:
+            boleto = (prioridad, next(self._turno))
+            heapq.heappush(self._cola, boleto)
+            try:
+                while True:
+                    self._recargar()
+                    if self._cola[0] == boleto and self._fichas >= 1:
+                        heapq.heappop(self._cola)
+                        self._fichas -= 1
+                        self._cond.notify_all()
+                        return
+                    espera = None
+                    if self._cola[0] == boleto:
+                        espera = (1 - self._fichas) * 60.0 / self.por_minuto
+                    self._cond.wait(timeout=espera)
+            except BaseException:
+                if boleto in self._cola:
+                    self._cola.remove(boleto)
+                    heapq.heapify(self._cola)
+                    self._cond.notify_all()
+                raise
+
+    def ejecutar(self, funcion, *args, prioridad=None, **kwargs):
+        """Ejecuta funcion(*args, **kwargs) respetando el presupuesto y reintentando errores de cuota."""
+        if prioridad is None:
+            prioridad = getattr(_local, "prioridad", None)
+            prioridad = LECTURA if prioridad is None else prioridad
+        for intento in range(self.reintentos + 1):
+            self._tomar_ficha(prioridad)
+            try:
+                return funcion(*args, **kwargs)
+            except Exception as e:
+                if intento == self.reintentos or not es_reintentable(e, prioridad):
+                    raise
+                espera = min(self.espera_max, self.espera_base * 2 ** intento)
+                with self._cond:
+                    self._en_reintento += 1
+                try:
+                    time.sleep(espera * random.uniform(0.5, 1.0))
+                finally:
+                    with self._cond:
+                        self._en_reintento -= 1
+
+    def profundidad(self):
+        """Peticiones esperando ficha más las que esperan para reintentar."""
+        with self._cond:
+            return len(self._cola) + self._en_reintento
+
+
+PLANIFICADOR = Planificador(por_minuto=int(os.environ.get("VALLEMART_PETICIONES_MINUTO", "60")))
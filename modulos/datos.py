@@ -0,0 +1,233 @@
+import threading
+import time
+from datetime import datetime
+import streamlit as st
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from modulos import cuota, esquema, instantaneas
+
+# --- CARGA DE PESTAÑAS CON CACHÉ POR HOJA ---
+# Cada pestaña es una entrada independiente del caché. Las escrituras del
+# almacén avisan qué pestañas tocaron y solo esas se descartan.
+#
+# Debajo del caché en memoria hay copias en disco (modulos/instantaneas.py):
+# en un proceso recién iniciado se sirve la copia y la descarga fresca corre en
+# segundo plano; al llegar, reemplaza la entrada del caché.
+#
+# Después del arranque, un hilo refrescador vuelve a descargar en segundo plano
+# cada pestaña ya usada cuando su copia cumple REFRESCO segundos (antes de que
+# venza el ttl). Mientras no llega la nueva se sirve la última buena, y si el
+# contenido no cambió solo se renueva su hora (el caché y las versiones quedan
+# igual). Así, fuera de las escrituras, ninguna interacción espera a Google.
+#
+# Todo lo que entra al caché pasa una vez por esquema.coercionar(): los módulos
+# reciben datos ya tipados y no vuelven a convertir nada.
+#
+# Cada DataFrame sale marcado (en attrs) con la versión con la que entró al
+# caché. Lo derivado se guarda con la versión del frame que se recibe, no con
+# la última del proceso: un fragmento puede volver a ejecutarse con los frames
+# de su última corrida completa mientras otra sesión ya recargó la pestaña.
+
+_almacen = None
+MAX_DESCARGAS_SIMULTANEAS = 5
+REFRESCO = 240         # segundos; menor que el ttl de cargar_datos
+REVISION = 15          # cada cuánto revisa el refrescador
+
+_lock = threading.Lock()
+_revalidadas = set()   # pestañas ya descargadas desde que arrancó el proceso
+_en_descarga = set()   # revalidaciones en segundo plano en curso
+_frescas = {}          # descargas de segundo plano que esperan entrar al caché: (df, fecha)
+_ultimas = {}          # última copia buena de cada pestaña: (df, fecha de descarga)
+_servidas = {}         # fecha de descarga de lo que está en caché de cada pestaña
+_generaciones = {}     # cambia con cada escritura; descarta descargas que empezaron antes
+_versiones = {}        # cuántas veces ha entrado cada pestaña al caché
+_invalidos = {}        # celdas que no se pudieron leer como su tipo en la última descarga
+_MARCA = "vallemart_version"
+_refrescador = None
+
+
+def configurar(almacen):
+    """Indica de qué almacén leer, se suscribe a sus escrituras y arranca el refrescador."""
+    global _almacen, _refrescador
+    if _almacen is not almacen:
+        _almacen = almacen
+        almacen.suscribir(invalidar)
+    with _lock:
+        if _refrescador is None:
+            _refrescador = threading.Thread(target=_refrescar, name="refrescador", daemon=True)
+            _refrescador.start()
+
+
+def _descargar(pestana, fresco=False):
+    """Lee la pestaña del almacén (de la fuente de verdad si fresco), la tipa y actualiza su copia en disco."""
+    with _lock:
+        generacion = _generaciones.get(pestana, 0)
+    df = _almacen.leer_fresco(pestana) if fresco else _almacen.leer(pestana)
+    if df is None or df.empty:
+        df = esquema.vacio(pestana) if pestana in esquema.ESQUEMA else pd.DataFrame()
+        invalidos_ = {}
+    else:
+        invalidos_ = esquema.invalidos(pestana, df)
+        df = esquema.coercionar(pestana, df)
+    fecha = _almacen.sincronizado(pestana)
+    try:
+        instantaneas.guardar(pestana, df, fecha)
+    except OSError:
+        pass  # sin disco escribible se sigue trabajando solo en memoria
+    with _lock:
+        _revalidadas.add(pestana)
+        _invalidos[pestana] = invalidos_
+        if _generaciones.get(pestana, 0) == generacion:
+            _ultimas[pestana] = (df, fecha)
+    return df, fecha, generacion
+
+
+def _revalidar_en_segundo_plano(pestana):
+    with _lock:
+        if pestana in _en_descarga:
+            return
+        _en_descarga.add(pestana)
+        anterior = _ultimas.get(pestana)
+
+    def tarea():
+        try:
+            with cuota.segundo_plano():
+                df, fecha, generacion = _descargar(pestana, fresco=True)
+            with _lock:
+                if _generaciones.get(pestana, 0) != generacion:
+                    return  # hubo una escritura mientras tanto; esa recarga ya va por su cuenta
+                if anterior is not None and pestana in _servidas and df.equals(anterior[0]):
+                    _servidas[pestana] = fecha   # sin cambios: solo se renueva la hora
+                    return
+                _frescas[pestana] = (df, fecha)
+            cargar_datos.clear(pestana)
+        except Exception:
+            pass  # se sigue sirviendo la copia; se reintenta en la siguiente vuelta
+        finally:
+            with _lock:
+                _en_descarga.discard(pestana)
+
+    threading.Thread(target=tarea, name=f"revalidar-{pestana}", daemon=True).start()
+
+
+def _refrescar():
+    while True:
+        time.sleep(REVISION)
+        if _almacen is None:
+            continue
+        for pestana, segundos in edades().items():
+            if segundos is None or segundos >= REFRESCO:
+                _revalidar_en_segundo_plano(pestana)
+
+
+def marca(df):
+    """(pestana, version) con que cargar_datos sirvió df, o None si df no es tal cual un frame cargado."""
+    sello = df.attrs.get(_MARCA) if isinstance(df, pd.DataFrame) else None
+    if sello is None or sello[2] != len(df) or sello[3] != tuple(df.columns):
+        return None
+    return sello[0], sello[1]
+
+
+def version(pestana, df):
+    """Versión de la pestaña con la que se cargó df; cambia cada vez que la pestaña vuelve a entrar al caché.
+
+    Sirve de llave para lo que se calcula a partir de df (índices, agregados):
+    mientras la versión no cambie, lo derivado sigue siendo válido. Un frame
+    sin marca, o que ya no es el que se cargó (filtrado), se identifica por su
+    contenido.
+    """
+    sello = marca(df)
+    if sello is not None and sello[0] == pestana:
+        return sello[1]
+    return "contenido", len(df), int(pd.util.hash_pandas_object(df).sum()) if len(df) else 0
+
+
+def edades():
+    """{pestana: segundos desde que se descargó la copia que se está sirviendo}; None si no se sabe.
+
+    Con el almacén espejo cuenta desde la última sincronización con la nube, no
+    desde la lectura de la copia local.
+    """
+    ahora = datetime.now()
+    with _lock:
+        return {p: None if fecha is None else (ahora - fecha).total_seconds() for p, fecha in _servidas.items()}
+
+
+def invalidos():
+    """{pestana: {columna: [ejemplos]}} con lo que no se pudo leer en las pestañas completas descargadas."""
+    with _lock:
+        return {p: dict(c) for p, c in _invalidos.items() if c}
+
+
+def _servir(pestana, df, fecha):
+    with _lock:
+        _servidas[pestana] = fecha
+        df.attrs[_MARCA] = (pestana, _versiones.get(pestana, 0), len(df), tuple(df.columns))
+    return df
+
+
+@st.cache_data(ttl=300)
+def cargar_datos(pestana):
+    with _lock:
+        _versiones[pestana] = _versiones.get(pestana, 0) + 1
+        fresca = _frescas.pop(pestana, None)
+        ultima = _ultimas.get(pestana)
+    if fresca is not None:
+        return _servir(pestana, *fresca)
+
+    # Venció el ttl antes de que llegara el refresco: la última copia buena y otra descarga detrás
+    if ultima is not None:
+        _revalidar_en_segundo_plano(pestana)
+        return _servir(pestana, *ultima)
+
+    if pestana not in _revalidadas:
+        copia = instantaneas.cargar(pestana)
+        if copia is not None:
+            _revalidar_en_segundo_plano(pestana)
+            return _servir(pestana, esquema.coercionar(pestana, copia[0]), copia[1])
+
+    try:
+        df, fecha, _ = _descargar(pestana)
+        return _servir(pestana, df, fecha)
+    except Exception as e:
+        st.sidebar.error(f"⚠️ Error en pestaña '{pestana}': {str(e)[:50]}")
+        copia = instantaneas.cargar(pestana)
+        if copia is not None:
+            return _servir(pestana, esquema.coercionar(pestana, copia[0]), copia[1])
+        return _servir(pestana, esquema.vacio(pestana), datetime.now())
+
+
+def cargar_varios(pestanas):
+    """Carga varias pestañas en paralelo (hilos acotados) y las devuelve en el mismo orden.
+
+    Cada hilo pasa por cargar_datos, así que las que ya están en caché regresan
+    al instante y las demás quedan guardadas en su propia entrada.
+    """
+    pestanas = list(pestanas)
+    if len(pestanas) <= 1:
+        return [cargar_datos(p) for p in pestanas]
+    # Los hilos heredan el contexto de la sesión para poder usar el caché y la barra lateral
+    ctx = get_script_run_ctx()
+    hilos = min(MAX_DESCARGAS_SIMULTANEAS, len(pestanas))
+    with ThreadPoolExecutor(max_workers=hilos, initializer=add_script_run_ctx, initargs=(None, ctx)) as ejecutor:
+        return list(ejecutor.map(cargar_datos, pestanas))
+
+
+def invalidar(pestanas=None):
+    """Descarta del caché una pestaña, un conjunto de pestañas o (sin argumento) todas.
+
+    También olvida su última copia: la siguiente lectura va al almacén y ve la escritura.
+    """
+    if isinstance(pestanas, str):
+        pestanas = [pestanas]
+    with _lock:
+        for pestana in (set(_servidas) | _en_descarga) if pestanas is None else pestanas:
+            _generaciones[pestana] = _generaciones.get(pestana, 0) + 1
+            _ultimas.pop(pestana, None)
+            _frescas.pop(pestana, None)
+    if pestanas is None:
+        cargar_datos.clear()
+        return
+    for pestana in pestanas:
+        cargar_datos.clear(pestana)
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# --- REGISTRO CENTRAL DE ESQUEMAS ---
+# Única definición de columnas y tipos de cada pestaña. cargar_datos aplica
+# coercionar() una sola vez al entrar al caché: los módulos reciben fechas como
+# datetime64, dinero como float, ids como Int64 y estatus como categorías.
+#
+# Tipos: "entero", "dinero", "fecha", "texto", "categoria"
+
+ESQUEMA = {
+    "ubicaciones": {
+        "id_lote": "entero", "ubicacion": "texto", "manzana": "entero", "lote": "entero",
+        "fase": "categoria", "precio": "dinero", "enganche_req": "dinero", "estatus": "categoria",
+    },
+    "ventas": {
+        "id_venta": "entero", "fecha_registro": "fecha", "fecha_contrato": "fecha",
+        "inicio_mensualidades": "fecha", "ubicacion": "texto", "cliente": "texto",
+        "vendedor": "texto", "precio_total": "dinero", "enganche_pagado": "dinero",
+        "enganche_requerido": "dinero", "comision_venta": "dinero", "plazo_meses": "entero",
+        "mensualidad": "dinero", "estatus_pago": "categoria", "comentarios": "texto",
+    },
+    "pagos": {
+        "id_pago": "entero", "fecha": "fecha", "ubicacion": "texto", "cliente": "texto",
+        "monto": "dinero", "metodo": "categoria", "folio": "texto", "comentarios": "texto",
+    },
+    "clientes": {"id_cliente": "entero", "nombre": "texto", "telefono": "texto", "correo": "texto"},
+    "vendedores": {
+        "id_vendedor": "entero", "nombre": "texto", "telefono": "texto", "correo": "texto",
+        "comision_base": "dinero", "comision_acumulada": "dinero",
+    },
+    "gastos": {
+        "id_gasto": "entero", "fecha": "fecha", "categoria": "categoria", "monto": "dinero",
+        "concepto": "texto", "notas": "texto",
+    },
+    "pagos_comisiones": {"vendedor": "texto", "monto": "dinero", "fecha": "fecha", "nota": "texto"},
+}
+
+# Valores conocidos de las columnas categóricas; los que aparezcan en la hoja se agregan
+CATEGORIAS = {
+    ("ubicaciones", "fase"): ["Etapa 1", "Etapa 2", "Etapa 3", "Club"],
+    ("ubicaciones", "estatus"): ["Disponible", "Apartado", "Vendido", "Bloqueado"],
+    ("ventas", "estatus_pago"): ["Pendiente", "Activo"],
+    ("pagos", "metodo"): ["Efectivo", "Transferencia", "Depósito"],
+    ("gastos", "categoria"): ["Publicidad", "Comisiones", "Mantenimiento", "Papelería",
+                              "Servicios (Luz/Agua)", "Sueldos", "Otros"],
+}
+
+
+def columnas(pestana):
+    return list(ESQUEMA.get(pestana, {}))
+
+
+def _como_texto(valor):
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return ""
+    if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+        return str(int(valor))  # teléfonos y folios que Sheets devuelve como 5512345678.0
+    return str(valor)
+
+
+def _coercionar_columna(serie, tipo, categorias=()):
+    if tipo == "dinero":
+        if serie.dtype == "float64":
+            return serie.fillna(0.0)
+        # Celda vacía = 0; lo que no se puede leer queda NaN y lo reporta la auditoría
+        vacias = serie.isna() | (serie.astype(str).str.strip() == "")
+        return pd.to_numeric(serie, errors="coerce").astype("float64").mask(vacias, 0.0)
+    if tipo == "entero":
+        if serie.dtype == "Int64":
+            return serie
+        return pd.to_numeric(serie, errors="coerce").round().astype("Int64")
+    if tipo == "fecha":
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            return serie
+        fechas = pd.to_datetime(serie, format="%Y-%m-%d", errors="coerce")
+        # Lo que no vino en ISO (capturas manuales en la hoja) se interpreta aparte
+        pendientes = fechas.isna() & serie.notna() & (serie.astype(str).str.strip() != "")
+        if pendientes.any():
+            fechas[pendientes] = pd.to_datetime(serie[pendientes].astype(str), format="mixed",
+                                                dayfirst=True, errors="coerce")
+        return fechas
+    if tipo == "categoria" and isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie
+    texto = serie if pd.api.types.is_string_dtype(serie) and not serie.isna().any() else serie.map(_como_texto)
+    texto = texto.astype(str)
+    if tipo == "categoria":
+        valores = list(categorias) + sorted(v for v in texto.unique() if v and v not in categorias)
+        return texto.replace("", np.nan).astype(pd.CategoricalDtype(valores))
+    return texto
+
+
+def coercionar(pestana, df):
+    """Agrega columnas faltantes y convierte cada columna declarada a su tipo."""
+    definicion = ESQUEMA.get(pestana)
+    if definicion is None or df is None:
+        return df
+    df = df.copy()
+    for col, tipo in definicion.items():
+        if col not in df.columns:
+            df[col] = pd.Series([None] * len(df), index=df.index, dtype="object")
+        df[col] = _coercionar_columna(df[col], tipo, CATEGORIAS.get((pestana, col), ()))
+    return df
+
+
+def vacio(pestana):
+    """DataFrame sin renglones con las columnas y tipos de la pestaña."""
+    return coercionar(pestana, pd.DataFrame(columns=columnas(pestana)))
+
+
+def invalidos(pestana, df, ejemplos=3):
+    """{columna: [valores de muestra]} con celdas llenas que no se pueden leer como su tipo."""
+    resultado = {}
+    for col, tipo in ESQUEMA.get(pestana, {}).items():
+        if col not in df.columns or tipo in ("texto", "categoria"):
+            continue
+        serie = df[col]
+        llenas = serie.notna() & (serie.astype(str).str.strip() != "")
+        if tipo == "fecha":
+            convertida = _coercionar_columna(serie, "fecha")
+        else:
+            convertida = pd.to_numeric(serie, errors="coerce")
+        malas = llenas & convertida.isna()
+        if malas.any():
+            resultado[col] = serie[malas].astype(str).unique()[:ejemplos].tolist()
+    return resultado
@@ -0,0 +1,181 @@
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from modulos import datos
+from modulos.asignacion import aperturas, dividir_pagos, enganche_requerido
+from modulos.incremental import Prefijo
+
+# --- CUBO FINANCIERO MENSUAL ---
+# Ingresos (divididos en enganche y mensualidades) y gastos por mes, de donde
+# salen todas las vistas de Reportes: mes contra mes, por fase, por vendedor y
+# por categoría de gasto.
+#
+# - Ingresos: cada pago cubre primero el enganche requerido de su contrato y lo
+#   que sobra es mensualidad (la regla del libro, modulos/asignacion.py). Los
+#   contratos anteriores al libro arrancan con su apertura (el enganche
+#   capturado en ventas), que no es ingreso de ningún mes pero sí cubre enganche.
+#   Se acumulan por (periodo, ubicacion, cliente); "pagos" normalmente solo
+#   crece por el final, así que en cada recarga se dividen y suman solo los
+#   renglones nuevos. Si cambió algún renglón ya sumado (por huella de
+#   contenido, modulos/incremental.py) se reconstruye.
+# - Gastos: igual, por (periodo, categoria).
+# - Fase y vendedor se asignan al final desde ubicaciones y ventas, sobre los
+#   pares ya agregados (no sobre cada pago).
+#
+# Los pagos y gastos sin fecha no entran a ningún mes.
+
+_PAR = ["ubicacion", "cliente"]
+_INGRESOS = ["enganche", "mensualidades", "pagos"]
+SIN_DATO = "Sin asignar"
+
+
+def _periodo(fechas):
+    return fechas.dt.to_period("M")
+
+
+def _vacio(llave, columnas):
+    indice = pd.MultiIndex.from_arrays([[] for _ in llave], names=llave)
+    return pd.DataFrame({c: pd.Series(dtype="float64") for c in columnas}, index=indice)
+
+
+def agregar_ingresos(df_p, division):
+    """Índice (periodo, ubicacion, cliente): enganche, mensualidades, pagos."""
+    base = pd.concat([df_p[_PAR], division], axis=1)
+    base["periodo"] = _periodo(df_p["fecha"])
+    return base.groupby(["periodo"] + _PAR, observed=True).agg(
+        enganche=("enganche", "sum"), mensualidades=("mensualidades", "sum"), pagos=("enganche", "size"))
+
+
+def agregar_gastos(df_g):
+    """Índice (periodo, categoria): gastos, movimientos."""
+    base = pd.DataFrame({"periodo": _periodo(df_g["fecha"]), "categoria": df_g["categoria"].astype(str),
+                         "gastos": df_g["monto"]})
+    return base.groupby(["periodo", "categoria"], observed=True).agg(
+        gastos=("gastos", "sum"), movimientos=("gastos", "size"))
+
+
+def _sumar(acumulado, parcial):
+    if acumulado.empty:
+        return parcial
+    return pd.concat([acumulado, parcial]).groupby(level=list(acumulado.index.names)).sum()
+
+
+class Acumulado:
+    """Estado incremental de ingresos y gastos; solo procesa los renglones agregados al final (si lo anterior no cambió)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reconstrucciones = 0
+        self._prefijo_p = Prefijo(["id_pago", "fecha", "ubicacion", "cliente", "monto"])
+        self._prefijo_g = Prefijo(["id_gasto", "fecha", "categoria", "monto"])
+        self._reiniciar_ingresos()
+        self._reiniciar_gastos()
+
+    def _reiniciar_ingresos(self):
+        self.ingresos = _vacio(["periodo"] + _PAR, _INGRESOS)
+        self._pagado = pd.Series(dtype="float64", index=pd.MultiIndex.from_arrays([[], []], names=_PAR))
+        self._requerido = None
+        self._apertura = None
+
+    def _reiniciar_gastos(self):
+        self.gastos = _vacio(["periodo", "categoria"], ["gastos", "movimientos"])
+
+    def actualizar(self, df_v, df_p, df_g):
+        with self._lock:
+            requerido = enganche_requerido(df_v)
+            apertura = aperturas(df_v, df_p)["total_pagado"]
+            nuevos, reconstruir = self._prefijo_p.nuevos(df_p)
+            # Un cambio de enganche requerido o de apertura cambia la división de pagos ya sumados
+            if (reconstruir or self._requerido is None or not requerido.equals(self._requerido)
+                    or not apertura.equals(self._apertura)):
+                if self._requerido is not None:
+                    self.reconstrucciones += 1
+                self._reiniciar_ingresos()
+                self._requerido, self._apertura = requerido, apertura
+                self._pagado = apertura
+                nuevos = df_p
+            if not nuevos.empty:
+                division = dividir_pagos(nuevos, requerido, self._pagado)
+                self.ingresos = _sumar(self.ingresos, agregar_ingresos(nuevos, division))
+                pagado = nuevos.groupby(_PAR, observed=True)["monto"].sum()
+                self._pagado = pagado if self._pagado.empty else self._pagado.add(pagado, fill_value=0.0)
+
+            nuevos, reconstruir = self._prefijo_g.nuevos(df_g)
+            if reconstruir:
+                self._reiniciar_gastos()
+            if not nuevos.empty:
+                self.gastos = _sumar(self.gastos, agregar_gastos(nuevos))
+            return self.ingresos, self.gastos
+
+
+class CuboFinanciero:
+    """Ingresos por (periodo, fase, vendedor) y gastos por (periodo, categoria)."""
+
+    def __init__(self, ingresos_par, gastos, df_v, df_u):
+        ingresos = ingresos_par.reset_index()
+        vendedor = df_v.drop_duplicates(_PAR, keep="last").set_index(_PAR)["vendedor"]
+        fase = df_u.drop_duplicates("ubicacion", keep="last").set_index("ubicacion")["fase"].astype(str)
+        ingresos["vendedor"] = vendedor.reindex(pd.MultiIndex.from_frame(ingresos[_PAR])).to_numpy()
+        ingresos["fase"] = ingresos["ubicacion"].map(fase)
+        ingresos[["vendedor", "fase"]] = ingresos[["vendedor", "fase"]].astype(object).fillna(SIN_DATO)
+        ingresos["ingresos"] = ingresos["enganche"] + ingresos["mensualidades"]
+        self.ingresos = ingresos.groupby(["periodo", "fase", "vendedor"]).agg(
+            {"enganche": "sum", "mensualidades": "sum", "ingresos": "sum", "pagos": "sum"})
+        self.gastos = gastos
+
+        mensual = self.ingresos.groupby(level="periodo").sum().drop(columns="pagos")
+        mensual = mensual.join(gastos.groupby(level="periodo")["gastos"].sum(), how="outer").fillna(0.0)
+        if len(mensual):
+            # Meses sin movimientos aparecen en cero para que la comparación mes contra mes sea continua
+            mensual = mensual.reindex(pd.period_range(mensual.index.min(), mensual.index.max(), freq="M",
+                                                      name="periodo"), fill_value=0.0)
+        mensual["utilidad"] = mensual["ingresos"] - mensual["gastos"]
+        self.mensual = mensual
+
+    def periodos(self):
+        return list(self.mensual.index)
+
+    def _rango(self, tabla, desde=None, hasta=None):
+        periodos = tabla.index.get_level_values("periodo")
+        filtro = np.ones(len(tabla), dtype=bool)
+        if desde is not None:
+            filtro &= periodos >= desde
+        if hasta is not None:
+            filtro &= periodos <= hasta
+        return tabla[filtro]
+
+    def mes_a_mes(self, desde=None, hasta=None):
+        """Índice periodo: enganche, mensualidades, ingresos, gastos, utilidad."""
+        return self._rango(self.mensual, desde, hasta)
+
+    def por(self, dimension, desde=None, hasta=None):
+        """Ingresos por "fase" o "vendedor" dentro del rango."""
+        return self._rango(self.ingresos, desde, hasta).groupby(level=dimension).sum()
+
+    def gastos_por_categoria(self, desde=None, hasta=None):
+        return self._rango(self.gastos, desde, hasta).groupby(level="categoria").sum()
+
+    def pivote(self, dimension, desde=None, hasta=None):
+        """Tabla periodo × dimensión: ingresos por "fase" o "vendedor", gastos por "categoria"."""
+        tabla, valor = (self.gastos, "gastos") if dimension == "categoria" else (self.ingresos, "ingresos")
+        return self._rango(tabla, desde, hasta)[valor].groupby(level=["periodo", dimension]).sum() \
+            .unstack(dimension, fill_value=0.0)
+
+
+@st.cache_resource(show_spinner=False)
+def _acumulado():
+    return Acumulado()
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _cubo_por_version(versiones, _df_v, _df_p, _df_g, _df_u):
+    ingresos, gastos = _acumulado().actualizar(_df_v, _df_p, _df_g)
+    return CuboFinanciero(ingresos, gastos, _df_v, _df_u)
+
+
+def cubo_financiero(df_v, df_p, df_g, df_u):
+    """Cubo de la versión en caché de ventas, pagos, gastos y ubicaciones."""
+    pestanas = {"ventas": df_v, "pagos": df_p, "gastos": df_g, "ubicaciones": df_u}
+    versiones = tuple(datos.version(p, df) for p, df in pestanas.items())
+    return _cubo_por_version(versiones, df_v, df_p, df_g, df_u)
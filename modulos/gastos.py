@@ -1,38 +1,28 @@
 import streamlit as st
 import pandas as pd
+from modulos.repositorio import repositorio
+from modulos.tablas import dinero, entero, fecha, tabla_paginada
 from datetime import datetime
 
-def render_gastos(df_g, conn, URL_SHEET, fmt_moneda, cargar_datos):
+def render_gastos(df_g, almacen, fmt_moneda):
     st.title("💸 Gestión de Gastos")
     
     # --- VISTA GENERAL ---
     st.write("### 🔍 Historial de Gastos")
     if not df_g.empty:
-        # 1. Preparar el DataFrame para visualización (Ordenado por fecha reciente)
-        df_visual = df_g.copy()
-        df_visual["fecha"] = pd.to_datetime(df_visual["fecha"])
-        df_visual = df_visual.sort_values(by="fecha", ascending=False)
-
-        # 2. Aplicar el criterio de Pandas Style (Símbolo $, comas y sin decimales en ID)
-        df_estilado = df_visual.style.format({
-            "monto": "$ {:,.2f}",
-            "id_gasto": "{:.0f}",
-            "fecha": lambda x: x.strftime('%d/%m/%Y')
-        })
-
-        # 3. Mostrar la tabla principal
-        st.dataframe(
-            df_estilado, 
+        # Tabla paginada, lo más reciente primero (modulos/tablas.py)
+        tabla_paginada(
+            df_g,
+            key="tabla_gastos",
             column_config={
-                "id_gasto": "ID",
-                "fecha": "Fecha",
+                "id_gasto": entero("ID"),
+                "fecha": fecha("Fecha"),
                 "categoria": "Categoría",
-                "monto": "Monto",
+                "monto": dinero("Monto"),
                 "concepto": "Concepto",
                 "notas": "Notas"
             },
-            use_container_width=True, 
-            hide_index=True
+            orden="fecha"
         )
 
         total_gastos = df_g["monto"].sum()
@@ -59,75 +49,70 @@ def render_gastos(df_g, conn, URL_SHEET, fmt_moneda, cargar_datos):
 
             # Generación de ID automático
             nuevo_id = 1
-            if not df_g.empty and "id_gasto" in df_g.columns:
-                try:
-                    nuevo_id = int(float(df_g["id_gasto"].max())) + 1
-                except:
-                    nuevo_id = len(df_g) + 1
+            if df_g["id_gasto"].notna().any():
+                nuevo_id = int(df_g["id_gasto"].max()) + 1
 
             if st.form_submit_button("✅ REGISTRAR GASTO", type="primary"):
                 if f_mon <= 0:
                     st.error("El monto debe ser mayor a $0")
                 else:
-                    nuevo_reg = pd.DataFrame([{
+                    nuevo_reg = {
                         "id_gasto": nuevo_id,
                         "fecha": f_fec.strftime('%Y-%m-%d'),
                         "categoria": f_cat,
                         "monto": f_mon,
                         "concepto": f_des,
                         "notas": f_com
-                    }])
+                    }
                     
-                    df_g = pd.concat([df_g, nuevo_reg], ignore_index=True)
-                    conn.update(spreadsheet=URL_SHEET, worksheet="gastos", data=df_g)
+                    almacen.agregar("gastos", [nuevo_reg])
                     st.success(f"✅ Gasto por $ {f_mon:,.2f} registrado.")
-                    st.cache_data.clear()
                     st.rerun()
 
     # --- PESTAÑA 2: EDITAR O ELIMINAR ---
     with tab_editar:
-        if not df_g.empty:
-            # Asegurar que las columnas existen para el selector
-            df_g["id_gasto"] = df_g["id_gasto"].astype(float).astype(int)
-            gastos_lista = (df_g["id_gasto"].astype(str) + " | " + df_g["fecha"].astype(str) + " | " + df_g["concepto"].astype(str)).tolist()
-            g_sel = st.selectbox("Seleccione el gasto a modificar:", ["--"] + gastos_lista[::-1])
-            
-            if g_sel != "--":
-                id_g_sel = int(g_sel.split(" | ")[0])
-                idx = df_g[df_g["id_gasto"] == id_g_sel].index[0]
-                row = df_g.loc[idx]
-                
-                with st.form("form_edit_gasto"):
-                    st.write(f"✏️ Editando Gasto ID: {id_g_sel}")
-                    ce1, ce2 = st.columns(2)
-                    
-                    e_fec = ce1.date_input("Fecha", value=pd.to_datetime(row["fecha"]))
-                    try:
-                        idx_cat = categorias.index(row["categoria"])
-                    except:
-                        idx_cat = 0
-                        
-                    e_cat = ce2.selectbox("Categoría", categorias, index=idx_cat)
-                    e_mon = ce1.number_input("Monto ($)", min_value=0.0, value=float(row["monto"]))
-                    e_des = ce2.text_input("Concepto", value=str(row["concepto"]))
-                    e_com = st.text_area("Notas", value=str(row.get("notas", "")))
-                    
-                    cb1, cb2 = st.columns(2)
-                    if cb1.form_submit_button("💾 GUARDAR CAMBIOS"):
-                        df_g.at[idx, "fecha"] = e_fec.strftime('%Y-%m-%d')
-                        df_g.at[idx, "categoria"] = e_cat
-                        df_g.at[idx, "monto"] = e_mon
-                        df_g.at[idx, "concepto"] = e_des
-                        df_g.at[idx, "notas"] = e_com
-                        
-                        conn.update(spreadsheet=URL_SHEET, worksheet="gastos", data=df_g)
-                        st.success("Gasto actualizado.")
-                        st.cache_data.clear()
-                        st.rerun()
-                        
-                    if cb2.form_submit_button("🗑️ ELIMINAR GASTO"):
-                        df_g = df_g.drop(idx)
-                        conn.update(spreadsheet=URL_SHEET, worksheet="gastos", data=df_g)
-                        st.error("Gasto eliminado.")
-                        st.cache_data.clear()
-                        st.rerun()
+        _editor(df_g, categorias, almacen)
+
+
+# El editor es un fragmento: elegir el gasto solo vuelve a ejecutar su pestaña
+@st.fragment
+def _editor(df_g, categorias, almacen):
+    if not df_g.empty:
+        gastos_lista = (df_g["id_gasto"].astype(str) + " | " + df_g["fecha"].dt.strftime('%Y-%m-%d').fillna("") + " | " + df_g["concepto"]).tolist()
+        g_sel = st.selectbox("Seleccione el gasto a modificar:", ["--"] + gastos_lista[::-1])
+
+        if g_sel != "--":
+            id_g_sel = int(g_sel.split(" | ")[0])
+            row = repositorio(gastos=df_g).gastos["id_gasto"].buscar(id_g_sel)
+
+            with st.form("form_edit_gasto"):
+                st.write(f"✏️ Editando Gasto ID: {id_g_sel}")
+                ce1, ce2 = st.columns(2)
+
+                e_fec = ce1.date_input("Fecha", value=row["fecha"] if pd.notnull(row["fecha"]) else datetime.now())
+                try:
+                    idx_cat = categorias.index(row["categoria"])
+                except:
+                    idx_cat = 0
+
+                e_cat = ce2.selectbox("Categoría", categorias, index=idx_cat)
+                e_mon = ce1.number_input("Monto ($)", min_value=0.0, value=float(row["monto"]))
+                e_des = ce2.text_input("Concepto", value=str(row["concepto"]))
+                e_com = st.text_area("Notas", value=str(row.get("notas", "")))
+
+                cb1, cb2 = st.columns(2)
+                if cb1.form_submit_button("💾 GUARDAR CAMBIOS"):
+                    almacen.actualizar("gastos", "id_gasto", id_g_sel, {
+                        "fecha": e_fec.strftime('%Y-%m-%d'),
+                        "categoria": e_cat,
+                        "monto": e_mon,
+                        "concepto": e_des,
+                        "notas": e_com
+                    })
+                    st.success("Gasto actualizado.")
+                    st.rerun()
+
+                if cb2.form_submit_button("🗑️ ELIMINAR GASTO"):
+                    almacen.eliminar("gastos", "id_gasto", id_g_sel)
+                    st.error("Gasto eliminado.")
+                    st.rerun()
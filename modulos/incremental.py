@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+# --- ACUMULADOS INCREMENTALES ---
+# Los acumulados de pagos, gastos y pagos de comisiones procesan solo los
+# renglones agregados al final de su pestaña. Para saber si eso es válido se
+# guarda la huella (hash del contenido) de cada renglón ya procesado: si los
+# anteriores siguen idénticos, solo se procesan los nuevos; si alguno se editó,
+# se borró o cambió de lugar, se reconstruye desde cero.
+
+
+def huellas(df, columnas):
+    """Hash del contenido de `columnas` en cada renglón (uint64, en el orden de df)."""
+    return pd.util.hash_pandas_object(df[list(columnas)], index=False).to_numpy(dtype="uint64")
+
+
+class Prefijo:
+    """Huellas de los renglones ya procesados de una pestaña."""
+
+    def __init__(self, columnas):
+        self.columnas = list(columnas)
+        self.huellas = np.empty(0, dtype="uint64")
+
+    def nuevos(self, df):
+        """(renglones por procesar, True si hay que reconstruir) y recuerda las huellas de df."""
+        actuales = huellas(df, self.columnas)
+        n = len(self.huellas)
+        continua = 0 < n <= len(actuales) and np.array_equal(actuales[:n], self.huellas)
+        self.huellas = actuales
+        return (df.iloc[n:], False) if continua else (df, True)
@@ -1,38 +1,19 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from datetime import datetime
-import urllib.parse
-import re
-
-def verificar_y_reparar_columnas(df, columnas_necesarias, worksheet_name, conn, URL_SHEET):
-    if df is None or (isinstance(df, pd.DataFrame) and df.empty and len(df.columns) == 0):
-        df = pd.DataFrame(columns=columnas_necesarias.keys())
-    
-    cambios = False
-    for col, default_val in columnas_necesarias.items():
-        if col not in df.columns:
-            df[col] = default_val
-            cambios = True
-    
-    if cambios:
-        try:
-            conn.update(spreadsheet=URL_SHEET, worksheet=worksheet_name, data=df)
-        except:
-            pass 
-    return df
-
-def render_inicio(df_v, df_p, df_cl, conn, URL_SHEET, fmt_moneda):
+from modulos.asignacion import abonado_a_mensualidades
+from modulos.busqueda import indice
+from modulos.cartera import calcular_mora
+from modulos.contactos import enlaces_contacto, indice_clientes
+from modulos.proyeccion import ESCENARIOS, proyeccion_cartera
+from modulos.saldos import saldos_por_par
+from modulos.tablas import dinero, tabla_paginada
+from modulos.vistas import vista
+
+def render_inicio(df_v, df_p, df_cl, almacen, fmt_moneda):
     st.title("🏠 Panel de Control y Cartera")
 
-    cols_v = {
-        "id_venta": 0, "fecha_registro": "", "ubicacion": "", "cliente": "", 
-        "vendedor": "", "precio_total": 0.0, "enganche_pagado": 0.0, 
-        "mensualidad": 0.0, "estatus_pago": "Activo", "inicio_mensualidades": "",
-        "plazo_meses": 0
-    }
-    df_v = verificar_y_reparar_columnas(df_v, cols_v, "ventas", conn, URL_SHEET)
-
-    total_recaudado = (df_v["enganche_pagado"].sum() + df_p["monto"].sum()) if not df_p.empty else df_v["enganche_pagado"].sum()
+    total_recaudado = df_v["enganche_pagado"].sum() + saldos_por_par(df_p)["total_pagado"].sum()
     valor_cartera = df_v[df_v['estatus_pago'] == 'Activo']['precio_total'].sum()
     
     c1, c2, c3, c4 = st.columns(4)
@@ -47,50 +28,52 @@ def render_inicio(df_v, df_p, df_cl, conn, URL_SHEET, fmt_moneda):
         st.info("No hay datos de ventas registrados.")
         return
 
-    pagos_resumen = df_p.groupby('ubicacion')['monto'].sum().reset_index() if not df_p.empty else pd.DataFrame(columns=['ubicacion', 'monto'])
-    pagos_resumen.columns = ['ubicacion', 'total_pagado_cuotas']
+    # --- PROYECCIÓN DE COBRANZA ---
+    _proyeccion(df_v, df_p, fmt_moneda)
+
+    st.markdown("---")
+
+    # Cartera con mora y enlaces: se recalcula solo si cambian ventas, abonos, clientes o el día (modulos/vistas.py)
+    df_cartera = vista("cartera", _cartera, df_v, abonado_a_mensualidades(df_v, df_p), df_cl,
+                       hoy=pd.Timestamp.now().normalize(), _fmt_moneda=fmt_moneda)
+
+    _control_cobranza(df_v, df_cartera)
 
+
+def _cartera(df_v, a_mensualidades, df_cl, hoy, _fmt_moneda):
+    # Solo lo abonado a mensualidades cuenta contra la deuda de cuotas; sale del libro por contrato,
+    # así que el enganche capturado en ventas de un contrato anterior no se descuenta de sus pagos
     df_cartera = df_v[df_v["estatus_pago"] == "Activo"].copy()
-    df_cartera = df_cartera.merge(pagos_resumen, on='ubicacion', how='left').fillna(0)
+    pares = pd.MultiIndex.from_frame(df_cartera[["ubicacion", "cliente"]])
+    df_cartera['total_pagado_cuotas'] = a_mensualidades.reindex(pares).fillna(0.0).to_numpy()
     
-    hoy = datetime.now()
-
-    def calc_mora(row):
-        try:
-            f_ini = pd.to_datetime(row['inicio_mensualidades'])
-            if pd.isnull(f_ini): f_ini = hoy
-            diff = (hoy.year - f_ini.year) * 12 + (hoy.month - f_ini.month)
-            if hoy.day < f_ini.day: diff -= 1
-            mensualidad = float(row['mensualidad'])
-            deuda_teorica = max(0, diff) * mensualidad
-            pagado = float(row['total_pagado_cuotas'])
-            saldo = max(0.0, deuda_teorica - pagado)
-            cubiertos = pagado / mensualidad if mensualidad > 0 else 0
-            vence_pendiente = f_ini + pd.DateOffset(months=int(cubiertos))
-            dias = (hoy - vence_pendiente).days if saldo > 0 else 0
-            return pd.Series([max(0, dias), saldo])
-        except:
-            return pd.Series([0, 0.0])
-
-    df_cartera[['atraso', 'monto_vencido']] = df_cartera.apply(calc_mora, axis=1)
-
-    def link_contacto(row, tipo):
-        try:
-            cl_info = df_cl[df_cl['nombre'] == row['cliente']].iloc[0]
-            if tipo == "WA":
-                tel_limpio = re.sub(r'\D', '', str(cl_info['telefono']))
-                tel_final = "52" + tel_limpio if len(tel_limpio) == 10 else tel_limpio
-                msg = (f"Hola {row['cliente']}, te saludamos de Valle Mart. Detectamos un saldo pendiente en tu lote "
-                       f"{row['ubicacion']} por {fmt_moneda(row['monto_vencido'])}. Contamos con {row['atraso']} días de atraso.")
-                return f"https://wa.me/{tel_final}?text={urllib.parse.quote(msg)}"
-            else:
-                mail = cl_info['correo']
-                return f"mailto:{mail}?subject=Estado de Cuenta - Lote {row['ubicacion']}"
-        except: return None
-
-    df_cartera['WhatsApp'] = df_cartera.apply(lambda r: link_contacto(r, "WA"), axis=1)
-    df_cartera['Correo'] = df_cartera.apply(lambda r: link_contacto(r, "Mail"), axis=1)
+    df_cartera = calcular_mora(df_cartera, hoy=hoy)
+
+    df_cartera['WhatsApp'], df_cartera['Correo'] = enlaces_contacto(df_cartera, indice_clientes(df_cl), _fmt_moneda)
+    return df_cartera
+
+
+# Cada sección es un fragmento: sus controles solo vuelven a ejecutar la sección, no toda la app
+@st.fragment
+def _proyeccion(df_v, df_p, fmt_moneda):
+    st.subheader("📅 Cobranza Esperada")
+    cp1, cp2 = st.columns([2, 1])
+    escenario = cp1.selectbox("Escenario", list(ESCENARIOS), key="proy_escenario")
+    horizonte = cp2.selectbox("Meses", [12, 24, 36, 48], index=1, key="proy_meses")
+    proyeccion = proyeccion_cartera(df_v, df_p, horizonte, **ESCENARIOS[escenario])
 
+    cm1, cm2, cm3 = st.columns(3)
+    cm1.metric("Este mes", fmt_moneda(proyeccion["esperado"].iloc[0]))
+    cm2.metric("Próximos 12 meses", fmt_moneda(proyeccion["esperado"].iloc[:12].sum()))
+    cm3.metric(f"Total a {horizonte} meses", fmt_moneda(proyeccion["acumulado"].iloc[-1]),
+               delta=f"{fmt_moneda(proyeccion['esperado'].sum() - proyeccion['programado'].sum())} vs programado",
+               delta_color="off")
+    df_grafica = proyeccion[["programado", "esperado"]].rename(columns={"programado": "Programado", "esperado": "Esperado"})
+    st.bar_chart(df_grafica.set_axis(df_grafica.index.strftime('%Y-%m'), axis=0), stack=False)
+
+
+@st.fragment
+def _control_cobranza(df_v, df_cartera):
     st.subheader("📋 Control de Cobranza y Contacto")
     
     cf1, cf2 = st.columns(2)
@@ -101,33 +84,26 @@ def render_inicio(df_v, df_p, df_cl, conn, URL_SHEET, fmt_moneda):
     if solo_mora:
         df_viz = df_viz[df_viz['monto_vencido'] > 0]
     if busqueda:
-        df_viz = df_viz[df_viz['cliente'].astype(str).str.contains(busqueda, case=False) | 
-                        df_viz['ubicacion'].astype(str).str.contains(busqueda, case=False)]
+        posiciones = indice("ventas", df_v, ["ubicacion", "cliente"]).buscar(busqueda, k=None)
+        df_viz = df_viz[df_viz.index.isin(df_v.index[posiciones])]
 
     if not df_viz.empty:
-        df_viz = df_viz.sort_values("atraso", ascending=False)
-        
-        df_viz['Estatus'] = df_viz['atraso'].apply(
-            lambda x: "🔴 CRÍTICO(+75)" if x > 75 else ("🟡 MORA(+25)" if x > 25 else "🟢 AL CORRIENTE")
+        df_viz['Estatus'] = np.select(
+            [df_viz['atraso'] > 75, df_viz['atraso'] > 25], ["🔴 CRÍTICO(+75)", "🟡 MORA(+25)"], "🟢 AL CORRIENTE"
         )
 
-        df_estilado = df_viz[["Estatus", "ubicacion", "cliente", "atraso", "monto_vencido", "WhatsApp", "Correo"]].style.format({
-            "atraso": "{:.0f}",
-            "monto_vencido": "$ {:,.2f}"            
-        })
-
-        st.dataframe(
-            df_estilado,
+        tabla_paginada(
+            df_viz[["Estatus", "ubicacion", "cliente", "atraso", "monto_vencido", "WhatsApp", "Correo"]],
+            key="tabla_cartera",
             column_config={
                 "ubicacion": "Lote",
                 "cliente": "Cliente",
-                "atraso": "Días de Atraso",
-                "monto_vencido": "Saldo Vencido",
+                "atraso": st.column_config.NumberColumn("Días de Atraso", format="%d"),
+                "monto_vencido": dinero("Saldo Vencido"),
                 "WhatsApp": st.column_config.LinkColumn("📲 WA", display_text="Chat"),
                 "Correo": st.column_config.LinkColumn("📧 Mail", display_text="Email")
             },
-            use_container_width=True, 
-            hide_index=True
+            orden="atraso"
         )
     else:
         st.success("🎉 Todo al corriente.")
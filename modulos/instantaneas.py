@@ -0,0 +1,60 @@
+import os
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- COPIAS EN DISCO (PARQUET) DE CADA PESTAÑA ---
+# Sobreviven a reinicios y redeploys: al arrancar se sirve la última copia y la
+# descarga fresca se hace detrás. La hora de descarga viaja en los metadatos.
+
+DIRECTORIO = os.environ.get("VALLEMART_INSTANTANEAS", ".instantaneas")
+_META_FECHA = b"vallemart_descargado"
+
+
+def _ruta(pestana):
+    return os.path.join(DIRECTORIO, f"{pestana}.parquet")
+
+
+def _tabla_arrow(df):
+    """Arrow no acepta columnas con tipos mezclados (p. ej. teléfonos número/texto)."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].map(lambda v: v if pd.isnull(v) else str(v))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def guardar(pestana, df, fecha=None):
+    """Escribe la copia de la pestaña de forma atómica (archivo temporal + rename)."""
+    fecha = fecha or datetime.now()
+    os.makedirs(DIRECTORIO, exist_ok=True)
+    tabla = _tabla_arrow(df)
+    meta = dict(tabla.schema.metadata or {})
+    meta[_META_FECHA] = fecha.isoformat().encode()
+    temporal = _ruta(pestana) + ".tmp"
+    pq.write_table(tabla.replace_schema_metadata(meta), temporal)
+    os.replace(temporal, _ruta(pestana))
+
+
+def cargar(pestana):
+    """Devuelve (df, fecha_descarga) o None si no hay copia legible."""
+    try:
+        tabla = pq.read_table(_ruta(pestana))
+    except (OSError, pa.ArrowInvalid):
+        return None
+    fecha = (tabla.schema.metadata or {}).get(_META_FECHA)
+    fecha = datetime.fromisoformat(fecha.decode()) if fecha else None
+    return tabla.to_pandas(), fecha
+
+
+def fecha(pestana):
+    """Hora de descarga de la copia en disco, sin leer los datos."""
+    try:
+        meta = pq.read_schema(_ruta(pestana)).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    valor = meta.get(_META_FECHA)
+    return datetime.fromisoformat(valor.decode()) if valor else None
@@ -0,0 +1,111 @@
+import threading
+import pandas as pd
+import streamlit as st
+from modulos import datos
+from modulos.incremental import Prefijo
+
+# --- MOTOR DE COMISIONES ---
+# Devengado por contrato según su propia comision_venta (la que se pacta en
+# Ventas) y pagado según la hoja pagos_comisiones, agregados por vendedor y
+# mes. Los estados de cuenta (un vendedor, un mes) se contestan desde esos
+# agregados sin volver a recorrer ventas ni pagos.
+#
+# - Devengado: se recalcula solo cuando cambia la versión de "ventas".
+# - Pagado: pagos_comisiones normalmente solo crece por el final; en cada
+#   recarga se suman únicamente los renglones nuevos y, si se corrigió alguno
+#   ya sumado, se reconstruye (igual que modulos/saldos.py).
+
+# Contratos anteriores a la columna comision_venta (quedó en 0): regla anterior del 3 %
+PORCENTAJE_RESPALDO = 0.03
+_LLAVE = ["vendedor", "periodo"]
+
+
+def comision_por_contrato(df_v):
+    """Comisión de cada contrato: comision_venta, o el porcentaje de respaldo si no se capturó."""
+    pactada = df_v["comision_venta"]
+    return pactada.where(pactada > 0, df_v["precio_total"] * PORCENTAJE_RESPALDO)
+
+
+def _periodo(fechas):
+    return fechas.dt.to_period("M")
+
+
+def devengado(df_v):
+    """Índice (vendedor, periodo): devengado, contratos. El periodo es el mes de registro."""
+    fecha = df_v["fecha_registro"].fillna(df_v["fecha_contrato"])
+    base = pd.DataFrame({"vendedor": df_v["vendedor"], "periodo": _periodo(fecha),
+                         "devengado": comision_por_contrato(df_v)})
+    return base.groupby(_LLAVE, observed=True, dropna=False).agg(
+        devengado=("devengado", "sum"), contratos=("devengado", "size"))
+
+
+def pagado(df_pc):
+    """Índice (vendedor, periodo): pagado, pagos."""
+    base = pd.DataFrame({"vendedor": df_pc["vendedor"], "periodo": _periodo(df_pc["fecha"]),
+                         "pagado": df_pc["monto"]})
+    return base.groupby(_LLAVE, observed=True, dropna=False).agg(
+        pagado=("pagado", "sum"), pagos=("pagado", "size"))
+
+
+class PagosAcumulados:
+    """Acumulado de pagos_comisiones que solo procesa los renglones agregados al final (si lo anterior no cambió)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tabla = pagado(pd.DataFrame({"vendedor": [], "fecha": pd.Series(dtype="datetime64[ns]"), "monto": []}))
+        self._prefijo = Prefijo(["vendedor", "fecha", "monto"])
+
+    def actualizar(self, df_pc):
+        with self._lock:
+            nuevos, reconstruir = self._prefijo.nuevos(df_pc)
+            if reconstruir:
+                self._tabla = pagado(df_pc.iloc[:0])
+            if not nuevos.empty:
+                self._tabla = pd.concat([self._tabla, pagado(nuevos)]).groupby(level=_LLAVE, dropna=False).sum()
+            return self._tabla
+
+
+class EstadoComisiones:
+    """Devengado y pagado por (vendedor, periodo) con sus vistas de resumen."""
+
+    def __init__(self, devengado_, pagado_):
+        tabla = devengado_.join(pagado_, how="outer")
+        tabla[["devengado", "pagado"]] = tabla[["devengado", "pagado"]].fillna(0.0)
+        tabla[["contratos", "pagos"]] = tabla[["contratos", "pagos"]].fillna(0).astype("int64")
+        tabla["pendiente"] = tabla["devengado"] - tabla["pagado"]
+        self.tabla = tabla.sort_index()
+
+    def por_vendedor(self):
+        return self.tabla.groupby(level="vendedor").sum()
+
+    def por_periodo(self, vendedor=None):
+        tabla = self.tabla if vendedor is None else self.tabla.xs(vendedor, level="vendedor", drop_level=False)
+        return tabla.groupby(level="periodo").sum()
+
+    def estado(self, vendedor, periodo):
+        """Totales de un vendedor en un mes ("2025-03" o Period). Ceros si no hubo movimientos."""
+        periodo = pd.Period(periodo, "M")
+        try:
+            fila = self.tabla.loc[(vendedor, periodo)]
+        except KeyError:
+            return {"devengado": 0.0, "pagado": 0.0, "pendiente": 0.0, "contratos": 0, "pagos": 0}
+        return {c: fila[c] for c in ["devengado", "pagado", "pendiente", "contratos", "pagos"]}
+
+    def periodos(self):
+        return sorted(self.tabla.index.get_level_values("periodo").dropna().unique(), reverse=True)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _devengado_por_version(version, _df_v):
+    return devengado(_df_v)
+
+
+@st.cache_resource(show_spinner=False)
+def _pagos_acumulados():
+    return PagosAcumulados()
+
+
+def estado_comisiones(df_v, df_pc):
+    """Estado de comisiones para las versiones en caché de ventas y pagos_comisiones."""
+    return EstadoComisiones(_devengado_por_version(datos.version("ventas", df_v), df_v),
+                            _pagos_acumulados().actualizar(df_pc))
@@ -0,0 +1,104 @@
+import argparse
+import os
+from modulos import esquema
+
+# --- MIGRACIONES DE ESTRUCTURA ---
+# Los cambios de estructura del libro (columnas o pestañas nuevas) se hacen
+# aquí, una sola vez, y nunca desde una vista. Cada migración tiene un número;
+# la versión aplicada se guarda en la pestaña PESTANA_META y solo corren las
+# que tengan un número mayor.
+#
+# Para una columna nueva: declararla en esquema.py y agregar al final de
+# MIGRACIONES una función con el siguiente número.
+
+PESTANA_META = "_meta"
+CLAVE_VERSION = "version_esquema"
+
+
+def _m001_estructura_base(almacen):
+    # Lo que antes hacía verificar_y_reparar_columnas en Inicio y Directorio,
+    # extendido a todas las pestañas del registro
+    for pestana, columnas in esquema.ESQUEMA.items():
+        almacen.agregar_columnas(pestana, list(columnas))
+
+
+MIGRACIONES = [
+    (1, "Columnas del registro central en todas las pestañas", _m001_estructura_base),
+]
+
+
+def version_actual(almacen):
+    """Número de la última migración aplicada (0 si el libro nunca se migró)."""
+    df = almacen.muestras([PESTANA_META], filas=100)[PESTANA_META]
+    if df is None or "clave" not in df.columns:
+        return 0
+    fila = df[df["clave"].astype(str) == CLAVE_VERSION]
+    if fila.empty:
+        return 0
+    try:
+        return int(float(fila["valor"].iloc[0]))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _guardar_version(almacen, numero):
+    df = almacen.muestras([PESTANA_META], filas=100)[PESTANA_META]
+    if df is not None and "clave" in df.columns and (df["clave"].astype(str) == CLAVE_VERSION).any():
+        almacen.actualizar(PESTANA_META, "clave", CLAVE_VERSION, {"valor": numero})
+        return
+    almacen.agregar_columnas(PESTANA_META, ["clave", "valor"])
+    almacen.agregar(PESTANA_META, [{"clave": CLAVE_VERSION, "valor": numero}])
+
+
+def pendientes(almacen):
+    actual = version_actual(almacen)
+    return [(n, descripcion) for n, descripcion, _ in MIGRACIONES if n > actual]
+
+
+def aplicar_migraciones(almacen):
+    """Corre en orden las migraciones pendientes y devuelve [(numero, descripcion)] aplicadas.
+
+    La versión se guarda después de cada una: si una falla, las anteriores
+    quedan registradas y la siguiente ejecución retoma desde ahí.
+    """
+    actual = version_actual(almacen)
+    aplicadas = []
+    for numero, descripcion, funcion in MIGRACIONES:
+        if numero <= actual:
+            continue
+        funcion(almacen)
+        _guardar_version(almacen, numero)
+        actual = numero
+        aplicadas.append((numero, descripcion))
+    return aplicadas
+
+
+if __name__ == "__main__":
+    # python -m modulos.migraciones [--listar] [--modo local --db vallemart.db]
+    parser = argparse.ArgumentParser(description="Aplica las migraciones de estructura pendientes.")
+    parser.add_argument("--modo", default=os.environ.get("VALLEMART_ALMACEN", "gsheets"),
+                        choices=["gsheets", "local", "espejo"])
+    parser.add_argument("--db", default=os.environ.get("VALLEMART_DB", "vallemart.db"))
+    parser.add_argument("--url", default=os.environ.get("VALLEMART_URL"),
+                        help="URL del libro de Google Sheets (modos gsheets y espejo)")
+    parser.add_argument("--listar", action="store_true", help="Solo muestra las pendientes")
+    args = parser.parse_args()
+
+    from modulos.almacen import crear_almacen
+    conn = None
+    if args.modo != "local":
+        if not args.url:
+            parser.error("--url (o VALLEMART_URL) es obligatorio en modo gsheets/espejo")
+        import streamlit as st
+        from streamlit_gsheets import GSheetsConnection
+        conn = st.connection("gsheets", type=GSheetsConnection)
+    almacen = crear_almacen(args.modo, conn=conn, url=args.url, ruta=args.db)
+
+    print(f"Versión actual: {version_actual(almacen)}")
+    if args.listar:
+        for numero, descripcion in pendientes(almacen):
+            print(f"  pendiente {numero:03d}: {descripcion}")
+    else:
+        for numero, descripcion in aplicar_migraciones(almacen):
+            print(f"  aplicada {numero:03d}: {descripcion}")
+        print(f"Versión final: {version_actual(almacen)}")
@@ -0,0 +1,26 @@
+import importlib
+from modulos import perfil
+
+# --- REGISTRO DE PÁGINAS ---
+# Cada entrada del menú apunta al módulo y la función que la dibujan. El módulo
+# se importa la primera vez que se abre la página (no al arrancar la app), así
+# que una página con dependencias pesadas no retrasa el arranque de las demás.
+
+PAGINAS = {
+    "🏠 Inicio (Cartera)": ("modulos.inicio", "render_inicio"),
+    "📈 Reportes Financieros": ("modulos.reportes", "render_reportes"),
+    "📝 Ventas": ("modulos.ventas", "render_ventas"),
+    "📊 Detalle de Crédito": ("modulos.credito", "render_detalle_credito"),
+    "💰 Cobranza": ("modulos.cobranza", "render_cobranza"),
+    "🎖️ Comisiones": ("modulos.comisiones", "render_comisiones"),
+    "💸 Gastos": ("modulos.gastos", "render_gastos"),
+    "📍 Ubicaciones": ("modulos.ubicaciones", "render_ubicaciones"),
+    "👥 Directorio": ("modulos.directorio", "render_directorio"),
+}
+
+
+def pagina(menu):
+    """Función render_* de la entrada del menú; importa su módulo si hace falta."""
+    modulo, funcion = PAGINAS[menu]
+    with perfil.medir(f"importar {modulo}"):
+        return getattr(importlib.import_module(modulo), funcion)
@@ -0,0 +1,75 @@
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- PERFIL DE ARRANQUE ---
+# Con VALLEMART_PERFIL=1 la app mide cada paso de inicialización (almacén,
+# migraciones, auditoría) y la importación y primer render de cada página; la
+# barra lateral muestra los tiempos. Se guarda la primera medición de cada paso,
+# que es la del arranque en frío (las siguientes suelen salir del caché).
+#
+# Para el costo de importación de cada módulo en un intérprete limpio:
+#   python -m modulos.perfil
+
+ACTIVO = os.environ.get("VALLEMART_PERFIL", "0") == "1"
+BASE = ["streamlit", "pandas", "numpy", "modulos.datos"]   # lo que cualquier página ya encuentra importado
+
+_lock = threading.Lock()
+_tiempos = {}
+
+
+@contextmanager
+def medir(paso):
+    if not ACTIVO:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _tiempos.setdefault(paso, time.perf_counter() - inicio)
+
+
+def tiempos():
+    """{paso: segundos} en el orden en que se midieron."""
+    with _lock:
+        return dict(_tiempos)
+
+
+def _acumulado(salida, modulo):
+    """Tiempo acumulado (s) de `modulo` en la salida de python -X importtime."""
+    for linea in salida.splitlines():
+        partes = [p.strip() for p in linea.removeprefix("import time:").split("|")]
+        if len(partes) == 3 and partes[2] == modulo:
+            return int(partes[1]) / 1e6
+    return 0.0
+
+
+def importar_en_limpio(modulo, previos=()):
+    """Segundos que tarda `modulo` en un intérprete nuevo, después de importar `previos`."""
+    codigo = "".join(f"import {p}\n" for p in previos) + f"import {modulo}\n"
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=raiz,
+                       capture_output=True, text=True, check=True)
+    return _acumulado(r.stderr, modulo)
+
+
+if __name__ == "__main__":
+    # python -m modulos.perfil [--modulo modulos.x ...]
+    from modulos.paginas import PAGINAS
+
+    parser = argparse.ArgumentParser(description="Tiempo de importación de cada módulo en un intérprete limpio.")
+    parser.add_argument("--modulo", action="append", help="Módulo a medir (por omisión: base y todas las páginas)")
+    args = parser.parse_args()
+    modulos = args.modulo or BASE + [m for m, _ in PAGINAS.values()]
+
+    print(f"{'módulo':<24} {'en frío':>10} {'sobre la base':>14}")
+    for modulo in modulos:
+        frio = importar_en_limpio(modulo)
+        propio = frio if modulo in BASE else importar_en_limpio(modulo, BASE)
+        print(f"{modulo:<24} {frio * 1000:>8.0f} ms {propio * 1000:>11.0f} ms")
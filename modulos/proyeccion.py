@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from modulos import datos
+from modulos.amortizacion import calendario_cartera
+
+# --- PROYECCIÓN DE FLUJO DE COBRANZA ---
+# Cobranza esperada mes a mes para los próximos N meses, a partir del
+# calendario de toda la cartera (modulos/amortizacion.py): lo pendiente de cada
+# cuota futura, ya descontado lo abonado, sumado por mes con bincount.
+#
+# Escenarios (probabilidades mensuales, 0 = sin efecto):
+#   morosidad   fracción de lo programado que no se cobra
+#   anticipado  probabilidad de que un contrato liquide todo su saldo en el mes;
+#               el mes k recibe (1-p)^k * (p * saldo restante + (1-p) * cuota)
+#   recuperacion fracción del saldo ya vencido que se cobra en el primer mes
+
+ESCENARIOS = {
+    "Base": {},
+    "Morosidad 10 %": {"morosidad": 0.10},
+    "Morosidad 25 %": {"morosidad": 0.25},
+    "Liquidación anticipada 2 %/mes": {"anticipado": 0.02},
+    "Recuperar 50 % de lo vencido": {"recuperacion": 0.50},
+}
+COLUMNAS = ["programado", "recuperado", "esperado", "cuotas", "acumulado"]
+
+
+def proyectar(plan, meses=24, hoy=None, morosidad=0.0, anticipado=0.0, recuperacion=0.0):
+    """Índice periodo (meses desde el mes de hoy): COLUMNAS.
+
+    plan: calendario en formato largo (id_venta, fecha, monto, abonado), ordenado por id_venta y cuota.
+    """
+    hoy = pd.Timestamp(hoy if hoy is not None else pd.Timestamp.now()).normalize()
+    periodos = pd.period_range(hoy.to_period("M"), periods=meses, freq="M", name="periodo")
+    if plan.empty:
+        return pd.DataFrame(0.0, index=periodos, columns=COLUMNAS)
+
+    pendiente = (plan["monto"].to_numpy(dtype="float64") - plan["abonado"].to_numpy(dtype="float64")).clip(min=0.0)
+    mes = (plan["fecha"].to_numpy().astype("datetime64[M]") - np.datetime64(hoy, "M")).astype("int64")
+    vencido = pendiente[mes < 0].sum()
+
+    futuro = mes >= 0
+    pendiente, mes, ids = pendiente[futuro], mes[futuro], plan["id_venta"].to_numpy()[futuro]
+    # Saldo que liquidaría el contrato en ese mes: lo pendiente de esa cuota en adelante
+    restante = pd.Series(pendiente[::-1]).groupby(ids[::-1], sort=False).cumsum().to_numpy()[::-1]
+    sobrevive = (1.0 - anticipado) ** mes
+    esperado = sobrevive * (anticipado * restante + (1.0 - anticipado) * pendiente) * (1.0 - morosidad)
+
+    dentro = mes < meses
+    proyeccion = pd.DataFrame({
+        "programado": np.bincount(mes[dentro], weights=pendiente[dentro], minlength=meses),
+        "recuperado": np.r_[vencido * recuperacion, np.zeros(meses - 1)],
+        "esperado": np.bincount(mes[dentro], weights=esperado[dentro], minlength=meses),
+        "cuotas": np.bincount(mes[dentro], weights=pendiente[dentro] > 0, minlength=meses).astype("int64"),
+    }, index=periodos)
+    proyeccion["esperado"] += proyeccion["recuperado"]
+    proyeccion["acumulado"] = proyeccion["esperado"].cumsum()
+    return proyeccion
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _proyeccion_por_version(version_ventas, version_pagos, mes, meses, escenario, _df_v, _df_p):
+    return proyectar(calendario_cartera(_df_v, _df_p), meses, hoy=pd.Timestamp.now(), **dict(escenario))
+
+
+def proyeccion_cartera(df_v, df_p, meses=24, **escenario):
+    """Proyección para las versiones en caché de ventas y pagos; se recalcula al cambiar de mes."""
+    mes = pd.Timestamp.now().strftime("%Y-%m")
+    return _proyeccion_por_version(datos.version("ventas", df_v), datos.version("pagos", df_p), mes, meses,
+                                   tuple(sorted(escenario.items())), df_v, df_p)
@@ -1,29 +1,47 @@
 import streamlit as st
-import pandas as pd
+from modulos.finanzas import cubo_financiero
+from modulos.tablas import dinero
 
-def render_reportes(df_v, df_p, df_g, fmt_moneda):
+def render_reportes(df_v, df_p, df_g, df_u, fmt_moneda):
     st.title("📈 Reportes Financieros")
-    st.info("Resumen general de ingresos, gastos y utilidad neta.")
+    st.info("Ingresos, gastos y utilidad neta por mes, fase y vendedor.")
 
     # Validar que existan datos
-    if df_v.empty or df_p.empty or df_g.empty:
-        st.warning("Se requieren datos en Ventas, Pagos y Gastos para generar el reporte.")
+    if df_p.empty and df_g.empty:
+        st.warning("Se requieren datos en Pagos o Gastos para generar el reporte.")
         return
 
     # --- PROCESAMIENTO DE DATOS ---
-    # Ingresos: Suma de Enganches (Ventas) + Mensualidades (Pagos)
-    total_enganches = df_v["enganche"].sum()
-    total_mensualidades = df_p["monto"].sum()
-    total_ingresos = total_enganches + total_mensualidades
+    # Todo sale del cubo mensual (modulos/finanzas.py); aquí solo se filtra el rango
+    cubo = cubo_financiero(df_v, df_p, df_g, df_u)
+    periodos = cubo.periodos()
+    if not periodos:
+        st.warning("No hay pagos ni gastos con fecha.")
+        return
+
+    _reporte(cubo, periodos, df_g, fmt_moneda)
+
 
-    # Gastos
-    total_gastos = df_g["monto"].sum()
-    
-    # Utilidad
-    utilidad = total_ingresos - total_gastos
+# Fragmento: cambiar el rango solo vuelve a ejecutar el reporte (todo sale del cubo en caché)
+@st.fragment
+def _reporte(cubo, periodos, df_g, fmt_moneda):
+    c_desde, c_hasta = st.columns(2)
+    desde = c_desde.selectbox("Desde", periodos, index=max(len(periodos) - 12, 0),
+                              format_func=lambda p: p.strftime('%m/%Y'), key="rep_desde")
+    hasta = c_hasta.selectbox("Hasta", periodos, index=len(periodos) - 1,
+                              format_func=lambda p: p.strftime('%m/%Y'), key="rep_hasta")
+    if desde > hasta:
+        desde, hasta = hasta, desde
+
+    mensual = cubo.mes_a_mes(desde, hasta)
+    total_enganches = mensual["enganche"].sum()
+    total_mensualidades = mensual["mensualidades"].sum()
+    total_ingresos = mensual["ingresos"].sum()
+    total_gastos = mensual["gastos"].sum()
+    utilidad = mensual["utilidad"].sum()
 
     # --- VISUALIZACIÓN ---
-    
+
     # KPIs Principales
     c1, c2, c3 = st.columns(3)
     c1.metric("Ingresos Totales", fmt_moneda(total_ingresos))
@@ -35,34 +53,71 @@ def render_reportes(df_v, df_p, df_g, fmt_moneda):
     col_graf, col_tab = st.columns([2, 1])
 
     with col_graf:
-        st.subheader("📊 Comparativo Financiero")
-        # Crear DataFrame para gráfica nativa de barras
-        df_grafica = pd.DataFrame({
-            "Concepto": ["Ingresos", "Gastos", "Utilidad"],
-            "Monto": [total_ingresos, total_gastos, utilidad]
-        }).set_index("Concepto")
-        
-        st.bar_chart(df_grafica)
+        st.subheader("📊 Comparativo Mensual")
+        df_grafica = mensual[["ingresos", "gastos", "utilidad"]].rename(
+            columns={"ingresos": "Ingresos", "gastos": "Gastos", "utilidad": "Utilidad"})
+        st.bar_chart(_por_mes(df_grafica), stack=False)
 
     with col_tab:
         st.subheader("📋 Desglose de Ingresos")
         st.write(f"**Enganches:** {fmt_moneda(total_enganches)}")
         st.write(f"**Mensualidades:** {fmt_moneda(total_mensualidades)}")
-        
+        if len(mensual) > 1:
+            actual, anterior = mensual["utilidad"].iloc[-1], mensual["utilidad"].iloc[-2]
+            st.metric(f"Utilidad {mensual.index[-1].strftime('%m/%Y')}", fmt_moneda(actual),
+                      delta=fmt_moneda(actual - anterior))
+
     st.divider()
 
+    tab_mes, tab_fase, tab_vendedor, tab_gastos = st.tabs(
+        ["🗓️ Mes a Mes", "🏗️ Por Fase", "👔 Por Vendedor", "💸 Gastos por Categoría"])
+
+    with tab_mes:
+        df_mes = mensual.sort_index(ascending=False)
+        df_mes.index = df_mes.index.strftime('%m/%Y')
+        st.dataframe(
+            df_mes,
+            column_config={
+                "enganche": dinero("Enganches"), "mensualidades": dinero("Mensualidades"), "ingresos": dinero("Ingresos"),
+                "gastos": dinero("Gastos"), "utilidad": dinero("Utilidad Neta")
+            },
+            use_container_width=True
+        )
+        st.download_button(
+            "📥 Descargar reporte mensual (CSV)",
+            mensual.rename_axis("mes").to_csv().encode("utf-8"),
+            file_name=f"reporte_{desde}_{hasta}.csv",
+            mime="text/csv"
+        )
+
+    for tab, dimension, titulo in [(tab_fase, "fase", "Fase"), (tab_vendedor, "vendedor", "Vendedor")]:
+        with tab:
+            resumen = cubo.por(dimension, desde, hasta).sort_values("ingresos", ascending=False)
+            st.dataframe(
+                resumen,
+                column_config={
+                    dimension: titulo, "enganche": dinero("Enganches"), "mensualidades": dinero("Mensualidades"),
+                    "ingresos": dinero("Ingresos"), "pagos": "Pagos"
+                },
+                use_container_width=True
+            )
+            st.line_chart(_por_mes(cubo.pivote(dimension, desde, hasta)))
+
     # Resumen de Gastos por Categoría
-    st.subheader("💸 Gastos por Categoría")
-    if "categoria" in df_g.columns:
-        resumen_gastos = df_g.groupby("categoria")["monto"].sum().reset_index()
+    with tab_gastos:
+        resumen_gastos = cubo.gastos_por_categoria(desde, hasta)["gastos"].reset_index()
         resumen_gastos.columns = ["Categoría", "Monto Total"]
         resumen_gastos = resumen_gastos.sort_values(by="Monto Total", ascending=False)
-        
-        # Aplicar formato de moneda a la tabla
-        st.table(resumen_gastos.style.format({"Monto Total": "$ {:,.2f}"}))
-    else:
-        st.write("No se encontró la columna 'categoria' en la pestaña de gastos.")
+
+        st.dataframe(resumen_gastos, column_config={"Monto Total": dinero("Monto Total")},
+                     use_container_width=True, hide_index=True)
+        st.bar_chart(_por_mes(cubo.pivote("categoria", desde, hasta)))
 
     # Listado de Gastos Recientes
     with st.expander("Ver últimos gastos registrados"):
         st.dataframe(df_g.tail(10), use_container_width=True, hide_index=True)
+
+
+def _por_mes(tabla):
+    """Índice de periodos como texto para las gráficas nativas."""
+    return tabla.set_axis(tabla.index.strftime('%Y-%m'), axis=0)
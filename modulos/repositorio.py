@@ -0,0 +1,121 @@
+from collections import namedtuple
+import pandas as pd
+import streamlit as st
+from modulos import datos
+
+# --- REPOSITORIO EN MEMORIA CON LLAVES ---
+# Índices por llave natural construidos una vez por versión de los datos, para
+# que cada selección en pantalla sea una búsqueda en dict y no un filtro sobre
+# toda la pestaña. También reporta llaves repetidas, que antes se resolvían en
+# silencio tomando el primer renglón.
+
+Contrato = namedtuple("Contrato", ["venta", "lote", "cliente", "pagos"])
+
+# pestaña -> llaves naturales que se indexan
+LLAVES = {
+    "ventas": ["id_venta", "ubicacion"],
+    "ubicaciones": ["ubicacion", "id_lote"],
+    "clientes": ["nombre", "id_cliente"],
+    "vendedores": ["nombre", "id_vendedor"],
+    "gastos": ["id_gasto"],
+    "pagos": ["id_pago"],
+}
+
+
+def _llave(valor):
+    """7, 7.0 y "7" son la misma llave; el texto se compara sin espacios a los lados."""
+    if valor is None or valor is pd.NA or (isinstance(valor, float) and valor != valor):
+        return None
+    if isinstance(valor, str):
+        valor = valor.strip()
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+    return int(numero) if numero.is_integer() else numero
+
+
+class Indice:
+    """Llave -> renglón en O(1). Si la llave se repite, buscar() devuelve el primero
+    y repetido() lo reporta."""
+
+    def __init__(self, df, clave):
+        self.df = df
+        self.clave = clave
+        llaves = [_llave(v) for v in df[clave]] if clave in df.columns else []
+        # Recorrido al revés: la primera aparición es la que queda en el dict
+        self._posiciones = dict(zip(reversed(llaves), range(len(llaves) - 1, -1, -1)))
+        self._posiciones.pop(None, None)
+        vistos, repetidos = set(), set()
+        for k in llaves:
+            if k is not None:
+                (repetidos if k in vistos else vistos).add(k)
+        self.repetidos = repetidos
+
+    def __contains__(self, valor):
+        return _llave(valor) in self._posiciones
+
+    def __len__(self):
+        return len(self._posiciones)
+
+    def buscar(self, valor):
+        """Renglón (Series) con esa llave, o None."""
+        posicion = self._posiciones.get(_llave(valor))
+        return None if posicion is None else self.df.iloc[posicion]
+
+    def repetido(self, valor):
+        return _llave(valor) in self.repetidos
+
+
+class Repositorio:
+    """Índices de las pestañas recibidas; se accede como repo.ventas["ubicacion"].buscar(...)."""
+
+    def __init__(self, **tablas):
+        self.tablas = tablas
+        self.indices = {
+            pestana: {clave: Indice(df, clave) for clave in LLAVES.get(pestana, [])}
+            for pestana, df in tablas.items()
+        }
+        pagos = tablas.get("pagos")
+        self._pagos_por_lote = pagos.groupby("ubicacion", sort=False).indices if pagos is not None and not pagos.empty else {}
+
+    def __getattr__(self, pestana):
+        indices = self.__dict__.get("indices", {})
+        if pestana in indices:
+            return indices[pestana]
+        raise AttributeError(pestana)
+
+    def duplicados(self):
+        """{(pestana, clave): [llaves repetidas]} para las llaves que deberían ser únicas."""
+        return {
+            (pestana, clave): sorted(map(str, indice.repetidos))
+            for pestana, indices in self.indices.items()
+            for clave, indice in indices.items() if indice.repetidos
+        }
+
+    def pagos_de(self, ubicacion):
+        pagos = self.tablas.get("pagos")
+        if pagos is None:
+            return None
+        posiciones = self._pagos_por_lote.get(ubicacion, [])
+        return pagos.iloc[posiciones]
+
+    def contrato(self, ubicacion):
+        """Contrato vigente del lote con su lote, cliente y pagos (None si no hay venta)."""
+        venta = self.ventas["ubicacion"].buscar(ubicacion)
+        if venta is None:
+            return None
+        lote = self.ubicaciones["ubicacion"].buscar(ubicacion) if "ubicaciones" in self.indices else None
+        cliente = self.clientes["nombre"].buscar(venta["cliente"]) if "clientes" in self.indices else None
+        return Contrato(venta, lote, cliente, self.pagos_de(ubicacion))
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _repositorio_por_version(versiones, _tablas):
+    return Repositorio(**_tablas)
+
+
+def repositorio(**tablas):
+    """Repositorio de las pestañas dadas (p. ej. ventas=df_v, pagos=df_p) para su versión en caché."""
+    versiones = tuple(sorted((pestana, datos.version(pestana, df)) for pestana, df in tablas.items()))
+    return _repositorio_por_version(versiones, tablas)
@@ -0,0 +1,99 @@
+import threading
+import pandas as pd
+import streamlit as st
+from modulos.asignacion import abonado_a_mensualidades
+from modulos.incremental import Prefijo
+
+# --- SALDOS MATERIALIZADOS DE PAGOS ---
+# Totales por (lote, cliente) que se mantienen de forma incremental: "pagos"
+# normalmente solo crece por el final, así que en cada recarga se suman
+# únicamente los renglones nuevos. Si cambió el contenido de algún renglón ya
+# sumado (un pago borrado o editado a mano) se reconstruye desde cero; la
+# comparación es por huella de cada renglón (modulos/incremental.py).
+#
+# De ahí salen las vistas por lote y por cliente, con la división entre
+# enganche y mensualidades: cada peso pagado cubre primero el enganche
+# requerido del contrato y lo que sobra se abona a mensualidades. La división
+# sale del libro (modulos/asignacion.py), así que el enganche que un contrato
+# anterior al libro tiene capturado en ventas también cuenta como cubierto.
+
+_LLAVE = ["ubicacion", "cliente"]
+_AGREGADOS = {"total_pagado": "float64", "ultimo_pago": "datetime64[ns]", "num_pagos": "int64"}
+
+
+def _vacio():
+    indice = pd.MultiIndex.from_arrays([[], []], names=_LLAVE)
+    return pd.DataFrame({c: pd.Series(dtype=t) for c, t in _AGREGADOS.items()}, index=indice)
+
+
+def agregar_pagos(df_p):
+    """Totales por (ubicacion, cliente) de un bloque de pagos."""
+    if df_p.empty:
+        return _vacio()
+    return df_p.groupby(_LLAVE, observed=True, sort=False).agg(
+        total_pagado=("monto", "sum"), ultimo_pago=("fecha", "max"), num_pagos=("monto", "size"),
+    ).astype(_AGREGADOS)
+
+
+class Saldos:
+    """Acumulado de la pestaña pagos que solo procesa los renglones agregados al final (si lo anterior no cambió)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pares = _vacio()
+        self._prefijo = Prefijo(["id_pago", "fecha", "ubicacion", "cliente", "monto"])
+        self.reconstrucciones = 0
+
+    def actualizar(self, df_p):
+        """Incorpora lo nuevo de df_p y devuelve los totales por (ubicacion, cliente)."""
+        with self._lock:
+            nuevos, reconstruir = self._prefijo.nuevos(df_p)
+            if reconstruir:
+                self._pares = _vacio()
+                self.reconstrucciones += 1
+            if not nuevos.empty:
+                parcial = agregar_pagos(nuevos)
+                if self._pares.empty:
+                    self._pares = parcial
+                else:
+                    self._pares = pd.concat([self._pares, parcial]).groupby(level=_LLAVE, sort=False).agg(
+                        {"total_pagado": "sum", "ultimo_pago": "max", "num_pagos": "sum"}
+                    )
+            return self._pares
+
+
+@st.cache_resource(show_spinner=False)
+def _saldos():
+    return Saldos()
+
+
+def saldos_por_par(df_p):
+    """Totales por (ubicacion, cliente) de la versión de pagos en caché."""
+    return _saldos().actualizar(df_p).copy()
+
+
+def _con_division(pares, df_v, df_p):
+    """Agrega a_enganche / a_mensualidades (de lo que hay en pagos) según el libro de cada contrato."""
+    pares = pares.reset_index()
+    abonado = abonado_a_mensualidades(df_v, df_p).reindex(pd.MultiIndex.from_frame(pares[_LLAVE]))
+    pares["a_mensualidades"] = abonado.to_numpy(dtype="float64", na_value=0.0)
+    pares["a_enganche"] = pares["total_pagado"] - pares["a_mensualidades"]
+    return pares
+
+
+def _resumir(pares, por):
+    return pares.groupby(por, observed=True).agg(
+        total_pagado=("total_pagado", "sum"), a_enganche=("a_enganche", "sum"),
+        a_mensualidades=("a_mensualidades", "sum"), ultimo_pago=("ultimo_pago", "max"),
+        num_pagos=("num_pagos", "sum"),
+    )
+
+
+def saldos_por_lote(df_p, df_v):
+    """Índice ubicacion: total_pagado, a_enganche, a_mensualidades, ultimo_pago, num_pagos."""
+    return _resumir(_con_division(saldos_por_par(df_p), df_v, df_p), "ubicacion")
+
+
+def saldos_por_cliente(df_p, df_v):
+    """Lo mismo que saldos_por_lote, agrupado por cliente."""
+    return _resumir(_con_division(saldos_por_par(df_p), df_v, df_p), "cliente")
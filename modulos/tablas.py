@@ -0,0 +1,90 @@
+import math
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# --- TABLAS PAGINADAS ---
+# Para historiales largos. El filtro, el orden y la página se resuelven aquí
+# sobre posiciones (solo se ordena la columna elegida, no el DataFrame) y a
+# st.dataframe llega únicamente la ventana visible. Dinero y fechas se
+# formatean con column_config en el navegador, sin Styler. Es un fragmento:
+# ordenar, filtrar o cambiar de página solo vuelve a ejecutar la tabla.
+
+FILAS_POR_PAGINA = 50
+
+
+def dinero(titulo, **kwargs):
+    return st.column_config.NumberColumn(titulo, format="dollar", **kwargs)
+
+
+def fecha(titulo, **kwargs):
+    return st.column_config.DateColumn(titulo, format="DD/MM/YYYY", **kwargs)
+
+
+def entero(titulo, **kwargs):
+    return st.column_config.NumberColumn(titulo, format="%d", **kwargs)
+
+
+def _titulo(columna, config):
+    valor = config.get(columna)
+    if isinstance(valor, str):
+        return valor
+    if isinstance(valor, dict) and valor.get("label"):
+        return valor["label"]
+    return columna
+
+
+def coincide(serie, texto):
+    """Máscara de los renglones cuyo valor contiene el texto (sin distinguir mayúsculas)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories.astype(str)
+        return serie.isin(categorias[categorias.str.contains(texto, case=False, regex=False)]).to_numpy()
+    return serie.astype(str).str.contains(texto, case=False, regex=False, na=False).to_numpy()
+
+
+def ordenar(df, columna, descendente=True, mascara=None):
+    """Posiciones de df filtradas por la máscara y ordenadas por la columna (empates: lo más nuevo primero)."""
+    posiciones = np.arange(len(df))
+    if descendente:
+        posiciones = posiciones[::-1]
+    if mascara is not None:
+        posiciones = posiciones[mascara[posiciones]]
+    valores = df[columna].iloc[posiciones].reset_index(drop=True)
+    return posiciones[valores.sort_values(ascending=not descendente, kind="stable", na_position="last").index.to_numpy()]
+
+
+@st.fragment
+def tabla_paginada(df, key, column_config=None, orden=None, descendente=True, filas=FILAS_POR_PAGINA):
+    """st.dataframe con filtro, orden y paginación del lado del servidor."""
+    column_config = column_config or {}
+    columnas = list(df.columns)
+    titulos = {c: _titulo(c, column_config) for c in columnas}
+
+    c_orden, c_dir, c_col, c_txt = st.columns([2, 1, 2, 3])
+    col_orden = c_orden.selectbox("Ordenar por", columnas, index=columnas.index(orden) if orden in columnas else 0,
+                                  format_func=titulos.get, key=f"{key}_orden")
+    desc = c_dir.toggle("Descendente", value=descendente, key=f"{key}_desc")
+    col_filtro = c_col.selectbox("Filtrar columna", columnas, format_func=titulos.get, key=f"{key}_col")
+    texto = c_txt.text_input("Contiene", key=f"{key}_filtro")
+
+    posiciones = ordenar(df, col_orden, desc, coincide(df[col_filtro], texto) if texto else None)
+    total = len(posiciones)
+    paginas = max(1, math.ceil(total / filas))
+    # Si el filtro dejó menos páginas, se vuelve a la última que existe
+    if st.session_state.get(f"{key}_pagina", 1) > paginas:
+        st.session_state[f"{key}_pagina"] = paginas
+
+    inicio = 0
+    if paginas > 1:
+        c_pag, _ = st.columns([1, 4])
+        pagina = c_pag.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, step=1,
+                                    key=f"{key}_pagina")
+        inicio = (int(pagina) - 1) * filas
+
+    st.dataframe(
+        df.iloc[posiciones[inicio:inicio + filas]],
+        column_config=column_config,
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"{min(inicio + 1, total):,}–{min(inicio + filas, total):,} de {total:,} renglones")
@@ -1,166 +1,188 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
+from modulos.busqueda import elegir_contrato
+from modulos.repositorio import repositorio
+from modulos.tablas import dinero, entero, tabla_paginada
 
-def render_ventas(df_v, df_u, df_cl, df_vd, df_p, conn, URL_SHEET, fmt_moneda):
+def render_ventas(df_v, df_u, df_cl, df_vd, df_p, almacen, fmt_moneda):
     st.title("📝 Gestión de Ventas y Apartados")
+    repo = repositorio(ventas=df_v, ubicaciones=df_u, clientes=df_cl, vendedores=df_vd)
     
-    # --- BLINDAJE INICIAL DE DATOS ---
-    # Forzamos que las columnas de texto sean texto desde el inicio para evitar errores de concatenación
-    if not df_v.empty:
-        df_v["ubicacion"] = df_v["ubicacion"].astype(str).replace("nan", "")
-        df_v["cliente"] = df_v["cliente"].astype(str).replace("nan", "")
-        df_v["vendedor"] = df_v["vendedor"].astype(str).replace("nan", "")
-
     tab_nueva, tab_editar, tab_lista = st.tabs(["✨ Nueva Venta/Apartado", "✏️ Editor y Archivo", "📋 Historial"])
 
     # --- PESTAÑA 1: NUEVA VENTA ---
     with tab_nueva:
-        st.subheader("Registrar Nuevo Contrato")
-        lotes_libres = df_u[df_u["estatus"] == "Disponible"]["ubicacion"].tolist()
-        
-        if not lotes_libres:
-            st.warning("No hay lotes disponibles.")
-        else:
-            f_lote = st.selectbox("📍 Seleccione Lote", ["--"] + lotes_libres, key="nv_lote")
-            if f_lote != "--":
-                row_u = df_u[df_u["ubicacion"] == f_lote].iloc[0]
-                costo_base = float(row_u.get('precio', 0.0))
-                eng_minimo = float(row_u.get('enganche_req', 0.0))
-                
-                st.info(f"💰 **Condiciones del Lote:** \n"
-                        f"Precio Lista: {fmt_moneda(costo_base)}  \n"
-                        f"Enganche Requerido: {fmt_moneda(eng_minimo)}")
-
-                with st.form("form_nueva_venta"):
-                    c1, c2 = st.columns(2)
-                    f_fec = c1.date_input("📅 Fecha de Contrato", value=datetime.now())
-                    
-                    vendedores_list = ["-- SELECCIONAR --"] + (df_vd["nombre"].tolist() if not df_vd.empty else [])
-                    f_vende_sel = c1.selectbox("👔 Vendedor", vendedores_list)
-                    f_vende_nuevo = c2.text_input("🆕 ¿Vendedor Nuevo?")
-                    
-                    st.markdown("---")
-                    clientes_list = ["-- SELECCIONAR --"] + (df_cl["nombre"].tolist() if not df_cl.empty else [])
-                    f_cli_sel = st.selectbox("👤 Cliente", clientes_list)
-                    f_cli_nuevo = st.text_input("🆕 ¿Cliente Nuevo?")
-                    
-                    st.markdown("---")
-                    cf1, cf2, cf3 = st.columns(3)
-                    f_tot = cf1.number_input("Precio Final de Venta ($)", min_value=0.0, value=costo_base)
-                    f_pla = cf2.selectbox("🕒 Plazo (Meses)", [12, 24, 36, 48], index=0)
-                    f_comision = cf3.number_input("Comisión Pactada ($)", min_value=0.0, value=5000.0, step=100.0)
-                    
-                    f_coment = st.text_area("📝 Notas Adicionales")
-                    m_calc = (f_tot - eng_minimo) / f_pla if f_pla > 0 else 0
-                    
-                    st.write(f"📊 **Mensualidad Resultante:** {fmt_moneda(m_calc)}")
-
-                    if st.form_submit_button("💾 GENERAR CONTRATO", type="primary"):
-                        cliente_final = f_cli_nuevo if f_cli_nuevo else f_cli_sel
-                        vendedor_final = f_vende_nuevo if f_vende_nuevo else f_vende_sel
-                        
-                        if cliente_final == "-- SELECCIONAR --" or not cliente_final:
-                            st.error("❌ Indique el cliente.")
-                        elif vendedor_final == "-- SELECCIONAR --" or not vendedor_final:
-                            st.error("❌ Indique el vendedor.")
-                        else:
-                            # 1. Registro de Cliente/Vendedor
-                            if f_cli_nuevo:
-                                nid_c = int(df_cl["id_cliente"].max() + 1) if not df_cl.empty else 1001
-                                df_cl = pd.concat([df_cl, pd.DataFrame([{"id_cliente": nid_c, "nombre": str(f_cli_nuevo)}])], ignore_index=True)
-                                conn.update(spreadsheet=URL_SHEET, worksheet="clientes", data=df_cl)
-                            if f_vende_nuevo:
-                                nid_vd = int(df_vd["id_vendedor"].max() + 1) if not df_vd.empty else 501
-                                df_vd = pd.concat([df_vd, pd.DataFrame([{"id_vendedor": nid_vd, "nombre": str(f_vende_nuevo)}])], ignore_index=True)
-                                conn.update(spreadsheet=URL_SHEET, worksheet="vendedores", data=df_vd)
-
-                            # 2. Preparar nueva venta con tipos explícitos
-                            nid_vta = int(df_v["id_venta"].max() + 1) if not df_v.empty else 1
-                            nueva_v = pd.DataFrame([{
-                                "id_venta": nid_vta, 
-                                "fecha_registro": f_fec.strftime('%Y-%m-%d'),
-                                "ubicacion": str(f_lote), 
-                                "cliente": str(cliente_final), 
-                                "vendedor": str(vendedor_final), 
-                                "precio_total": float(f_tot), 
-                                "enganche_pagado": 0.0, 
-                                "enganche_requerido": float(eng_minimo),
-                                "comision_venta": float(f_comision),
-                                "plazo_meses": int(f_pla), 
-                                "mensualidad": float(m_calc), 
-                                "estatus_pago": "Pendiente",
-                                "comentarios": str(f_coment)
-                            }])
-                            
-                            # Concatenación segura
-                            df_v = pd.concat([df_v, nueva_v], ignore_index=True)
-                            df_u.loc[df_u["ubicacion"] == f_lote, "estatus"] = "Apartado"
-                            
-                            conn.update(spreadsheet=URL_SHEET, worksheet="ventas", data=df_v)
-                            conn.update(spreadsheet=URL_SHEET, worksheet="ubicaciones", data=df_u)
-                            
-                            st.success(f"✅ Contrato {nid_vta} registrado.")
-                            st.cache_data.clear(); st.rerun()
+        _nueva_venta(df_v, df_u, df_cl, df_vd, repo, almacen, fmt_moneda)
 
     # --- PESTAÑA 2: EDITOR Y ARCHIVO ---
     with tab_editar:
-        st.subheader("Modificar Contratos")
-        if df_v.empty:
-            st.info("No hay registros.")
-        else:
-            # Creamos las opciones de búsqueda usando los datos ya blindados al inicio
-            opciones_busqueda = (df_v["ubicacion"] + " | " + df_v["cliente"]).tolist()
-            edit_sel = st.selectbox("Seleccione Contrato", ["--"] + opciones_busqueda)
-            
-            if edit_sel != "--":
-                id_ubi_sel = edit_sel.split(" | ")[0]
-                idx_vta = df_v[df_v["ubicacion"] == id_ubi_sel].index[0]
-                datos_v = df_v.loc[idx_vta]
-                
-                with st.form("form_edit_vta_final"):
-                    e_tot = st.number_input("Precio Final ($)", value=float(datos_v["precio_total"]))
-                    
-                    plazos_lista = [12, 24, 36, 48]
-                    plazo_act = int(datos_v["plazo_meses"])
-                    if plazo_act not in plazos_lista: plazos_lista.append(plazo_act); plazos_lista.sort()
-                    
-                    e_pla = st.selectbox("Plazo (Meses)", plazos_lista, index=plazos_lista.index(plazo_act))
-                    e_com = st.number_input("Comisión ($)", value=float(datos_v.get("comision_venta", 5000.0)))
-                    f_motivo = st.text_input("Motivo de cancelación")
-                    
-                    c_save, c_cancel = st.columns(2)
-                    
-                    if c_save.form_submit_button("💾 GUARDAR CAMBIOS"):
-                        try:
-                            eng_req = float(datos_v["enganche_requerido"])
-                            df_v.at[idx_vta, "precio_total"] = float(e_tot)
-                            df_v.at[idx_vta, "plazo_meses"] = int(e_pla)
-                            df_v.at[idx_vta, "comision_venta"] = float(e_com)
-                            df_v.at[idx_vta, "mensualidad"] = (float(e_tot) - eng_req) / int(e_pla)
-                            
-                            conn.update(spreadsheet=URL_SHEET, worksheet="ventas", data=df_v)
-                            st.success("Cambios aplicados."); st.cache_data.clear(); st.rerun()
-                        except Exception as ex:
-                            st.error(f"Error: {ex}")
-
-                    if c_cancel.form_submit_button("❌ CANCELAR CONTRATO"):
-                        if not f_motivo: st.error("Indique motivo.")
-                        else:
-                            df_u.loc[df_u["ubicacion"] == id_ubi_sel, "estatus"] = "Disponible"
-                            df_v = df_v.drop(idx_vta)
-                            conn.update(spreadsheet=URL_SHEET, worksheet="ventas", data=df_v)
-                            conn.update(spreadsheet=URL_SHEET, worksheet="ubicaciones", data=df_u)
-                            st.success("Venta eliminada."); st.cache_data.clear(); st.rerun()
+        _editor(df_v, repo, almacen)
 
     # --- PESTAÑA 3: HISTORIAL ---
     with tab_lista:
         if not df_v.empty:
             st.subheader("📋 Resumen de Contratos")
-            df_mostrar = df_v[["id_venta", "ubicacion", "cliente", "precio_total", "mensualidad", "estatus_pago"]].copy()
-            st.dataframe(
-                df_mostrar.style.format({"precio_total": "$ {:,.2f}", "mensualidad": "$ {:,.2f}"}), 
-                use_container_width=True, 
-                hide_index=True
+            tabla_paginada(
+                df_v[["id_venta", "ubicacion", "cliente", "precio_total", "mensualidad", "estatus_pago"]],
+                key="tabla_ventas",
+                column_config={
+                    "id_venta": entero("ID"),
+                    "ubicacion": "Lote",
+                    "cliente": "Cliente",
+                    "precio_total": dinero("Precio Total"),
+                    "mensualidad": dinero("Mensualidad"),
+                    "estatus_pago": "Estatus"
+                },
+                orden="id_venta"
             )
+
+
+# Cada pestaña es un fragmento: elegir lote o contrato solo vuelve a ejecutar su pestaña
+@st.fragment
+def _nueva_venta(df_v, df_u, df_cl, df_vd, repo, almacen, fmt_moneda):
+    st.subheader("Registrar Nuevo Contrato")
+    lotes_libres = df_u[df_u["estatus"] == "Disponible"]["ubicacion"].tolist()
+
+    if not lotes_libres:
+        st.warning("No hay lotes disponibles.")
+    else:
+        f_lote = st.selectbox("📍 Seleccione Lote", ["--"] + lotes_libres, key="nv_lote")
+        if f_lote != "--":
+            row_u = repo.ubicaciones["ubicacion"].buscar(f_lote)
+            costo_base = float(row_u.get('precio', 0.0))
+            eng_minimo = float(row_u.get('enganche_req', 0.0))
+
+            st.info(f"💰 **Condiciones del Lote:** \n"
+                    f"Precio Lista: {fmt_moneda(costo_base)}  \n"
+                    f"Enganche Requerido: {fmt_moneda(eng_minimo)}")
+
+            with st.form("form_nueva_venta"):
+                c1, c2 = st.columns(2)
+                f_fec = c1.date_input("📅 Fecha de Contrato", value=datetime.now())
+
+                vendedores_list = ["-- SELECCIONAR --"] + (df_vd["nombre"].tolist() if not df_vd.empty else [])
+                f_vende_sel = c1.selectbox("👔 Vendedor", vendedores_list)
+                f_vende_nuevo = c2.text_input("🆕 ¿Vendedor Nuevo?")
+
+                st.markdown("---")
+                clientes_list = ["-- SELECCIONAR --"] + (df_cl["nombre"].tolist() if not df_cl.empty else [])
+                f_cli_sel = st.selectbox("👤 Cliente", clientes_list)
+                f_cli_nuevo = st.text_input("🆕 ¿Cliente Nuevo?")
+
+                st.markdown("---")
+                cf1, cf2, cf3 = st.columns(3)
+                f_tot = cf1.number_input("Precio Final de Venta ($)", min_value=0.0, value=costo_base)
+                f_pla = cf2.selectbox("🕒 Plazo (Meses)", [12, 24, 36, 48], index=0)
+                f_comision = cf3.number_input("Comisión Pactada ($)", min_value=0.0, value=5000.0, step=100.0)
+
+                f_coment = st.text_area("📝 Notas Adicionales")
+                m_calc = (f_tot - eng_minimo) / f_pla if f_pla > 0 else 0
+
+                st.write(f"📊 **Mensualidad Resultante:** {fmt_moneda(m_calc)}")
+
+                if st.form_submit_button("💾 GENERAR CONTRATO", type="primary"):
+                    cliente_final = f_cli_nuevo if f_cli_nuevo else f_cli_sel
+                    vendedor_final = f_vende_nuevo if f_vende_nuevo else f_vende_sel
+
+                    if cliente_final == "-- SELECCIONAR --" or not cliente_final:
+                        st.error("❌ Indique el cliente.")
+                    elif vendedor_final == "-- SELECCIONAR --" or not vendedor_final:
+                        st.error("❌ Indique el vendedor.")
+                    elif f_cli_nuevo and f_cli_nuevo in repo.clientes["nombre"]:
+                        st.error(f"❌ El cliente '{f_cli_nuevo}' ya existe, selecciónelo de la lista.")
+                    elif f_vende_nuevo and f_vende_nuevo in repo.vendedores["nombre"]:
+                        st.error(f"❌ El vendedor '{f_vende_nuevo}' ya existe, selecciónelo de la lista.")
+                    else:
+                        # Cliente, vendedor, venta y lote se confirman juntos en una sola transacción
+                        tx = almacen.transaccion()
+
+                        # 1. Registro de Cliente/Vendedor
+                        if f_cli_nuevo:
+                            nid_c = int(df_cl["id_cliente"].max() + 1) if not df_cl.empty else 1001
+                            tx.agregar("clientes", [{"id_cliente": nid_c, "nombre": str(f_cli_nuevo)}])
+                        if f_vende_nuevo:
+                            nid_vd = int(df_vd["id_vendedor"].max() + 1) if not df_vd.empty else 501
+                            tx.agregar("vendedores", [{"id_vendedor": nid_vd, "nombre": str(f_vende_nuevo)}])
+
+                        # 2. Preparar nueva venta con tipos explícitos
+                        nid_vta = int(df_v["id_venta"].max() + 1) if not df_v.empty else 1
+                        nueva_v = {
+                            "id_venta": nid_vta, 
+                            "fecha_registro": f_fec.strftime('%Y-%m-%d'),
+                            "ubicacion": str(f_lote), 
+                            "cliente": str(cliente_final), 
+                            "vendedor": str(vendedor_final), 
+                            "precio_total": float(f_tot), 
+                            "enganche_pagado": 0.0, 
+                            "enganche_requerido": float(eng_minimo),
+                            "comision_venta": float(f_comision),
+                            "plazo_meses": int(f_pla), 
+                            "mensualidad": float(m_calc), 
+                            "estatus_pago": "Pendiente",
+                            "comentarios": str(f_coment)
+                        }
+
+                        # Solo se envían el renglón nuevo y la celda de estatus del lote
+                        tx.agregar("ventas", [nueva_v])
+                        tx.actualizar("ubicaciones", "ubicacion", f_lote, {"estatus": "Apartado"})
+
+                        try:
+                            tx.confirmar()
+                        except Exception as ex:
+                            st.error(f"❌ No se generó el contrato, no se modificó nada: {ex}")
+                        else:
+                            st.success(f"✅ Contrato {nid_vta} registrado.")
+                            st.rerun()
+
+
+@st.fragment
+def _editor(df_v, repo, almacen):
+    st.subheader("Modificar Contratos")
+    if df_v.empty:
+        st.info("No hay registros.")
+    else:
+        id_ubi_sel = elegir_contrato(df_v, "Seleccione Contrato", key="sel_editar_vta")
+
+        if id_ubi_sel:
+            datos_v = repo.ventas["ubicacion"].buscar(id_ubi_sel)
+            if repo.ventas["ubicacion"].repetido(id_ubi_sel):
+                st.warning(f"⚠️ Hay más de un contrato para {id_ubi_sel}; se muestra el primero.")
+
+            with st.form("form_edit_vta_final"):
+                e_tot = st.number_input("Precio Final ($)", value=float(datos_v["precio_total"]))
+
+                plazos_lista = [12, 24, 36, 48]
+                plazo_act = int(datos_v["plazo_meses"])
+                if plazo_act not in plazos_lista: plazos_lista.append(plazo_act); plazos_lista.sort()
+
+                e_pla = st.selectbox("Plazo (Meses)", plazos_lista, index=plazos_lista.index(plazo_act))
+                e_com = st.number_input("Comisión ($)", value=float(datos_v.get("comision_venta", 5000.0)))
+                f_motivo = st.text_input("Motivo de cancelación")
+
+                c_save, c_cancel = st.columns(2)
+
+                if c_save.form_submit_button("💾 GUARDAR CAMBIOS"):
+                    try:
+                        eng_req = float(datos_v["enganche_requerido"])
+                        almacen.actualizar("ventas", "id_venta", datos_v["id_venta"], {
+                            "precio_total": float(e_tot),
+                            "plazo_meses": int(e_pla),
+                            "comision_venta": float(e_com),
+                            "mensualidad": (float(e_tot) - eng_req) / int(e_pla)
+                        })
+                        st.success("Cambios aplicados."); st.rerun()
+                    except Exception as ex:
+                        st.error(f"Error: {ex}")
+
+                if c_cancel.form_submit_button("❌ CANCELAR CONTRATO"):
+                    if not f_motivo: st.error("Indique motivo.")
+                    else:
+                        tx = almacen.transaccion()
+                        tx.eliminar("ventas", "id_venta", datos_v["id_venta"])
+                        tx.actualizar("ubicaciones", "ubicacion", id_ubi_sel, {"estatus": "Disponible"})
+                        try:
+                            tx.confirmar()
+                        except Exception as ex:
+                            st.error(f"❌ No se canceló el contrato: {ex}")
+                        else:
+                            st.success("Venta eliminada."); st.rerun()
@@ -0,0 +1,105 @@
+import threading
+import weakref
+from collections import OrderedDict
+import pandas as pd
+import streamlit as st
+from modulos import datos
+
+# --- CACHÉ DE VISTAS DERIVADAS ---
+# Las tablas que una página arma a partir de las pestañas (cartera con mora y
+# enlaces, resumen de comisiones, plan de un contrato) se guardan con una llave
+# hecha de la huella de sus entradas. Un frame tal como lo sirvió cargar_datos
+# se identifica por su pestaña y versión (sin recorrerlo); cualquier otra
+# entrada, por renglones, id máximo y un hash del contenido. Si las entradas no
+# cambiaron, la vista sale de un diccionario en lugar de recalcularse. Es un
+# LRU acotado: al pasar de MAX_VISTAS se descarta la que lleva más tiempo sin
+# usarse.
+#
+# La huella de un mismo objeto se calcula una sola vez: los fragmentos vuelven
+# a recibir los mismos DataFrames en cada interacción, así que ahí la consulta
+# no cuesta ni el hash.
+#
+# Lo que regresa vista() es compartido: quien lo quiera modificar debe copiarlo.
+
+MAX_VISTAS = 32
+
+
+def _columna_id(df):
+    if isinstance(df, pd.DataFrame):
+        return next((c for c in df.columns if str(c).startswith("id_")), None)
+    return None
+
+
+def calcular_huella(obj):
+    """(pestana, version) de un frame cargado; si no, (renglones, columnas, id máximo, hash del contenido)."""
+    if not isinstance(obj, (pd.DataFrame, pd.Series)):
+        return obj
+    sello = datos.marca(obj)
+    if sello is not None:
+        return sello
+    columna = _columna_id(obj)
+    id_max = None
+    if columna is not None and len(obj):
+        id_max = str(obj[columna].astype(str).max())
+    columnas = tuple(map(str, obj.columns)) if isinstance(obj, pd.DataFrame) else (str(obj.name),)
+    contenido = int(pd.util.hash_pandas_object(obj, index=True).sum()) if len(obj) else 0
+    return len(obj), columnas, id_max, contenido
+
+
+class Vistas:
+    """LRU acotado de vistas derivadas, con la huella de cada entrada memorizada por objeto."""
+
+    def __init__(self, maximo=MAX_VISTAS):
+        self._lock = threading.Lock()
+        self._vistas = OrderedDict()
+        self._huellas = {}     # id(objeto) -> (referencia débil, huella)
+        self.maximo = maximo
+        self.aciertos = 0
+        self.fallos = 0
+
+    def huella(self, obj):
+        if not isinstance(obj, (pd.DataFrame, pd.Series)):
+            return obj
+        clave = id(obj)
+        with self._lock:
+            guardada = self._huellas.get(clave)
+            if guardada is not None and guardada[0]() is obj:
+                return guardada[1]
+        huella = calcular_huella(obj)
+        with self._lock:
+            self._huellas[clave] = (weakref.ref(obj, lambda _, c=clave: self._huellas.pop(c, None)), huella)
+        return huella
+
+    def obtener(self, nombre, funcion, entradas, params):
+        llave = (nombre, tuple(self.huella(e) for e in entradas),
+                 tuple(sorted((k, v) for k, v in params.items() if not k.startswith("_"))))
+        with self._lock:
+            if llave in self._vistas:
+                self._vistas.move_to_end(llave)
+                self.aciertos += 1
+                return self._vistas[llave]
+        resultado = funcion(*entradas, **params)
+        with self._lock:
+            self.fallos += 1
+            self._vistas[llave] = resultado
+            self._vistas.move_to_end(llave)
+            while len(self._vistas) > self.maximo:
+                self._vistas.popitem(last=False)
+        return resultado
+
+    def __len__(self):
+        return len(self._vistas)
+
+
+@st.cache_resource(show_spinner=False)
+def _vistas():
+    return Vistas()
+
+
+def vista(nombre, funcion, *entradas, **params):
+    """funcion(*entradas, **params), recalculada solo si cambia la huella de las entradas o los params.
+
+    Los params cuyo nombre empieza con "_" se pasan a la función pero no entran
+    en la llave (igual que en st.cache_data), p. ej. un formateador.
+    """
+    return _vistas().obtener(nombre, funcion, entradas, params)
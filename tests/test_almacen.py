@@ -0,0 +1,228 @@
+import sqlite3
+import pandas as pd
+import pytest
+from gspread.utils import a1_to_rowcol
+from modulos import cuota
+from modulos.almacen import Almacen, AlmacenEspejo, AlmacenGSheets, AlmacenLocal, aplicar_en_df
+
+
+def _ubicaciones():
+    # "M01-L02" repetida, como las que advierte el repositorio
+    return pd.DataFrame({"ubicacion": ["M01-L01", "M01-L02", "M01-L02"], "precio": [100.0, 200.0, 300.0]})
+
+
+def test_llave_repetida_solo_toca_el_primer_renglon(tmp_path):
+    almacen = AlmacenLocal(str(tmp_path / "prueba.db"))
+    almacen.escribir("ubicaciones", _ubicaciones())
+    operaciones = [("actualizar", "ubicaciones", "ubicacion", "M01-L02", {"precio": 250.0}),
+                   ("eliminar", "ubicaciones", "ubicacion", "M01-L02")]
+    almacen.aplicar(operaciones[:1])
+    almacen.aplicar(operaciones[1:])
+
+    esperado = _ubicaciones()
+    for op in operaciones:
+        esperado = aplicar_en_df(esperado, op)
+    assert almacen.leer("ubicaciones").to_dict("records") == esperado.to_dict("records")
+    assert almacen.leer("ubicaciones")["precio"].tolist() == [100.0, 300.0]
+
+
+# --- Motor genérico, Google Sheets (cliente falso) y espejo ---
+
+class AlmacenMemoria(Almacen):
+    """Motor mínimo con la versión genérica de aplicar(); `falla` es una pestaña que no se puede escribir."""
+
+    def __init__(self, tablas, falla=None):
+        super().__init__()
+        self.tablas = dict(tablas)
+        self.falla = falla
+
+    def leer(self, pestana):
+        return self.tablas.get(pestana, pd.DataFrame())
+
+    def _reemplazar(self, pestana, df):
+        if pestana == self.falla:
+            raise IOError(f"No se pudo escribir '{pestana}'")
+        self.tablas[pestana] = df
+
+
+class HojaFalsa:
+    def __init__(self, titulo, id_hoja, columnas):
+        self.title, self.id, self.col_count = titulo, id_hoja, columnas
+
+
+class LibroFalso:
+    """Lo que AlmacenGSheets usa de gspread: worksheets, values_batch_get y batch_update."""
+
+    def __init__(self, tablas):
+        self.tablas = tablas
+        self.lotes = []
+
+    def worksheets(self):
+        return [HojaFalsa(p, i, len(df.columns) + 5) for i, (p, df) in enumerate(self.tablas.items())]
+
+    def values_batch_get(self, rangos, params=None):
+        respuesta = []
+        for rango in rangos:
+            pestana, celdas = rango.rsplit("!", 1)
+            df = self.tablas[pestana.strip("'")]
+            if celdas == "1:1":
+                respuesta.append({"values": [list(df.columns)]})
+            else:
+                columna = df.columns[a1_to_rowcol(celdas.split(":")[0] + "1")[1] - 1]
+                respuesta.append({"values": [[columna] + df[columna].tolist()]})
+        return {"valueRanges": respuesta}
+
+    def batch_update(self, cuerpo):
+        self.lotes.append(cuerpo["requests"])
+
+
+class ConexionFalsa:
+    def __init__(self, libro):
+        self.client = type("Cliente", (), {"_open_spreadsheet": lambda _, spreadsheet: libro})()
+
+
+def _gsheets(tablas):
+    libro = LibroFalso(tablas)
+    planificador = cuota.Planificador(por_minuto=6000, reintentos=0, espera_base=0.0, espera_max=0.0)
+    return AlmacenGSheets(ConexionFalsa(libro), "url", planificador=planificador), libro
+
+
+def _ventas():
+    return pd.DataFrame({"id_venta": [1, 2, 3], "ubicacion": ["L1", "L2", "L3"], "estatus_pago": ["Activo"] * 3})
+
+
+def test_operaciones_por_renglon_en_sqlite(tmp_path):
+    almacen = AlmacenLocal(str(tmp_path / "prueba.db"))
+    almacen.escribir("ventas", _ventas())
+    almacen.agregar("ventas", [{"id_venta": 4, "ubicacion": "L4", "estatus_pago": "Pendiente"}])
+    almacen.actualizar("ventas", "id_venta", "2", {"estatus_pago": "Cancelado", "comentarios": "baja"})
+    almacen.eliminar("ventas", "id_venta", 1.0)
+
+    df = almacen.leer("ventas")
+    assert df["id_venta"].tolist() == [2, 3, 4]
+    assert df["estatus_pago"].tolist() == ["Cancelado", "Activo", "Pendiente"]
+    assert df["comentarios"].iloc[0] == "baja" and df["comentarios"].iloc[1:].isna().all()
+    with pytest.raises(KeyError):
+        almacen.eliminar("ventas", "id_venta", 99)
+
+
+def test_gsheets_un_lote_con_actualizaciones_borrados_de_abajo_hacia_arriba_y_altas():
+    almacen, libro = _gsheets({"ventas": _ventas(), "pagos": pd.DataFrame({"id_pago": [1], "monto": [10.0]})})
+    almacen.aplicar([
+        ("agregar", "pagos", [{"id_pago": 2, "monto": 20.0}]),
+        ("eliminar", "ventas", "id_venta", 1),
+        ("actualizar", "ventas", "id_venta", 2, {"estatus_pago": "Cancelado"}),
+        ("eliminar", "ventas", "id_venta", 3),
+    ])
+
+    assert len(libro.lotes) == 1
+    requisitos = libro.lotes[0]
+    assert [next(iter(r)) for r in requisitos] == ["updateCells", "deleteDimension", "deleteDimension", "appendCells"]
+    actualizacion = requisitos[0]["updateCells"]
+    assert actualizacion["start"] == {"sheetId": 0, "rowIndex": 2, "columnIndex": 2}
+    assert actualizacion["rows"] == [{"values": [{"userEnteredValue": {"stringValue": "Cancelado"}}]}]
+    assert [r["deleteDimension"]["range"]["startIndex"] for r in requisitos[1:3]] == [3, 1]
+    assert requisitos[3]["appendCells"]["sheetId"] == 1
+    assert requisitos[3]["appendCells"]["rows"] == [{"values": [{"userEnteredValue": {"numberValue": 2}},
+                                                                {"userEnteredValue": {"numberValue": 20.0}}]}]
+
+
+def test_gsheets_llave_inexistente_no_envia_nada():
+    almacen, libro = _gsheets({"ventas": _ventas()})
+    with pytest.raises(KeyError):
+        almacen.aplicar([("actualizar", "ventas", "id_venta", 1, {"estatus_pago": "Cancelado"}),
+                         ("eliminar", "ventas", "id_venta", 99)])
+    assert libro.lotes == []
+
+
+def test_generico_restaura_lo_escrito_si_falla_otra_pestana():
+    ventas, pagos = _ventas(), pd.DataFrame({"id_pago": [1], "monto": [10.0]})
+    almacen = AlmacenMemoria({"ventas": ventas, "pagos": pagos}, falla="pagos")
+    with pytest.raises(IOError):
+        almacen.aplicar([("actualizar", "ventas", "id_venta", 1, {"estatus_pago": "Cancelado"}),
+                         ("agregar", "pagos", [{"id_pago": 2, "monto": 20.0}])])
+    pd.testing.assert_frame_equal(almacen.tablas["ventas"], ventas)
+    pd.testing.assert_frame_equal(almacen.tablas["pagos"], pagos)
+
+
+def test_espejo_vuelve_a_copiar_si_falla_la_copia_local(tmp_path, monkeypatch):
+    remoto, local = AlmacenLocal(str(tmp_path / "nube.db")), AlmacenLocal(str(tmp_path / "copia.db"))
+    remoto.escribir("ventas", _ventas())
+    local.escribir("ventas", _ventas())
+    espejo = AlmacenEspejo(remoto, local)
+
+    def falla(operaciones):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(local, "aplicar", falla)
+    espejo.actualizar("ventas", "id_venta", 2, {"estatus_pago": "Cancelado"})
+
+    assert remoto.leer("ventas")["estatus_pago"].tolist() == ["Activo", "Cancelado", "Activo"]
+    pd.testing.assert_frame_equal(local.leer("ventas"), remoto.leer("ventas"))
+    assert espejo.sincronizado("ventas") is not None
+
+
+def test_espejo_no_toca_la_copia_si_falla_la_nube(tmp_path):
+    remoto, local = AlmacenLocal(str(tmp_path / "nube.db")), AlmacenLocal(str(tmp_path / "copia.db"))
+    remoto.escribir("ventas", _ventas())
+    local.escribir("ventas", _ventas())
+    with pytest.raises(KeyError):
+        AlmacenEspejo(remoto, local).eliminar("ventas", "id_venta", 99)
+    pd.testing.assert_frame_equal(local.leer("ventas"), _ventas())
+
+
+# --- Unidad de trabajo ---
+
+def _pagos():
+    return pd.DataFrame({"id_pago": [1], "ubicacion": ["L1"], "monto": [10.0]})
+
+
+def test_transaccion_a_medias_se_revierte_en_sqlite(tmp_path):
+    almacen = AlmacenLocal(str(tmp_path / "prueba.db"))
+    almacen.escribir("ventas", _ventas())
+    almacen.escribir("pagos", _pagos())
+    avisos = []
+    almacen.suscribir(avisos.append)
+
+    with pytest.raises(KeyError):
+        with almacen.transaccion() as tx:
+            tx.agregar("pagos", [{"id_pago": 2, "ubicacion": "L2", "monto": 20.0}])
+            tx.actualizar("ventas", "id_venta", 2, {"estatus_pago": "Cancelado", "comentarios": "baja"})
+            tx.eliminar("ventas", "id_venta", 99)     # falla la tercera operación
+
+    pd.testing.assert_frame_equal(almacen.leer("ventas"), _ventas())
+    pd.testing.assert_frame_equal(almacen.leer("pagos"), _pagos())
+    assert avisos == []
+
+
+def test_transaccion_a_medias_restaura_las_pestanas_en_el_motor_generico():
+    almacen = AlmacenMemoria({"ventas": _ventas(), "pagos": _pagos()}, falla="pagos")
+    with pytest.raises(IOError):
+        with almacen.transaccion() as tx:
+            tx.actualizar("ventas", "id_venta", 1, {"estatus_pago": "Cancelado"})
+            tx.agregar("pagos", [{"id_pago": 2, "ubicacion": "L2", "monto": 20.0}])
+    pd.testing.assert_frame_equal(almacen.tablas["ventas"], _ventas())
+    pd.testing.assert_frame_equal(almacen.tablas["pagos"], _pagos())
+
+
+def test_error_dentro_del_bloque_no_envia_nada(tmp_path):
+    almacen = AlmacenLocal(str(tmp_path / "prueba.db"))
+    almacen.escribir("ventas", _ventas())
+    with pytest.raises(ValueError):
+        with almacen.transaccion() as tx:
+            tx.actualizar("ventas", "id_venta", 1, {"estatus_pago": "Cancelado"})
+            raise ValueError("captura inválida")
+    pd.testing.assert_frame_equal(almacen.leer("ventas"), _ventas())
+
+
+def test_transaccion_confirma_todo_junto(tmp_path):
+    almacen = AlmacenLocal(str(tmp_path / "prueba.db"))
+    almacen.escribir("ventas", _ventas())
+    almacen.escribir("pagos", _pagos())
+    avisos = []
+    almacen.suscribir(avisos.append)
+    with almacen.transaccion() as tx:
+        tx.agregar("pagos", [{"id_pago": 2, "ubicacion": "L2", "monto": 20.0}])
+        tx.actualizar("ventas", "id_venta", 2, {"estatus_pago": "Cancelado"})
+    assert almacen.leer("pagos")["id_pago"].tolist() == [1, 2]
+    assert almacen.leer("ventas")["estatus_pago"].tolist() == ["Activo", "Cancelado", "Activo"]
+    assert avisos == [["pagos", "ventas"]]
@@ -0,0 +1,66 @@
+import pandas as pd
+from modulos.amortizacion import calendario, calendario_cartera, plan_de
+
+
+def _ventas():
+    return pd.DataFrame({
+        "id_venta": [1], "ubicacion": ["L1"], "cliente": ["Ana"], "precio_total": [100000.0],
+        "enganche_requerido": [10000.0], "enganche_pagado": [10000.0], "estatus_pago": ["Activo"],
+        "fecha_contrato": pd.to_datetime(["2025-01-15"]), "inicio_mensualidades": pd.to_datetime(["2025-02-15"]),
+        "mensualidad": [2500.0], "plazo_meses": [36],
+    })
+
+
+def _pagos(*montos):
+    return pd.DataFrame({
+        "id_pago": range(1, len(montos) + 1), "fecha": pd.to_datetime([f"2025-0{i + 2}-15" for i in range(len(montos))]),
+        "ubicacion": "L1", "cliente": "Ana", "monto": list(montos),
+    })
+
+
+def test_contrato_anterior_al_libro_abona_sus_pagos_a_cuotas():
+    # Enganche capturado solo en ventas: los tres pagos son mensualidades, igual que en el libro
+    plan = plan_de(calendario_cartera(_ventas(), _pagos(2000.0, 2000.0, 2000.0)), 1)
+    assert plan["abonado"].sum() == 6000.0
+    assert list(plan["estatus"].iloc[:4]) == ["Pagado", "Pagado", "Parcial", "Pendiente"]
+
+
+def _plan_por_renglon(contrato, bolsa):
+    """El ciclo con el que Detalle de Crédito armaba el plan de un contrato."""
+    saldo = contrato["precio_total"] - contrato["enganche_requerido"]
+    mensualidad = contrato["mensualidad"]
+    filas = []
+    for i in range(1, contrato["plazo_meses"] + 1):
+        if bolsa >= mensualidad:
+            estatus, abonado, bolsa = "Pagado", mensualidad, bolsa - mensualidad
+        elif bolsa > 0:
+            estatus, abonado, bolsa = "Parcial", bolsa, 0
+        else:
+            estatus, abonado = "Pendiente", 0.0
+        saldo = max(0.0, saldo - mensualidad)
+        filas.append({"id_venta": contrato["id_venta"], "ubicacion": contrato["ubicacion"],
+                      "cliente": contrato["cliente"], "cuota": i,
+                      "fecha": contrato["inicio_mensualidades"] + pd.DateOffset(months=i - 1),
+                      "monto": mensualidad, "abonado": abonado, "estatus": estatus, "saldo": saldo})
+    return filas
+
+
+def test_calendario_igual_al_ciclo_por_contrato():
+    contratos = pd.DataFrame({
+        "id_venta": [1, 2, 3, 4],
+        "ubicacion": ["L1", "L2", "L3", "L4"],
+        "cliente": ["Adelantado", "Atrasado", "Sin plazo", "Fin de mes"],
+        "inicio_mensualidades": pd.to_datetime(["2024-03-10", "2024-06-01", "2024-01-01", "2024-01-31"]),
+        "mensualidad": [1000.0, 1500.0, 800.0, 700.0],
+        "plazo_meses": [12, 24, 0, 6],
+        "precio_total": [20000.0, 50000.0, 9000.0, 5000.0],
+        "enganche_requerido": [8000.0, 14000.0, 1000.0, 1000.0],
+    })
+    abonado = [9000.0, 4000.0, 500.0, 0.0]   # nueve cuotas por adelantado; dos y una parcial; nada
+
+    esperado = pd.DataFrame([f for (_, c), b in zip(contratos.iterrows(), abonado) for f in _plan_por_renglon(c, b)])
+    plan = calendario(contratos, abonado)
+    pd.testing.assert_frame_equal(plan.assign(estatus=plan["estatus"].astype(str)), esperado,
+                                  check_dtype=False)
+    assert plan.groupby("id_venta")["abonado"].sum().tolist() == [9000.0, 4000.0, 0.0]
+    assert calendario(contratos.iloc[[2]], [500.0]).empty
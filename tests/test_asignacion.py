@@ -0,0 +1,98 @@
+import pandas as pd
+from modulos.asignacion import Libro, aperturas, campos_venta, cambios_venta, simular_contrato
+
+
+def _venta(**campos):
+    venta = {"id_venta": 1, "ubicacion": "L1", "cliente": "Ana", "enganche_requerido": 10000.0,
+             "enganche_pagado": 0.0, "estatus_pago": "Pendiente", "fecha_contrato": pd.NaT,
+             "inicio_mensualidades": pd.NaT, "mensualidad": 7500.0}
+    venta.update(campos)
+    df = pd.DataFrame([venta])
+    for col in ["fecha_contrato", "inicio_mensualidades"]:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def _pagos(*filas):
+    df = pd.DataFrame([{"id_pago": i, "fecha": f, "ubicacion": "L1", "cliente": "Ana", "monto": m}
+                       for i, (f, m) in enumerate(filas, start=1)],
+                      columns=["id_pago", "fecha", "ubicacion", "cliente", "monto"])
+    df["fecha"] = pd.to_datetime(df["fecha"])
+    df["monto"] = df["monto"].astype("float64")
+    return df
+
+
+def _legado(**campos):
+    # Contrato capturado antes del libro: enganche y fechas solo en ventas
+    return _venta(enganche_pagado=10000.0, estatus_pago="Activo", fecha_contrato="2025-01-15",
+                  inicio_mensualidades="2025-02-15", **campos)
+
+
+def _pago_nuevo(monto, fecha="2026-10-18", id_pago=99):
+    return {"id_pago": id_pago, "fecha": fecha, "ubicacion": "L1", "cliente": "Ana", "monto": monto}
+
+
+def test_contrato_sin_pagos_de_enganche_sigue_activo():
+    df_v, df_p = _legado(), _pagos()
+    estado = Libro().actualizar(df_v, df_p).loc[("L1", "Ana")]
+    campos = campos_venta(estado, 10000.0)
+    assert campos["estatus_pago"] == "Activo"
+    assert campos["enganche_pagado"] == 10000.0
+    assert campos["fecha_contrato"] == pd.Timestamp("2025-01-15")
+
+
+def test_mensualidad_en_contrato_anterior_no_reescribe_fechas():
+    df_v, df_p = _legado(), _pagos()
+    nuevo = simular_contrato(df_p, df_v, "L1", "Ana", agregar=_pago_nuevo(7500.0))
+    assert nuevo["total_pagado"] == 17500.0
+    assert nuevo["fecha_enganche"] == pd.Timestamp("2025-01-15")
+    assert cambios_venta(df_v.iloc[0], nuevo) == {}
+
+
+def test_mensualidades_anteriores_no_cuentan_como_enganche():
+    df_v = _legado()
+    df_p = _pagos(("2025-02-15", 7500.0), ("2025-03-15", 7500.0))
+    assert aperturas(df_v, df_p).loc[("L1", "Ana"), "total_pagado"] == 10000.0
+    estado = Libro().actualizar(df_v, df_p).loc[("L1", "Ana")]
+    assert estado["total_pagado"] == 25000.0
+    assert estado["fecha_enganche"] == pd.Timestamp("2025-01-15")
+
+
+def test_enganche_respaldado_por_pagos_no_genera_apertura():
+    df_v = _venta(enganche_pagado=10000.0, estatus_pago="Activo", fecha_contrato="2025-03-01",
+                  inicio_mensualidades="2025-04-01")
+    df_p = _pagos(("2025-02-01", 4000.0), ("2025-03-01", 6000.0), ("2025-04-01", 7500.0))
+    assert aperturas(df_v, df_p).empty
+    estado = Libro().actualizar(df_v, df_p).loc[("L1", "Ana")]
+    assert estado["fecha_enganche"] == pd.Timestamp("2025-03-01")
+    assert cambios_venta(df_v.iloc[0], estado) == {}
+
+
+def test_apartado_anterior_se_completa_con_el_libro():
+    df_v, df_p = _venta(enganche_pagado=4000.0), _pagos()
+    nuevo = simular_contrato(df_p, df_v, "L1", "Ana", agregar=_pago_nuevo(6000.0))
+    cambios = cambios_venta(df_v.iloc[0], nuevo)
+    assert cambios["estatus_pago"] == "Activo"
+    assert cambios["enganche_pagado"] == 10000.0
+    assert cambios["fecha_contrato"] == pd.Timestamp("2026-10-18")
+    assert cambios["inicio_mensualidades"] == pd.Timestamp("2026-11-18")
+
+
+def test_activo_solo_regresa_a_pendiente_al_revertir():
+    df_v = _venta(enganche_pagado=10000.0, estatus_pago="Activo", fecha_contrato="2025-03-01",
+                  inicio_mensualidades="2025-04-01")
+    df_p = _pagos(("2025-02-01", 4000.0), ("2025-03-01", 6000.0))
+    sin_pago = simular_contrato(df_p, df_v, "L1", "Ana", quitar=2)
+    assert cambios_venta(df_v.iloc[0], sin_pago) == {}
+    cambios = cambios_venta(df_v.iloc[0], sin_pago, revertir=True)
+    assert cambios["estatus_pago"] == "Pendiente"
+    assert cambios["enganche_pagado"] == 4000.0
+
+
+def test_libro_incremental_igual_a_completo_con_aperturas():
+    libro = Libro()
+    df_p = _pagos(("2025-02-15", 7500.0))
+    libro.actualizar(_venta(enganche_pagado=4000.0), df_p)
+    df_v = _legado()
+    df_p = _pagos(("2025-02-15", 7500.0), ("2025-03-15", 7500.0))
+    pd.testing.assert_frame_equal(libro.actualizar(df_v, df_p), Libro().actualizar(df_v, df_p))
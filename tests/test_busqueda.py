@@ -0,0 +1,43 @@
+from modulos.busqueda import RESULTADOS, IndiceBusqueda, doblar
+
+
+def _indice():
+    return IndiceBusqueda(["M01-L01 José Peña", "M01-L02 Ana María Núñez", "M02-L10 Mariana Ortiz",
+                           "M03-L04 Juan Pérez", "M03-L05 Peñafiel Construcciones"])
+
+
+def test_doblar_quita_acentos_mayusculas_y_espacios():
+    assert doblar("  JOSÉ   Peña Núñez ") == "jose pena nunez"
+    assert doblar(7) == "7"
+
+
+def test_sin_acentos_encuentra_con_acentos_y_al_reves():
+    indice = _indice()
+    assert indice.buscar("pena") == [4, 0]
+    assert indice.buscar("PEÑA") == [4, 0]
+    assert indice.buscar("nunez") == [1]
+
+
+def test_prefijo_corto_y_trigramas_dentro_de_la_palabra():
+    indice = _indice()
+    assert indice.buscar("ma") == [2, 1]              # menos de 3 letras: prefijo de palabra
+    assert sorted(indice.buscar("aria")) == [1, 2]    # dentro de "maria" y "mariana"
+    assert indice.buscar("l0") == []                  # no es inicio de ninguna palabra
+    assert indice.buscar("l04") == [3]
+
+
+def test_todas_las_palabras_deben_coincidir_y_se_ordenan_por_inicio_posicion_y_largo():
+    indice = _indice()
+    assert indice.buscar("m03 pe") == [3, 4]
+    assert indice.buscar("pena juan") == []
+    assert indice.buscar("ana") == [1, 2]             # inicio de palabra en 1, dentro de "mariana" en 2
+    assert indice.buscar("mari") == [2, 1]            # las dos al inicio de palabra: gana la más temprana
+    assert IndiceBusqueda(["Lote 12 B", "Lote 12"]).buscar("lote 12") == [1, 0]   # empate: el más corto
+
+
+def test_resultados_acotados_salvo_con_k_none():
+    indice = IndiceBusqueda([f"M{n:03d} Cliente {n}" for n in range(RESULTADOS * 3)])
+    assert len(indice.buscar("")) == RESULTADOS
+    assert len(indice.buscar("cliente")) == RESULTADOS
+    assert len(indice.buscar("cliente", k=None)) == RESULTADOS * 3
+    assert len(indice.buscar("cliente 1", k=3)) == 3
@@ -0,0 +1,61 @@
+import pytest
+from modulos import cuota
+
+
+class ErrorApi(Exception):
+    def __init__(self, codigo):
+        super().__init__(f"APIError: [{codigo}]")
+        self.response = type("Respuesta", (), {"status_code": codigo})()
+
+
+def _planificador():
+    return cuota.Planificador(por_minuto=6000, reintentos=3, espera_base=0.0, espera_max=0.0)
+
+
+def _falla_una_vez(codigo):
+    llamadas = []
+
+    def funcion():
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            raise ErrorApi(codigo)
+        return "ok"
+    return funcion, llamadas
+
+
+def test_escritura_con_5xx_no_se_repite():
+    funcion, llamadas = _falla_una_vez(503)
+    with pytest.raises(ErrorApi):
+        _planificador().ejecutar(funcion, prioridad=cuota.ESCRITURA)
+    assert len(llamadas) == 1
+
+
+def test_escritura_con_429_se_reintenta():
+    funcion, llamadas = _falla_una_vez(429)
+    assert _planificador().ejecutar(funcion, prioridad=cuota.ESCRITURA) == "ok"
+    assert len(llamadas) == 2
+
+
+def test_lectura_con_5xx_se_reintenta():
+    funcion, llamadas = _falla_una_vez(502)
+    assert _planificador().ejecutar(funcion, prioridad=cuota.LECTURA) == "ok"
+    assert len(llamadas) == 2
+
+
+def test_error_de_cuota_por_codigo_no_por_texto():
+    assert cuota.es_error_de_cuota(ErrorApi(429))
+    assert cuota.es_error_de_cuota(type("ErrorHttp", (Exception,), {"status_code": 429})())
+    assert cuota.es_error_de_cuota(Exception("RESOURCE_EXHAUSTED: Quota exceeded for quota metric"))
+    assert not cuota.es_error_de_cuota(ValueError("No existe id_pago=4290 en 'pagos'"))
+    assert not cuota.es_error_de_cuota(ErrorApi(500))
+
+
+def test_escritura_con_429_en_el_texto_no_se_reintenta():
+    llamadas = []
+
+    def funcion():
+        llamadas.append(1)
+        raise KeyError("No existe id_venta=429 en 'ventas'")
+    with pytest.raises(KeyError):
+        _planificador().ejecutar(funcion, prioridad=cuota.ESCRITURA)
+    assert len(llamadas) == 1
@@ -0,0 +1,53 @@
+import pandas as pd
+from modulos import datos, instantaneas
+from modulos.almacen import AlmacenEspejo, AlmacenLocal
+from modulos.busqueda import indice
+
+
+def _ventas(n):
+    return pd.DataFrame({"id_venta": range(1, n + 1), "ubicacion": [f"M01-L{i:02d}" for i in range(1, n + 1)],
+                         "cliente": [f"Cliente {i}" for i in range(1, n + 1)]})
+
+
+def test_lo_derivado_usa_la_version_del_frame_recibido(tmp_path, monkeypatch):
+    monkeypatch.setattr(instantaneas, "DIRECTORIO", str(tmp_path / "instantaneas"))
+    almacen = AlmacenLocal(str(tmp_path / "prueba.db"))
+    almacen.escribir("ventas", _ventas(3))
+    datos.configurar(almacen)
+    datos.invalidar()
+
+    anterior = datos.cargar_datos("ventas")
+    almacen.escribir("ventas", _ventas(1))   # otra sesión guarda y recarga
+    actual = datos.cargar_datos("ventas")
+    assert datos.version("ventas", anterior) != datos.version("ventas", actual)
+
+    # Un fragmento que se vuelve a ejecutar con el frame anterior no recibe el índice del actual
+    assert len(indice("ventas", actual, ["ubicacion", "cliente"]).buscar("", k=None)) == 1
+    assert len(indice("ventas", anterior, ["ubicacion", "cliente"]).buscar("", k=None)) == 3
+
+
+def test_frame_filtrado_o_sin_marca_se_identifica_por_contenido():
+    df = _ventas(3)
+    assert datos.version("ventas", df) == datos.version("ventas", _ventas(3))
+    assert datos.version("ventas", df) != datos.version("ventas", _ventas(2))
+    df.attrs["vallemart_version"] = ("ventas", 7, 3, tuple(df.columns))
+    assert datos.version("ventas", df) == 7
+    assert datos.version("ventas", df.iloc[:1]) != 7
+    assert datos.version("ventas", df.assign(extra=1)) != 7
+
+
+def test_espejo_reporta_la_ultima_sincronizacion(tmp_path, monkeypatch):
+    monkeypatch.setattr(instantaneas, "DIRECTORIO", str(tmp_path / "instantaneas"))
+    remoto, local = AlmacenLocal(str(tmp_path / "nube.db")), AlmacenLocal(str(tmp_path / "copia.db"))
+    local.escribir("ventas", _ventas(2))            # copia de una sesión anterior
+    espejo = AlmacenEspejo(remoto, local)
+    datos.configurar(espejo)
+    datos.invalidar()
+
+    datos.cargar_datos("ventas")
+    assert datos.edades()["ventas"] is None         # la copia local no dice qué tan vieja es
+
+    remoto.escribir("ventas", _ventas(4))
+    df, fecha, _ = datos._descargar("ventas", fresco=True)   # lo que hace el refrescador
+    assert len(df) == 4 and fecha is not None
+    assert len(local.leer("ventas")) == 4
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from modulos import esquema
+from modulos.auditoria import agregar_invalidos, problemas
+
+
+def _pagos(montos):
+    return pd.DataFrame({"id_pago": range(1, len(montos) + 1), "monto": montos})
+
+
+def test_dinero_ilegible_queda_nan_y_vacio_en_cero():
+    df = esquema.coercionar("pagos", _pagos(["1500", "", None, "mil pesos", 250.5]))
+    assert df["monto"].tolist()[:3] == [1500.0, 0.0, 0.0]
+    assert np.isnan(df["monto"].iloc[3])
+    assert df["monto"].iloc[4] == 250.5
+
+
+def test_la_auditoria_reporta_lo_ilegible_de_la_pestana_completa():
+    crudo = _pagos(["1500"] * 60 + ["mil pesos"])
+    reporte = {"pagos": {"existe": True, "faltantes": [], "sobrantes": [], "tipos": {}, "error": None}}
+    completo = agregar_invalidos(reporte, {"pagos": esquema.invalidos("pagos", crudo)})
+    assert completo["pagos"]["tipos"] == {"monto": ["mil pesos"]}
+    assert problemas(completo) == 1
+    assert reporte["pagos"]["tipos"] == {}   # el reporte original (en caché) no se modifica
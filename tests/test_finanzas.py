@@ -0,0 +1,77 @@
+import pandas as pd
+from modulos.finanzas import Acumulado
+
+
+def _ventas(enganche_pagado=(0.0, 0.0), estatus=("Pendiente", "Pendiente"), fecha_contrato=(None, None)):
+    return pd.DataFrame({"ubicacion": ["L1", "L2"], "cliente": ["Ana", "Beto"],
+                         "enganche_requerido": [1000.0, 500.0], "enganche_pagado": list(enganche_pagado),
+                         "estatus_pago": list(estatus), "fecha_contrato": pd.to_datetime(list(fecha_contrato))})
+
+
+def _pagos(montos):
+    n = len(montos)
+    return pd.DataFrame({
+        "id_pago": pd.array(range(1, n + 1), dtype="Int64"),
+        "fecha": pd.to_datetime([f"2025-0{1 + i % 3}-10" for i in range(n)]),
+        "ubicacion": ["L1", "L2"] * (n // 2) + ["L1"] * (n % 2),
+        "cliente": ["Ana", "Beto"] * (n // 2) + ["Ana"] * (n % 2),
+        "monto": montos,
+    })
+
+
+def _gastos(montos):
+    n = len(montos)
+    return pd.DataFrame({
+        "id_gasto": pd.array(range(1, n + 1), dtype="Int64"),
+        "fecha": pd.to_datetime([f"2025-0{1 + i % 3}-05" for i in range(n)]),
+        "categoria": pd.Categorical(["Sueldos", "Otros"] * (n // 2) + ["Sueldos"] * (n % 2)),
+        "monto": montos,
+    })
+
+
+def _igual_a_completo(acumulado, df_v, df_p, df_g):
+    ingresos, gastos = acumulado.actualizar(df_v, df_p, df_g)
+    esperado_i, esperado_g = Acumulado().actualizar(df_v, df_p, df_g)
+    pd.testing.assert_frame_equal(ingresos.sort_index(), esperado_i.sort_index())
+    pd.testing.assert_frame_equal(gastos.sort_index(), esperado_g.sort_index())
+
+
+def test_gasto_editado_se_refleja():
+    acumulado = Acumulado()
+    df_v, df_p = _ventas(), _pagos([800.0, 300.0, 700.0])
+    _igual_a_completo(acumulado, df_v, df_p, _gastos([1500.0, 200.0, 300.0]))
+    _igual_a_completo(acumulado, df_v, df_p, _gastos([9999.0, 200.0, 300.0]))
+    assert acumulado.gastos["gastos"].sum() == 10499.0
+
+
+def test_pago_editado_se_refleja():
+    acumulado = Acumulado()
+    df_v, df_g = _ventas(), _gastos([100.0])
+    _igual_a_completo(acumulado, df_v, _pagos([800.0, 300.0, 700.0, 50.0]), df_g)
+    _igual_a_completo(acumulado, df_v, _pagos([800.0, 300.0, 100.0, 50.0]), df_g)
+
+
+def test_renglones_nuevos_sin_reconstruir():
+    acumulado = Acumulado()
+    df_v = _ventas()
+    _igual_a_completo(acumulado, df_v, _pagos([800.0, 300.0]), _gastos([100.0]))
+    _igual_a_completo(acumulado, df_v, _pagos([800.0, 300.0, 700.0, 50.0]), _gastos([100.0, 40.0]))
+    assert acumulado.reconstrucciones == 0
+
+
+def test_contrato_anterior_al_libro_abona_a_mensualidades():
+    # L1 capturó su enganche en ventas; sus pagos son mensualidades
+    df_v = _ventas(enganche_pagado=(1000.0, 0.0), estatus=("Activo", "Pendiente"), fecha_contrato=("2024-12-01", None))
+    ingresos, _ = Acumulado().actualizar(df_v, _pagos([800.0, 300.0, 700.0]), _gastos([100.0]))
+    l1 = ingresos.xs(("L1", "Ana"), level=["ubicacion", "cliente"])
+    assert l1["enganche"].sum() == 0.0 and l1["mensualidades"].sum() == 1500.0
+    assert ingresos.xs(("L2", "Beto"), level=["ubicacion", "cliente"])["enganche"].sum() == 300.0
+
+
+def test_cambio_de_apertura_reconstruye():
+    acumulado = Acumulado()
+    df_p, df_g = _pagos([800.0, 300.0, 700.0]), _gastos([100.0])
+    _igual_a_completo(acumulado, _ventas(), df_p, df_g)
+    df_v = _ventas(enganche_pagado=(1000.0, 0.0), estatus=("Activo", "Pendiente"), fecha_contrato=("2024-12-01", None))
+    _igual_a_completo(acumulado, df_v, df_p, df_g)
+    assert acumulado.reconstrucciones == 1
@@ -0,0 +1,23 @@
+import pandas as pd
+from modulos.liquidaciones import PagosAcumulados, pagado
+
+
+def _pagos_comisiones(montos):
+    n = len(montos)
+    return pd.DataFrame({"vendedor": ["Luis", "Marta"] * (n // 2) + ["Luis"] * (n % 2),
+                         "fecha": pd.to_datetime([f"2025-0{1 + i % 2}-15" for i in range(n)]),
+                         "monto": montos, "nota": ""})
+
+
+def test_correccion_de_un_pago_se_refleja():
+    acumulado = PagosAcumulados()
+    acumulado.actualizar(_pagos_comisiones([500.0, 300.0, 200.0]))
+    df_pc = _pagos_comisiones([50.0, 300.0, 200.0])
+    pd.testing.assert_frame_equal(acumulado.actualizar(df_pc).sort_index(), pagado(df_pc).sort_index())
+
+
+def test_pagos_nuevos_se_suman():
+    acumulado = PagosAcumulados()
+    acumulado.actualizar(_pagos_comisiones([500.0, 300.0]))
+    df_pc = _pagos_comisiones([500.0, 300.0, 200.0, 100.0])
+    pd.testing.assert_frame_equal(acumulado.actualizar(df_pc).sort_index(), pagado(df_pc).sort_index())
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+from modulos import esquema, migraciones
+from modulos.almacen import AlmacenLocal
+
+
+def _almacen(tmp_path):
+    almacen = AlmacenLocal(str(tmp_path / "prueba.db"))
+    # Pestaña de antes del registro: le faltan columnas y ya tiene datos
+    almacen.escribir("ventas", pd.DataFrame({"id_venta": [1], "ubicacion": ["M01-L01"], "cliente": ["Ana"]}))
+    return almacen
+
+
+def test_primera_corrida_completa_columnas_y_guarda_la_version(tmp_path):
+    almacen = _almacen(tmp_path)
+    assert migraciones.version_actual(almacen) == 0
+    assert [n for n, _ in migraciones.aplicar_migraciones(almacen)] == [n for n, _, _ in migraciones.MIGRACIONES]
+    assert migraciones.version_actual(almacen) == migraciones.MIGRACIONES[-1][0]
+
+    for pestana, columnas in esquema.ESQUEMA.items():
+        assert set(columnas) <= set(almacen.leer(pestana).columns)
+    ventas = almacen.leer("ventas")
+    assert ventas[["id_venta", "ubicacion", "cliente"]].to_dict("records") == [
+        {"id_venta": 1, "ubicacion": "M01-L01", "cliente": "Ana"}]
+
+
+def test_segunda_corrida_no_hace_nada(tmp_path):
+    almacen = _almacen(tmp_path)
+    migraciones.aplicar_migraciones(almacen)
+    antes = {p: almacen.leer(p) for p in list(esquema.ESQUEMA) + [migraciones.PESTANA_META]}
+    assert migraciones.pendientes(almacen) == []
+    assert migraciones.aplicar_migraciones(almacen) == []
+    for pestana, df in antes.items():
+        pd.testing.assert_frame_equal(almacen.leer(pestana), df)
+    assert len(almacen.leer(migraciones.PESTANA_META)) == 1
+
+
+def test_la_migracion_base_es_idempotente(tmp_path):
+    almacen = _almacen(tmp_path)
+    migraciones._m001_estructura_base(almacen)
+    primera = almacen.leer("ventas")
+    migraciones._m001_estructura_base(almacen)
+    pd.testing.assert_frame_equal(almacen.leer("ventas"), primera)
+
+
+def test_solo_corren_las_posteriores_a_la_version_guardada(tmp_path, monkeypatch):
+    almacen = _almacen(tmp_path)
+    migraciones.aplicar_migraciones(almacen)
+    corridas = []
+
+    def falla(_):
+        raise RuntimeError("sin conexión")
+    monkeypatch.setattr(migraciones, "MIGRACIONES", migraciones.MIGRACIONES + [
+        (2, "Segunda", lambda a: corridas.append(2)),
+        (3, "Tercera", falla),
+    ])
+    assert migraciones.pendientes(almacen) == [(2, "Segunda"), (3, "Tercera")]
+    with pytest.raises(RuntimeError):
+        migraciones.aplicar_migraciones(almacen)
+    assert corridas == [2]
+    assert migraciones.version_actual(almacen) == 2      # la que falló no se marca
+
+    migraciones.MIGRACIONES[-1] = (3, "Tercera", lambda a: corridas.append(3))
+    assert migraciones.aplicar_migraciones(almacen) == [(3, "Tercera")]
+    assert corridas == [2, 3] and migraciones.version_actual(almacen) == 3
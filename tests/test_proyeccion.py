@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+from modulos.proyeccion import proyectar
+
+HOY = pd.Timestamp("2026-03-10")
+
+
+def _plan():
+    # Contrato 1: una cuota vencida sin pagar, una parcial este mes y dos futuras. Contrato 2: ya pagó este mes.
+    return pd.DataFrame({
+        "id_venta": [1, 1, 1, 1, 2, 2],
+        "fecha": pd.to_datetime(["2026-02-15", "2026-03-15", "2026-04-15", "2026-05-15", "2026-03-01", "2026-04-01"]),
+        "monto": [1000.0, 1000.0, 1000.0, 1000.0, 500.0, 500.0],
+        "abonado": [0.0, 400.0, 0.0, 0.0, 500.0, 0.0],
+    })
+
+
+def test_sin_escenario_esperado_igual_a_programado():
+    proyeccion = proyectar(_plan(), meses=4, hoy=HOY)
+    assert proyeccion["programado"].tolist() == [600.0, 1500.0, 1000.0, 0.0]
+    assert proyeccion["cuotas"].tolist() == [1, 2, 1, 0]
+    pd.testing.assert_series_equal(proyeccion["esperado"], proyeccion["programado"], check_names=False)
+    assert proyeccion["acumulado"].iloc[-1] == 3100.0
+
+
+def test_morosidad_descuenta_cada_mes():
+    proyeccion = proyectar(_plan(), meses=4, hoy=HOY, morosidad=0.2)
+    assert proyeccion["esperado"].tolist() == pytest.approx([480.0, 1200.0, 800.0, 0.0])
+
+
+def test_anticipado_adelanta_el_saldo_sin_cambiar_el_total():
+    proyeccion = proyectar(_plan(), meses=4, hoy=HOY, anticipado=0.1)
+    # Contrato 1 (600, 1000, 1000): 0.1 * 2600 + 0.9 * 600 = 800 este mes; contrato 2: 0.1 * 500 = 50
+    assert proyeccion["esperado"].iloc[0] == pytest.approx(850.0)
+    assert proyeccion["esperado"].iloc[0] > proyeccion["programado"].iloc[0]
+    assert proyeccion["esperado"].sum() == pytest.approx(proyeccion["programado"].sum())
+
+
+def test_recuperacion_cobra_parte_de_lo_vencido_este_mes():
+    proyeccion = proyectar(_plan(), meses=4, hoy=HOY, recuperacion=0.5)
+    assert proyeccion["recuperado"].tolist() == [500.0, 0.0, 0.0, 0.0]
+    assert proyeccion["esperado"].iloc[0] == 1100.0
+    assert proyeccion["esperado"].iloc[1:].tolist() == proyeccion["programado"].iloc[1:].tolist()
+
+
+def test_plan_vacio_o_fuera_del_horizonte():
+    assert proyectar(_plan().iloc[:0], meses=3, hoy=HOY).to_numpy().sum() == 0
+    assert proyectar(_plan(), meses=1, hoy=HOY)["programado"].tolist() == [600.0]
@@ -0,0 +1,40 @@
+import pandas as pd
+from modulos.repositorio import Indice, Repositorio
+
+
+def _ventas():
+    return pd.DataFrame({"id_venta": [1, 2, 3, None], "ubicacion": ["M01-L01", "M01-L02 ", "M01-L02", "M01-L04"],
+                         "cliente": ["Ana", "Beto", "Carla", "Dora"]})
+
+
+def test_llaves_equivalentes_y_primer_renglon():
+    indice = Indice(_ventas(), "ubicacion")
+    assert indice.buscar("M01-L02")["cliente"] == "Beto"       # el primero de los repetidos
+    assert indice.repetido("M01-L02") and not indice.repetido("M01-L01")
+    assert indice.buscar("M09-L99") is None and "M09-L99" not in indice
+
+    ids = Indice(_ventas(), "id_venta")
+    assert ids.buscar(2)["cliente"] == ids.buscar("2")["cliente"] == ids.buscar(2.0)["cliente"] == "Beto"
+    assert len(ids) == 3                                         # el id vacío no es llave
+    assert ids.buscar(None) is None
+
+
+def test_duplicados_por_pestana_y_llave():
+    clientes = pd.DataFrame({"id_cliente": [1, 2, 2], "nombre": ["Ana", "Ana", "Beto"]})
+    repo = Repositorio(ventas=_ventas(), clientes=clientes)
+    assert repo.duplicados() == {("ventas", "ubicacion"): ["M01-L02"],
+                                 ("clientes", "nombre"): ["Ana"],
+                                 ("clientes", "id_cliente"): ["2"]}
+    assert Repositorio(ventas=_ventas().drop(index=2)).duplicados() == {}
+
+
+def test_contrato_con_lote_cliente_y_pagos():
+    pagos = pd.DataFrame({"id_pago": [1, 2, 3], "ubicacion": ["M01-L01", "M01-L04", "M01-L01"], "monto": [1.0, 2.0, 3.0]})
+    clientes = pd.DataFrame({"id_cliente": [1], "nombre": ["Ana"]})
+    repo = Repositorio(ventas=_ventas(), pagos=pagos, clientes=clientes)
+    contrato = repo.contrato("M01-L01")
+    assert contrato.venta["cliente"] == "Ana" and contrato.cliente["id_cliente"] == 1
+    assert contrato.lote is None
+    assert contrato.pagos["monto"].tolist() == [1.0, 3.0]
+    assert repo.pagos_de("M09-L99").empty
+    assert repo.contrato("M09-L99") is None
@@ -0,0 +1,52 @@
+import pandas as pd
+from modulos.saldos import Saldos, agregar_pagos, saldos_por_lote
+
+
+def _pagos(montos):
+    return pd.DataFrame({
+        "id_pago": pd.array(range(1, len(montos) + 1), dtype="Int64"),
+        "fecha": pd.to_datetime([f"2025-01-{i + 1:02d}" for i in range(len(montos))]),
+        "ubicacion": ["L1", "L2", "L1", "L3", "L2"][:len(montos)],
+        "cliente": ["Ana", "Beto", "Ana", "Carla", "Beto"][:len(montos)],
+        "monto": montos,
+    })
+
+
+def _igual_a_completo(saldos, df_p):
+    incremental = saldos.actualizar(df_p).sort_index()
+    completo = agregar_pagos(df_p).sort_index()
+    pd.testing.assert_frame_equal(incremental, completo, check_like=True)
+
+
+def test_renglones_al_final_se_suman_sin_reconstruir():
+    saldos = Saldos()
+    _igual_a_completo(saldos, _pagos([100.0, 200.0, 300.0]))
+    _igual_a_completo(saldos, _pagos([100.0, 200.0, 300.0, 400.0, 500.0]))
+    assert saldos.reconstrucciones == 1
+
+
+def test_editar_un_pago_intermedio_reconstruye():
+    saldos = Saldos()
+    _igual_a_completo(saldos, _pagos([100.0, 200.0, 300.0, 400.0]))
+    _igual_a_completo(saldos, _pagos([100.0, 999.0, 300.0, 400.0]))
+    assert saldos.reconstrucciones == 2
+
+
+def test_borrar_un_pago_intermedio_reconstruye():
+    saldos = Saldos()
+    df_p = _pagos([100.0, 200.0, 300.0, 400.0])
+    _igual_a_completo(saldos, df_p)
+    _igual_a_completo(saldos, df_p.drop(index=1).reset_index(drop=True))
+    assert saldos.reconstrucciones == 2
+
+
+def test_contrato_anterior_al_libro_abona_a_mensualidades():
+    # Enganche de 10000 capturado solo en ventas y tres pagos de 2000 después del contrato
+    df_v = pd.DataFrame({"ubicacion": ["L1"], "cliente": ["Ana"], "enganche_requerido": [10000.0],
+                         "enganche_pagado": [10000.0], "estatus_pago": ["Activo"],
+                         "fecha_contrato": pd.to_datetime(["2024-12-15"])})
+    df_p = _pagos([2000.0, 2000.0, 2000.0]).assign(ubicacion="L1", cliente="Ana")
+    lote = saldos_por_lote(df_p, df_v).loc["L1"]
+    assert lote["total_pagado"] == 6000.0
+    assert lote["a_enganche"] == 0.0
+    assert lote["a_mensualidades"] == 6000.0
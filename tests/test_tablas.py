@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+from modulos.tablas import coincide, ordenar
+
+
+def _pagos():
+    return pd.DataFrame({
+        "id_pago": [1, 2, 3, 4, 5],
+        "cliente": pd.Categorical(["Ana", "Beto", "ana maría", "Carla", "Beto"]),
+        "monto": [300.0, 100.0, np.nan, 300.0, 50.0],
+        "nota": ["Enganche", None, "mensualidad", "MENSUALIDAD", "otro"],
+    })
+
+
+def test_coincide_sin_mayusculas_en_texto_y_categorias():
+    df = _pagos()
+    assert coincide(df["nota"], "mensual").tolist() == [False, False, True, True, False]
+    assert coincide(df["cliente"], "ANA").tolist() == [True, False, True, False, False]
+    assert coincide(df["nota"], "a.b").tolist() == [False] * 5     # texto literal, no expresión regular
+
+
+def test_ordenar_por_posiciones_con_empates_y_nulos():
+    df = _pagos()
+    # Empate en 300: lo más nuevo (renglón 3) primero; el nulo al final en ambos sentidos
+    assert ordenar(df, "monto").tolist() == [3, 0, 1, 4, 2]
+    assert ordenar(df, "monto", descendente=False).tolist() == [4, 1, 0, 3, 2]
+    assert ordenar(df, "id_pago").tolist() == [4, 3, 2, 1, 0]
+
+
+def test_ordenar_con_filtro_no_toca_el_dataframe():
+    df = _pagos()
+    original = df.copy()
+    mascara = coincide(df["cliente"], "beto")
+    assert ordenar(df, "monto", mascara=mascara).tolist() == [1, 4]
+    assert ordenar(df, "monto", mascara=np.zeros(len(df), dtype=bool)).tolist() == []
+    pd.testing.assert_frame_equal(df, original)
+
+
+def _app():
+    import pandas as pd
+    from modulos.tablas import tabla_paginada
+    df = pd.DataFrame({"id_pago": range(1, 121), "monto": [float(n) for n in range(1, 121)]})
+    tabla_paginada(df, key="t", orden="id_pago", filas=50)
+
+
+def test_paginas_muestran_solo_la_ventana():
+    app = AppTest.from_function(_app).run()
+    assert app.dataframe[0].value["id_pago"].tolist() == list(range(120, 70, -1))
+    assert app.caption[0].value == "1–50 de 120 renglones"
+
+    app.number_input(key="t_pagina").set_value(3).run()
+    assert app.dataframe[0].value["id_pago"].tolist() == list(range(20, 0, -1))
+    assert app.caption[0].value == "101–120 de 120 renglones"
+
+    # Un filtro que deja una sola página regresa a ella
+    app.text_input(key="t_filtro").input("11").run()
+    assert app.dataframe[0].value["id_pago"].tolist() == [119, 118, 117, 116, 115, 114, 113, 112, 111, 110, 11]
+    assert app.caption[0].value == "1–11 de 11 renglones"
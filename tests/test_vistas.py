@@ -0,0 +1,67 @@
+import gc
+import pandas as pd
+from modulos import vistas
+from modulos.vistas import Vistas, calcular_huella
+
+
+def _df(n=3):
+    return pd.DataFrame({"id_venta": range(1, n + 1), "monto": [100.0] * n})
+
+
+def _contar():
+    llamadas = []
+
+    def funcion(df, **params):
+        llamadas.append(params)
+        return len(df)
+    return funcion, llamadas
+
+
+def test_misma_entrada_sale_del_cache_y_los_params_con_guion_no_entran_en_la_llave():
+    cache, (funcion, llamadas) = Vistas(), _contar()
+    df = _df()
+    assert cache.obtener("v", funcion, (df,), {"mes": 1, "_fmt": str}) == 3
+    assert cache.obtener("v", funcion, (_df(),), {"mes": 1, "_fmt": repr}) == 3   # mismo contenido, otro objeto
+    assert len(llamadas) == 1 and (cache.aciertos, cache.fallos) == (1, 1)
+    cache.obtener("v", funcion, (df,), {"mes": 2, "_fmt": str})
+    cache.obtener("v", funcion, (df.assign(monto=5.0),), {"mes": 1, "_fmt": str})
+    assert len(llamadas) == 3
+
+
+def test_lru_descarta_la_menos_usada():
+    cache, (funcion, llamadas) = Vistas(maximo=2), _contar()
+    a, b, c = _df(1), _df(2), _df(3)
+    cache.obtener("v", funcion, (a,), {})
+    cache.obtener("v", funcion, (b,), {})
+    cache.obtener("v", funcion, (a,), {})      # a pasa a ser la más reciente
+    cache.obtener("v", funcion, (c,), {})      # sale b
+    assert len(cache) == 2
+    cache.obtener("v", funcion, (a,), {})
+    assert len(llamadas) == 3
+    cache.obtener("v", funcion, (b,), {})
+    assert len(llamadas) == 4
+
+
+def test_la_huella_se_calcula_una_vez_por_objeto(monkeypatch):
+    calculos = []
+    original = vistas.calcular_huella
+    monkeypatch.setattr(vistas, "calcular_huella", lambda obj: calculos.append(1) or original(obj))
+    cache, (funcion, _) = Vistas(), _contar()
+    df = _df()
+    for _ in range(3):
+        cache.obtener("v", funcion, (df,), {})
+    assert len(calculos) == 1
+
+    # Al liberarse el objeto se olvida su huella (un id reutilizado no hereda la anterior)
+    del df
+    gc.collect()
+    assert cache._huellas == {}
+
+
+def test_huella_de_frame_cargado_es_su_version():
+    df = _df()
+    df.attrs["vallemart_version"] = ("ventas", 7, len(df), tuple(df.columns))
+    assert calcular_huella(df) == ("ventas", 7)
+    assert calcular_huella(df.iloc[:1]) != ("ventas", 7)
+    assert calcular_huella(_df()) == calcular_huella(_df())
+    assert calcular_huella("texto") == "texto"